@@ -1,11 +1,19 @@
 from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter, SimpleRouter
-from ilgi.energy_journal.viewsets import EnergyLogViewSet
+from ilgi.energy_journal.viewsets import EnergyLogImportViewSet, EnergyLogViewSet
+from ilgi.finance.viewsets import StatementImportViewSet, TransactionViewSet
 
 router = DefaultRouter() if settings.DEBUG else SimpleRouter()
 
 router.register(r"energy-logs", EnergyLogViewSet, basename="energy-logs")
+router.register(
+    r"energy-log-imports", EnergyLogImportViewSet, basename="energy-log-imports"
+)
+router.register(r"transactions", TransactionViewSet, basename="transactions")
+router.register(
+    r"statement-imports", StatementImportViewSet, basename="statement-imports"
+)
 
 app_name = "api"
 urlpatterns = [
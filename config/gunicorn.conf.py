@@ -0,0 +1,167 @@
+"""
+gunicorn configuration, see the Dockerfile:
+
+    gunicorn -c config/gunicorn.conf.py
+
+Settings come from the environment:
+
+    GUNICORN_WORKER_CLASS   "uvicorn" (config.asgi, the default) or
+                            "gthread" (config.wsgi, the default where
+                            uvicorn isn't installed)
+    GUNICORN_WORKERS        workers; by default as many as the CPUs and
+                            memory of the host (or container) allow
+    GUNICORN_THREADS        threads per gthread worker
+    GUNICORN_WORKER_MEMORY  MiB to budget per worker, 256 by default
+    GUNICORN_MAX_REQUESTS   requests before a worker is replaced, 1000 by
+                            default, 0 to never replace workers
+    GUNICORN_PRELOAD        load the app before forking, true by default
+    PORT                    port to bind, 8000 by default
+
+With preload, the master imports Django and every view once and fills
+process-wide caches (the URL resolver, content types) before forking, so
+workers share those memory pages copy-on-write instead of each building
+its own. Workers then open their database connections (filling their pool,
+where there is one) and cache connections before they accept requests.
+"""
+
+import os
+import sys
+from importlib.util import find_spec
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings.env import ENV_BOOL, ENV_INT, ENV_STR  # noqa: E402
+
+WORKER_CLASSES = {
+    "uvicorn": ("uvicorn.workers.UvicornWorker", "config.asgi:application"),
+    "gthread": ("gthread", "config.wsgi:application"),
+}
+
+
+def cpu_count():
+    """
+    CPUs this process may use: its CPU affinity, capped by the cgroup (v2)
+    CPU quota of the container, if any.
+    """
+
+    count = len(os.sched_getaffinity(0))
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            count = min(count, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def memory_mib():
+    """
+    Memory this process may use in MiB: the host's, capped by the cgroup
+    (v2) memory limit of the container, if any.
+    """
+
+    memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    try:
+        with open("/sys/fs/cgroup/memory.max") as f:
+            limit = f.read().strip()
+        if limit != "max":
+            memory = min(memory, int(limit))
+    except (OSError, ValueError):
+        pass
+    return memory // 2**20
+
+
+def default_workers(worker_class, cpus, memory, worker_memory):
+    """
+    Workers for `cpus` CPUs and `memory` MiB. uvicorn workers don't block
+    on I/O, so one per CPU keeps them busy; gthread workers do between
+    their threads, so the usual 2 per CPU + 1. Either way only as many as
+    `worker_memory` MiB each fits in memory, and at least one.
+    """
+
+    workers = cpus if worker_class == "uvicorn" else 2 * cpus + 1
+    return max(1, min(workers, memory // worker_memory))
+
+
+worker_name = ENV_STR(
+    "GUNICORN_WORKER_CLASS", "uvicorn" if find_spec("uvicorn") else "gthread"
+)
+if worker_name not in WORKER_CLASSES:
+    raise ValueError(
+        f"GUNICORN_WORKER_CLASS must be one of {', '.join(WORKER_CLASSES)}, "
+        f"not {worker_name!r}"
+    )
+worker_class, wsgi_app = WORKER_CLASSES[worker_name]
+
+workers = ENV_INT("GUNICORN_WORKERS", 0) or default_workers(
+    worker_name,
+    cpu_count(),
+    memory_mib(),
+    ENV_INT("GUNICORN_WORKER_MEMORY", 256),
+)
+threads = ENV_INT("GUNICORN_THREADS", 4) if worker_name == "gthread" else 1
+
+bind = f"0.0.0.0:{ENV_INT('PORT', 8000)}"
+worker_tmp_dir = "/dev/shm"
+accesslog = "-"
+errorlog = "-"
+
+preload_app = ENV_BOOL("GUNICORN_PRELOAD", True)
+
+# replace workers now and then so leaks can't build up, at jittered counts
+# so they don't all restart at once
+max_requests = ENV_INT("GUNICORN_MAX_REQUESTS", 1000)
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    """
+    Fill process-wide caches in the master, when the app was preloaded,
+    then close the connections that took, which forks mustn't share.
+    """
+
+    if not server.cfg.preload_app:
+        return
+
+    from django.contrib.contenttypes.models import ContentType
+    from django.apps import apps
+    from django.core.cache import caches
+    from django.db import connections
+    from django.urls import get_resolver
+
+    # imports every view, serializer and schema module
+    get_resolver().url_patterns
+    ContentType.objects.get_for_models(*apps.get_models())
+
+    connections.close_all()
+    for connection in connections.all():
+        # pools have threads and sockets of their own, workers open their own
+        if getattr(connection, "pool", None) is not None:
+            connection.close_pool()
+    caches.close_all()
+    server.log.info("Preloaded URL patterns and content types")
+
+
+def post_worker_init(worker):
+    """
+    Connect to the databases and caches before the worker accepts requests,
+    so the first requests don't wait for connections, and a worker that
+    can't reach them fails here.
+    """
+
+    from django.core.cache import caches
+    from django.db import connections
+
+    for connection in connections.all():
+        pool = getattr(connection, "pool", None)
+        if pool is not None:
+            # fill the pool to its minimum size
+            pool.open(wait=True)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    for cache in caches.all():
+        cache.get("gunicorn-warm-up")
+    # returned to the pool, where there is one
+    connections.close_all()
+    worker.log.info("Connected to the databases and caches")
@@ -1,5 +1,6 @@
 from .env import ABS_PATH, ENV_BOOL, ENV_STR, ENV_LIST, ENV_INT
 from corsheaders.defaults import default_headers
+from celery.schedules import crontab
 import environ
 
 env = environ.Env()
@@ -41,6 +42,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "utils.throttling.RateLimitHeadersMiddleware",
     # "allauth.account.middleware.AccountMiddleware",
 ]
 
@@ -63,10 +65,65 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
 DATABASES = {"default": env.db("DATABASE_URL", default="postgres:///ilgi")}
+# Check connections are alive before reusing them
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = ENV_BOOL("DATABASE_HEALTH_CHECKS", True)
+if DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql" and ENV_BOOL(
+    "DATABASE_POOL", True
+):
+    # A psycopg pool per process that requests borrow connections from and
+    # return them to, instead of connecting each time; see utils.metrics for
+    # its statistics. Seconds to wait for a free connection, and after which
+    # idle and any connections are replaced
+    DATABASES["default"].setdefault("OPTIONS", {})["pool"] = {
+        "min_size": ENV_INT("DATABASE_POOL_MIN_SIZE", 2),
+        "max_size": ENV_INT("DATABASE_POOL_MAX_SIZE", 10),
+        "timeout": ENV_INT("DATABASE_POOL_TIMEOUT", 10),
+        "max_idle": ENV_INT("DATABASE_POOL_MAX_IDLE", 600),
+        "max_lifetime": ENV_INT("DATABASE_POOL_MAX_LIFETIME", 3600),
+    }
+else:
+    # Seconds each thread keeps its connection open between requests. Only
+    # for WSGI workers: under ASGI each request runs in a new thread, whose
+    # connection would never be reused
+    DATABASES["default"]["CONN_MAX_AGE"] = ENV_INT("DATABASE_CONN_MAX_AGE", 0)
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+REDIS_URL = ENV_STR("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+            "OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},
+        }
+    }
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+# Size and seconds of the per-process LRU in front of the shared cache, see
+# utils.cache; the seconds are the longest a delete takes to reach every
+# process, 0 disables the LRU
+CACHE_LOCAL_SIZE = ENV_INT("CACHE_LOCAL_SIZE", 1024)
+CACHE_LOCAL_TIMEOUT = ENV_INT("CACHE_LOCAL_TIMEOUT", 5)
+
+# Seconds to keep per-user API responses for, 0 disables the cache
+RESPONSE_CACHE_TIMEOUT = ENV_INT("RESPONSE_CACHE_TIMEOUT", 300)
+
+# Users resolved by JWT authentication, see ilgi.users.cache: seconds to keep
+# them in the shared cache, and size and seconds of the per-process LRU, the
+# longest a change to a user takes to reach every process
+AUTH_USER_CACHE_TIMEOUT = ENV_INT("AUTH_USER_CACHE_TIMEOUT", 300)
+AUTH_USER_LOCAL_CACHE_SIZE = ENV_INT("AUTH_USER_LOCAL_CACHE_SIZE", 1024)
+AUTH_USER_LOCAL_CACHE_TIMEOUT = ENV_INT("AUTH_USER_LOCAL_CACHE_TIMEOUT", 5)
+
+# ISO 4217 code of the currency money columns are kept in, see utils.money.
+# Amounts are stored as integers of its minor units, so it can't change once
+# there is data: the same integers would be read with other decimal places
+CURRENCY = ENV_STR("CURRENCY", "INR")
+
 AUTH_USER_MODEL = "users.User"
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -122,7 +179,7 @@ DEFAULT_FROM_EMAIL = ENV_STR("DEFAULT_FROM_EMAIL", SERVER_EMAIL)
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "ilgi.users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_SCHEMA_CLASS": "utils.schema.AutoSchema",
     "TEST_REQUEST_DEFAULT_FORMAT": "json",
@@ -130,8 +187,8 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 100,
     "COERCE_DECIMAL_TO_STRING": False,
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "utils.throttling.AnonRateThrottle",
+        "utils.throttling.UserRateThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "anon": ENV_STR("THROTTLE_ANONYMOUS", "100/hour"),
@@ -139,6 +196,11 @@ REST_FRAMEWORK = {
     },
 }
 
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "ilgi.users.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "ilgi.users.serializers.TokenRefreshSerializer",
+}
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "ilgi API",
     "DESCRIPTION": "Documentation of API endpoints of ilgi. Authored by Rithvik Nishad.",
@@ -180,6 +242,7 @@ LOGGING = {
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS = default_headers + ("content-disposition",)
+CORS_EXPOSE_HEADERS = ["RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset"]
 
 AWS_ACCESS_KEY_ID = ENV_STR("AWS_ACCESS_KEY_ID", "")
 AWS_SECRET_ACCESS_KEY = ENV_STR("AWS_SECRET_ACCESS_KEY", "")
@@ -193,7 +256,16 @@ CELERY_ALWAYS_EAGER = ENV_BOOL("CELERY_ALWAYS_EAGER", False)
 
 # Periodic tasks via Celery Beat
 # See https://docs.celeryproject.org/en/stable/userguide/periodic-tasks.html#beat-entries
-CELERY_BEAT_SCHEDULE = {}
+CELERY_BEAT_SCHEDULE = {
+    "rebuild-balance-snapshots": {
+        "task": "ilgi.finance.tasks.snapshots.rebuild_balance_snapshots",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    "reconcile-account-balances": {
+        "task": "ilgi.finance.tasks.reconciliation.reconcile_account_balances",
+        "schedule": crontab(minute=30),
+    },
+}
 
 if ENV_BOOL("USE_X_FORWARDED_PROTO"):
     SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
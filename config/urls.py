@@ -1,5 +1,6 @@
 from django.urls import include, path
 from config import api_router
+from utils.metrics import MetricsView
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularRedocView,
@@ -18,5 +19,6 @@ urlpatterns = [
     # API
     path("api/", include("openapi.urls")),
     path("api/auth/", include("ilgi.users.urls")),
+    path("api/metrics/", MetricsView.as_view(), name="metrics"),
     path("api/", include(api_router.urlpatterns)),
 ]
@@ -1,5 +1,11 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class EnergyJournalConfig(AppConfig):
     name = "ilgi.energy_journal"
+
+    def ready(self):
+        from ilgi.energy_journal.search import ensure_sqlite_triggers
+
+        post_migrate.connect(ensure_sqlite_triggers, sender=self)
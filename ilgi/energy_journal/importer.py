@@ -0,0 +1,144 @@
+import csv
+import json
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from ilgi.energy_journal.models import EnergyLog, EnergyLogImport, update_energy_rollups
+from ilgi.energy_journal.serializers import EnergyLogSerializer
+from utils.response_cache import invalidate_user_responses
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+def parse_energy_logs(file, file_format):
+    """
+    Iterate over the rows of a binary NDJSON or CSV file as dicts, reading
+    it line by line. Rows that can't be read, as malformed NDJSON, CSV rows
+    the csv module rejects or text that isn't UTF-8, are yielded as
+    ValueErrors so they can be reported against their row like any other
+    invalid row.
+    """
+
+    lines = _DecodedLines(file)
+    if file_format == EnergyLogImport.FileFormat.CSV:
+        reader = csv.DictReader(lines)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as error:
+                row = ValueError(str(error))
+            yield lines.take_error() or row
+        return
+
+    for line in lines:
+        error = lines.take_error()
+        if error is not None:
+            yield error
+        elif line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                yield error
+
+
+class _DecodedLines:
+    """
+    The lines of a binary file as UTF-8 text, the first one without a byte
+    order mark, as `open(..., encoding="utf-8-sig", newline="")` reads them.
+    Bytes that aren't UTF-8 are replaced, and the first decoding error is
+    kept until `take_error`, so that only their row fails.
+    """
+
+    def __init__(self, file):
+        self.lines = iter(file)
+        self.encoding = "utf-8-sig"
+        self.error = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = next(self.lines)
+        encoding, self.encoding = self.encoding, "utf-8"
+        try:
+            return line.decode(encoding)
+        except UnicodeDecodeError as error:
+            self.error = self.error or error
+            return line.decode(encoding, errors="replace")
+
+    def take_error(self):
+        error, self.error = self.error, None
+        return error
+
+
+def run_energy_log_import(job, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import the file of an EnergyLogImport job.
+
+    Every row is validated with the same rules as the API (see
+    EnergyLogSerializer) and valid rows are inserted in fixed-size
+    `bulk_create` batches. The job's counters and error report are saved
+    after each batch so clients can poll it for progress; batches already
+    inserted are kept even if a later row fails validation.
+    """
+
+    job.status = EnergyLogImport.Status.RUNNING
+    job.save(update_fields=["status", "updated_at"])
+
+    validator = EnergyLogSerializer()
+    batch = []
+    try:
+        with job.file.open("rb") as file:
+            for number, row in enumerate(parse_energy_logs(file, job.file_format), 1):
+                job.processed_rows += 1
+                try:
+                    if isinstance(row, ValueError):
+                        raise ValidationError(
+                            {"non_field_errors": [f"Malformed row: {row}"]}
+                        )
+                    data = validator.run_validation(row)
+                except ValidationError as error:
+                    job.failed_rows += 1
+                    if len(job.errors) < MAX_REPORTED_ERRORS:
+                        job.errors.append({"row": number, "errors": error.detail})
+                    continue
+
+                batch.append(EnergyLog(created_by=job.created_by, **data))
+                if len(batch) >= batch_size:
+                    _insert_batch(job, batch)
+                    batch = []
+        _insert_batch(job, batch)
+    except Exception:
+        logger.exception("Energy log import %s failed", job.external_id)
+        job.status = EnergyLogImport.Status.FAILED
+    else:
+        job.status = EnergyLogImport.Status.COMPLETED
+
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def _insert_batch(job, batch):
+    with transaction.atomic():
+        EnergyLog.objects.bulk_create(batch)
+        update_energy_rollups(added=[log.get_rollup_key() for log in batch])
+        invalidate_user_responses(job.created_by_id)
+        job.imported_rows += len(batch)
+        job.save(
+            update_fields=[
+                "processed_rows",
+                "imported_rows",
+                "failed_rows",
+                "errors",
+                "updated_at",
+            ]
+        )
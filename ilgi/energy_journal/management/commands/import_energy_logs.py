@@ -0,0 +1,57 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from ilgi.energy_journal.importer import IMPORT_BATCH_SIZE, run_energy_log_import
+from ilgi.energy_journal.models import EnergyLogImport
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Import energy logs for a user from an NDJSON or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON or CSV file to import")
+        parser.add_argument("--user", required=True, help="Email of the owner")
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=EnergyLogImport.FileFormat.values,
+            help="Defaults to csv for .csv files and ndjson otherwise",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help="Number of logs to insert per query",
+        )
+
+    def handle(self, *args, path, user, file_format, batch_size, **options):
+        try:
+            owner = User.objects.get_by_natural_key(user)
+        except User.DoesNotExist:
+            raise CommandError(f"User {user} does not exist")
+
+        if file_format is None:
+            is_csv = path.lower().endswith(".csv")
+            file_format = "csv" if is_csv else "ndjson"
+
+        with open(path, "rb") as file:
+            job = EnergyLogImport.objects.create(
+                created_by=owner,
+                file=File(file, name=os.path.basename(path)),
+                file_format=file_format,
+            )
+
+        job = run_energy_log_import(job, batch_size=batch_size)
+        for error in job.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(
+            f"Import {job.status}: {job.imported_rows} imported, "
+            f"{job.failed_rows} failed of {job.processed_rows} rows"
+        )
+        if job.status == EnergyLogImport.Status.FAILED:
+            raise CommandError("Import failed, see the log for details")
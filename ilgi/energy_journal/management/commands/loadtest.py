@@ -0,0 +1,248 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ilgi.energy_journal.models import EnergyLog
+from ilgi.users.serializers import TokenObtainPairSerializer
+
+User = get_user_model()
+
+# gunicorn arguments and environment of the deployments `--serve` starts:
+# sync workers, and config/gunicorn.conf.py with each of its worker classes
+DEPLOYMENTS = {
+    "wsgi": (["config.wsgi:application"], {}),
+    "gthread": (
+        ["-c", "config/gunicorn.conf.py", "--access-logfile", os.devnull],
+        {"GUNICORN_WORKER_CLASS": "gthread"},
+    ),
+    "asgi": (
+        ["-c", "config/gunicorn.conf.py", "--access-logfile", os.devnull],
+        {"GUNICORN_WORKER_CLASS": "uvicorn"},
+    ),
+}
+# the servers are for measuring, so they answer on localhost and don't throttle
+SERVER_ENV = {
+    "ALLOWED_HOSTS": "127.0.0.1",
+    "THROTTLE_AUTHENTICATED": "1000000000/hour",
+}
+SERVER_START_TIMEOUT = 30
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the energy log and me endpoints of running servers, or of "
+        "WSGI and ASGI gunicorn servers started for the test, reporting "
+        "p50 and p99 latency and requests per second per concurrency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", required=True, help="Email of the user to request as"
+        )
+        parser.add_argument(
+            "--url",
+            action="append",
+            default=[],
+            help="Base URL of a running server, e.g. http://localhost:8000; "
+            "can be repeated",
+        )
+        parser.add_argument(
+            "--serve",
+            action="store_true",
+            help="Start sync and gthread (WSGI) and uvicorn (ASGI) gunicorn "
+            "servers in turn, on the configured database, and test each",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Workers of the servers started with --serve",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[50, 100, 250, 500],
+            help="Numbers of concurrent connections to test with",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=10,
+            help="Seconds to test each concurrency for",
+        )
+
+    def handle(self, *args, user, url, serve, workers, concurrency, **options):
+        if not url and not serve:
+            raise CommandError("Pass --url, --serve or both")
+        try:
+            owner = User.objects.get_by_natural_key(user)
+        except User.DoesNotExist:
+            raise CommandError(f"User {user} does not exist")
+
+        token = TokenObtainPairSerializer.get_token(owner).access_token
+        paths = ["/api/energy-logs/", "/api/auth/me/"]
+        log = EnergyLog.objects.filter(created_by=owner).first()
+        if log is not None:
+            paths.append(f"/api/energy-logs/{log.external_id}/")
+
+        targets = [(base_url, base_url) for base_url in url]
+        if serve:
+            targets += [(name, None) for name in DEPLOYMENTS]
+
+        for name, base_url in targets:
+            server = None
+            if base_url is None:
+                server, base_url = self.start_server(name, workers)
+            try:
+                for path in paths:
+                    for connections in concurrency:
+                        stats = asyncio.run(
+                            load(
+                                base_url + path,
+                                f"Bearer {token}",
+                                connections,
+                                options["duration"],
+                            )
+                        )
+                        self.stdout.write(
+                            f"{name} {path} c={connections}: {format_stats(stats)}"
+                        )
+            finally:
+                if server is not None:
+                    server.terminate()
+                    server.wait()
+
+    def start_server(self, name, workers):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        arguments, env = DEPLOYMENTS[name]
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "--workers",
+                str(workers),
+                "--bind",
+                f"127.0.0.1:{port}",
+                "--log-level",
+                "warning",
+                *arguments,
+            ],
+            env={**os.environ, **SERVER_ENV, **env},
+        )
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return server, f"http://127.0.0.1:{port}"
+            except OSError:
+                if server.poll() is not None:
+                    break
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f"The {name} server didn't start")
+
+
+async def load(url, authorization, connections, duration):
+    """
+    Request `url` over `connections` keep-alive connections, each sending
+    its next request when the last response is read, for `duration` seconds.
+    Return the latencies of the successful requests, the counts of the
+    failed ones by status (or "error" if the connection failed) and the
+    elapsed time.
+    """
+
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    request = (
+        f"GET {parts.path or '/'} HTTP/1.1\r\n"
+        f"Host: {parts.netloc}\r\n"
+        f"Authorization: {authorization}\r\n"
+        "Accept: application/json\r\n"
+        "\r\n"
+    ).encode()
+    latencies, errors = [], Counter()
+    deadline = time.monotonic() + duration
+
+    async def connection():
+        reader = writer = None
+        while time.monotonic() < deadline:
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                start = time.perf_counter()
+                writer.write(request)
+                status, keep_alive = await read_response(reader)
+                latency = time.perf_counter() - start
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                errors["error"] += 1
+                if writer is not None:
+                    writer.close()
+                reader = writer = None
+                continue
+            if status == 200:
+                latencies.append(latency)
+            else:
+                errors[status] += 1
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+        if writer is not None:
+            writer.close()
+
+    start = time.monotonic()
+    await asyncio.gather(*(connection() for _ in range(connections)))
+    return latencies, errors, time.monotonic() - start
+
+
+async def read_response(reader):
+    """
+    Read an HTTP/1.1 response, returning its status and whether the
+    connection stays open.
+    """
+
+    status = int((await reader.readline()).split()[1])
+    length, chunked, keep_alive = 0, False, True
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding":
+            chunked = "chunked" in value
+        elif name == "connection":
+            keep_alive = value != "close"
+
+    if not chunked:
+        await reader.readexactly(length)
+        return status, keep_alive
+    while size := int((await reader.readline()).split(b";")[0], 16):
+        await reader.readexactly(size + 2)
+    await reader.readline()
+    return status, keep_alive
+
+
+def format_stats(stats):
+    latencies, errors, elapsed = stats
+    failed = ", ".join(f"{count} {status}" for status, count in errors.items())
+    if len(latencies) < 2:
+        return f"{len(latencies)} ok, failed: {failed or 'none'}"
+    percentiles = statistics.quantiles(latencies, n=100)
+    return (
+        f"{len(latencies) / elapsed:,.0f} req/s, "
+        f"p50 {percentiles[49] * 1000:.1f} ms, "
+        f"p99 {percentiles[98] * 1000:.1f} ms, "
+        f"failed: {failed or 'none'}"
+    )
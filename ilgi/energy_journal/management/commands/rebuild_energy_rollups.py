@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ilgi.energy_journal.models import ENERGY_ROLLUPS, EnergyLog
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily, weekly and monthly energy rollups from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rollup rows to insert per query",
+        )
+
+    def handle(self, *args, batch_size, **options):
+        for period, rollup in ENERGY_ROLLUPS.items():
+            buckets = rollup.aggregate(EnergyLog.objects.all())
+            with transaction.atomic():
+                rollup.objects.all().delete()
+                created = rollup.objects.bulk_create(
+                    (rollup(**bucket) for bucket in buckets.iterator()),
+                    batch_size=batch_size,
+                )
+            self.stdout.write(f"Rebuilt {len(created)} {period} rollups")
@@ -0,0 +1,123 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("energy_journal", "0003_energylog_user_date_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyEnergyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateField(help_text="First day of the bucket")),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("total", models.IntegerField(default=0)),
+                ("minimum", models.SmallIntegerField()),
+                ("maximum", models.SmallIntegerField()),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("created_by", "bucket"),
+                        name="dailyenergyrollup_user_bucket",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="MonthlyEnergyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateField(help_text="First day of the bucket")),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("total", models.IntegerField(default=0)),
+                ("minimum", models.SmallIntegerField()),
+                ("maximum", models.SmallIntegerField()),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("created_by", "bucket"),
+                        name="monthlyenergyrollup_user_bucket",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="WeeklyEnergyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateField(help_text="First day of the bucket")),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("total", models.IntegerField(default=0)),
+                ("minimum", models.SmallIntegerField()),
+                ("maximum", models.SmallIntegerField()),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("created_by", "bucket"),
+                        name="weeklyenergyrollup_user_bucket",
+                    )
+                ],
+            },
+        ),
+    ]
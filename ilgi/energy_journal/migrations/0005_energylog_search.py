@@ -0,0 +1,62 @@
+from django.db import migrations
+
+from ilgi.energy_journal.search import install_sqlite_triggers
+
+POSTGRESQL_FORWARDS = [
+    """
+    ALTER TABLE energy_journal_energylog ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, title), 'A')
+        || setweight(to_tsvector('english'::regconfig, story), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX energy_log_search_idx ON energy_journal_energylog
+    USING GIN (search_vector) WHERE NOT deleted
+    """,
+]
+POSTGRESQL_BACKWARDS = [
+    "DROP INDEX IF EXISTS energy_log_search_idx",
+    "ALTER TABLE energy_journal_energylog DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARDS = [
+    """
+    CREATE VIRTUAL TABLE energy_journal_energylog_fts
+    USING fts5(title, story, tokenize = 'porter unicode61')
+    """,
+]
+SQLITE_BACKWARDS = [
+    "DROP TRIGGER IF EXISTS energy_journal_energylog_fts_delete",
+    "DROP TRIGGER IF EXISTS energy_journal_energylog_fts_update",
+    "DROP TRIGGER IF EXISTS energy_journal_energylog_fts_insert",
+    "DROP TABLE IF EXISTS energy_journal_energylog_fts",
+]
+
+STATEMENTS = {
+    "postgresql": (POSTGRESQL_FORWARDS, POSTGRESQL_BACKWARDS),
+    "sqlite": (SQLITE_FORWARDS, SQLITE_BACKWARDS),
+}
+
+
+def forwards(apps, schema_editor):
+    forwards, _ = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in forwards:
+        schema_editor.execute(statement)
+    install_sqlite_triggers(schema_editor)
+
+
+def backwards(apps, schema_editor):
+    _, backwards = STATEMENTS.get(schema_editor.connection.vendor, ([], []))
+    for statement in backwards:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("energy_journal", "0004_energy_rollups"),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
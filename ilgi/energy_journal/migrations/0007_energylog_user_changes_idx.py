@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("energy_journal", "0006_energylogimport"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="energylog",
+            index=models.Index(
+                fields=["created_by", "updated_at", "id"],
+                name="energy_log_user_changes_idx",
+            ),
+        ),
+    ]
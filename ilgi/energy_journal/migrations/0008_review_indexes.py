@@ -0,0 +1,67 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+from ilgi.energy_journal.search import install_sqlite_triggers
+
+
+def reinstall_search_triggers(apps, schema_editor):
+    # the AlterFields below rebuild the table on SQLite, dropping its
+    # triggers, when applied and when unapplied alike
+    install_sqlite_triggers(schema_editor)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("energy_journal", "0007_energylog_user_changes_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # runs last when unapplying, after the AlterFields
+        migrations.RunPython(migrations.RunPython.noop, reinstall_search_triggers),
+        migrations.RemoveIndex(
+            model_name="energylog",
+            name="energy_log_user_date_idx",
+        ),
+        migrations.AlterField(
+            model_name="energylog",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="energylog",
+            name="deleted",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name="energylog",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="energylogimport",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="energylogimport",
+            name="deleted",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name="energylogimport",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="energylog",
+            index=models.Index(
+                condition=models.Q(("deleted", False)),
+                fields=["created_by", "-date", "-id"],
+                name="energy_log_user_date_idx",
+            ),
+        ),
+        migrations.RunPython(reinstall_search_triggers, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,15 @@
-from django.db import models
+from collections import defaultdict
+from datetime import timedelta
+from typing import NamedTuple
+
+from dateutil.relativedelta import relativedelta
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import Trunc
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 from utils.models import BaseModel
+from utils.response_cache import invalidate_user_responses
 
 
 class EnergyLog(BaseModel):
@@ -14,3 +22,303 @@ class EnergyLog(BaseModel):
     created_by = models.ForeignKey(
         "users.User", on_delete=models.PROTECT, related_name="+"
     )
+
+    class Meta:
+        indexes = [
+            # backs the keyset pagination of a user's journal (date, id)
+            models.Index(
+                fields=["created_by", "-date", "-id"],
+                name="energy_log_user_date_idx",
+                condition=Q(deleted=False),
+            ),
+            # backs delta sync of a user's journal, see ChangesMixin; not
+            # partial as sync needs the soft deleted rows too
+            models.Index(
+                fields=["created_by", "updated_at", "id"],
+                name="energy_log_user_changes_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        deferred = instance.get_deferred_fields()
+        if not deferred & {"created_by_id", "date", "energy_delta", "deleted"}:
+            instance._saved_rollup_key = instance.get_rollup_key()
+        return instance
+
+    def get_rollup_key(self):
+        """
+        Contribution of this log to the energy rollups, or None if it
+        doesn't contribute (i.e. it is soft deleted).
+        """
+
+        if self.deleted:
+            return None
+        return (self.created_by_id, self.date, self.energy_delta)
+
+    def get_saved_rollup_key(self):
+        if self._state.adding:
+            return None
+        if hasattr(self, "_saved_rollup_key"):
+            return self._saved_rollup_key
+        saved = EnergyLog._base_manager.filter(pk=self.pk).first()
+        return saved.get_rollup_key() if saved else None
+
+    def save(self, *args, **kwargs):
+        previous = self.get_saved_rollup_key()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            current = self.get_rollup_key()
+            if current != previous:
+                update_energy_rollups(
+                    added=[current] if current else [],
+                    removed=[previous] if previous else [],
+                )
+            invalidate_user_responses(self.created_by_id)
+        self._saved_rollup_key = current
+
+
+class Period(NamedTuple):
+    """
+    The calendar buckets of a rollup: their `kind` for Trunc and their
+    `length`, in days or in months.
+    """
+
+    kind: str
+    length: relativedelta
+
+
+class EnergyRollup(models.Model):
+    """
+    Aggregate of a user's EnergyLog.energy_delta over one calendar bucket
+    (day, week or month), kept up to date by `update_energy_rollups`.
+    """
+
+    period = None
+    aggregate_fields = ("count", "total", "minimum", "maximum")
+
+    created_by = models.ForeignKey(
+        "users.User", on_delete=models.CASCADE, related_name="+"
+    )
+    bucket = models.DateField(help_text="First day of the bucket")
+    count = models.PositiveIntegerField(default=0)
+    total = models.IntegerField(default=0)
+    minimum = models.SmallIntegerField()
+    maximum = models.SmallIntegerField()
+
+    class Meta:
+        abstract = True
+        constraints = [
+            models.UniqueConstraint(
+                fields=["created_by", "bucket"], name="%(class)s_user_bucket"
+            ),
+        ]
+
+    @classmethod
+    def truncate(cls, date):
+        """
+        The first day of the bucket of `date`, as Trunc computes it.
+        """
+
+        length = cls.period.length
+        if length.years or length.months:
+            months = date.year * 12 + date.month - 1
+            months -= months % (length.years * 12 + length.months)
+            return date.replace(year=months // 12, month=months % 12 + 1, day=1)
+        # counted from date.min, a Monday, as weeks start on Mondays
+        return date - timedelta(days=(date.toordinal() - 1) % length.days)
+
+    @classmethod
+    def next_bucket(cls, bucket):
+        return bucket + cls.period.length
+
+    @classmethod
+    def aggregate(cls, logs):
+        """
+        Group `logs` into this rollup's buckets, one row per user and bucket.
+        """
+
+        return (
+            logs.annotate(bucket=Trunc("date", cls.period.kind))
+            .values("created_by_id", "bucket")
+            .annotate(
+                count=Count("id"),
+                total=Sum("energy_delta"),
+                minimum=Min("energy_delta"),
+                maximum=Max("energy_delta"),
+            )
+            .order_by()
+        )
+
+    @classmethod
+    def lock(cls, keys):
+        users = {created_by_id for created_by_id, _ in keys}
+        buckets = {bucket for _, bucket in keys}
+        rollups = cls.objects.select_for_update().filter(
+            created_by_id__in=users, bucket__in=buckets
+        )
+        return {
+            (rollup.created_by_id, rollup.bucket): rollup
+            for rollup in rollups
+            if (rollup.created_by_id, rollup.bucket) in keys
+        }
+
+    @classmethod
+    def add(cls, gained):
+        """
+        Fold newly added energy deltas, given as {(created_by_id, bucket):
+        [energy_delta, ...]}, into their buckets with one read and at most
+        one bulk update and one bulk insert.
+        """
+
+        existing = cls.lock(gained.keys())
+        changed, created = [], []
+        for key, values in gained.items():
+            rollup = existing.get(key)
+            if rollup is None:
+                created_by_id, bucket = key
+                created.append(
+                    cls(
+                        created_by_id=created_by_id,
+                        bucket=bucket,
+                        count=len(values),
+                        total=sum(values),
+                        minimum=min(values),
+                        maximum=max(values),
+                    )
+                )
+                continue
+            rollup.count += len(values)
+            rollup.total += sum(values)
+            rollup.minimum = min(rollup.minimum, *values)
+            rollup.maximum = max(rollup.maximum, *values)
+            changed.append(rollup)
+
+        cls.objects.bulk_update(changed, fields=cls.aggregate_fields)
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create(created)
+        except IntegrityError:
+            # a concurrent writer created some of these buckets first
+            cls.add(
+                {
+                    (r.created_by_id, r.bucket): gained[(r.created_by_id, r.bucket)]
+                    for r in created
+                }
+            )
+
+    @classmethod
+    def recompute(cls, keys):
+        """
+        Recompute buckets, given as (created_by_id, bucket) keys, from the
+        logs they cover. Needed when a value leaves a bucket since its
+        minimum and maximum can't be undone.
+        """
+
+        logs = Q()
+        for created_by_id, bucket in keys:
+            logs |= Q(
+                created_by_id=created_by_id,
+                date__gte=bucket,
+                date__lt=cls.next_bucket(bucket),
+            )
+        aggregates = {
+            (row["created_by_id"], row["bucket"]): row
+            for row in cls.aggregate(EnergyLog.objects.filter(logs))
+        }
+
+        existing = cls.lock(keys)
+        changed, created, emptied = [], [], []
+        for key in keys:
+            rollup, aggregate = existing.get(key), aggregates.get(key)
+            if aggregate is None:
+                if rollup is not None:
+                    emptied.append(rollup.pk)
+            elif rollup is None:
+                created.append(cls(**aggregate))
+            else:
+                for field in cls.aggregate_fields:
+                    setattr(rollup, field, aggregate[field])
+                changed.append(rollup)
+
+        cls.objects.filter(pk__in=emptied).delete()
+        cls.objects.bulk_update(changed, fields=cls.aggregate_fields)
+        cls.objects.bulk_create(created)
+
+
+class DailyEnergyRollup(EnergyRollup):
+    period = Period("day", relativedelta(days=1))
+
+
+class WeeklyEnergyRollup(EnergyRollup):
+    period = Period("week", relativedelta(weeks=1))
+
+
+class MonthlyEnergyRollup(EnergyRollup):
+    period = Period("month", relativedelta(months=1))
+
+
+ENERGY_ROLLUPS = {
+    rollup.period.kind: rollup
+    for rollup in (DailyEnergyRollup, WeeklyEnergyRollup, MonthlyEnergyRollup)
+}
+
+
+def update_energy_rollups(added=(), removed=()):
+    """
+    Apply energy log changes to every rollup table. `added` and `removed`
+    are (created_by_id, date, energy_delta) tuples of log contributions
+    that appeared or went away, and must already be written to the
+    EnergyLog table. Buckets that only gained values are updated in place;
+    buckets that lost one are recomputed from their logs. Either way the
+    number of queries depends on the number of rollup tables, not on the
+    number of changes.
+    """
+
+    for rollup in ENERGY_ROLLUPS.values():
+        gained = defaultdict(list)
+        lost = set()
+        for created_by_id, date, energy_delta in added:
+            gained[(created_by_id, rollup.truncate(date))].append(energy_delta)
+        for created_by_id, date, _ in removed:
+            lost.add((created_by_id, rollup.truncate(date)))
+
+        if lost:
+            rollup.recompute(lost)
+        gained = {key: values for key, values in gained.items() if key not in lost}
+        if gained:
+            rollup.add(gained)
+
+
+class EnergyLogImport(BaseModel):
+    """
+    A bulk import of energy logs from an uploaded NDJSON or CSV file, run
+    in batches by `ilgi.energy_journal.importer` and polled for progress.
+    """
+
+    class FileFormat(models.TextChoices):
+        NDJSON = "ndjson", "NDJSON"
+        CSV = "csv", "CSV"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    created_by = models.ForeignKey(
+        "users.User", on_delete=models.PROTECT, related_name="+"
+    )
+    file = models.FileField(upload_to="energy-log-imports/")
+    file_format = models.CharField(max_length=10, choices=FileFormat.choices)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    processed_rows = models.PositiveIntegerField(default=0)
+    imported_rows = models.PositiveIntegerField(default=0)
+    failed_rows = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(
+        default=list, help_text="Validation errors of the first failed rows"
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
@@ -0,0 +1,200 @@
+"""
+Full-text search over energy log titles and stories.
+
+The index lives outside the model so that each database can use its own
+engine (see migration 0005_energylog_search):
+
+- PostgreSQL: a generated `search_vector` tsvector column on the energy log
+  table, weighting titles above stories, with a GIN index partial on
+  `deleted = false`. The database recomputes it on every write.
+- SQLite: an FTS5 shadow table keyed by the energy log's id, kept in sync by
+  triggers on insert, update (including soft deletes) and delete, so bulk
+  writes are indexed too. SQLite drops a table's triggers when Django
+  rebuilds it during a migration (e.g. AlterField), so such migrations
+  call `install_sqlite_triggers` again, and in case one doesn't,
+  `ensure_sqlite_triggers` reinstalls missing triggers after every migrate.
+
+Other databases fall back to an unindexed case-insensitive match.
+"""
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import BooleanField, F, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Substr
+
+SEARCH_CONFIG = "english"
+FTS_TABLE = "energy_journal_energylog_fts"
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+SNIPPET_WORDS = 24
+
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_insert
+    AFTER INSERT ON energy_journal_energylog WHEN NOT new.deleted
+    BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, story)
+        VALUES (new.id, new.title, new.story);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_update
+    AFTER UPDATE OF title, story, deleted ON energy_journal_energylog
+    BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, title, story)
+        SELECT new.id, new.title, new.story WHERE NOT new.deleted;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_delete
+    AFTER DELETE ON energy_journal_energylog
+    BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+]
+
+
+def install_sqlite_triggers(schema_editor):
+    """
+    (Re)create the triggers maintaining the SQLite FTS5 table and reindex
+    every live energy log, for use in migrations.
+    """
+
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in _sqlite_trigger_statements():
+        schema_editor.execute(statement)
+
+
+def _sqlite_trigger_statements():
+    for action in ("insert", "update", "delete"):
+        yield f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{action}"
+    yield from SQLITE_TRIGGERS
+    yield f"DELETE FROM {FTS_TABLE}"
+    yield (
+        f"INSERT INTO {FTS_TABLE} (rowid, title, story) "
+        "SELECT id, title, story FROM energy_journal_energylog WHERE NOT deleted"
+    )
+
+
+def ensure_sqlite_triggers(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Reinstall the triggers of the SQLite FTS5 table, and so reindex it, if
+    any of them is missing. A post_migrate receiver, see EnergyJournalConfig.
+    """
+
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = %s "
+            "OR (type = 'trigger' AND tbl_name = 'energy_journal_energylog')",
+            [FTS_TABLE],
+        )
+        names = {name for (name,) in cursor.fetchall()}
+        triggers = {
+            f"{FTS_TABLE}_{action}" for action in ("insert", "update", "delete")
+        }
+        # before migration 0005 there is nothing to maintain
+        if FTS_TABLE not in names or triggers <= names:
+            return
+        for statement in _sqlite_trigger_statements():
+            cursor.execute(statement)
+
+
+def search_energy_logs(queryset, query):
+    """
+    Filter `queryset` down to the energy logs matching `query`, annotated
+    with `rank` (higher is better) and a highlighted `snippet` of the story,
+    best matches first.
+    """
+
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        queryset = _search_postgresql(queryset, query)
+    elif vendor == "sqlite":
+        queryset = _search_sqlite(queryset, query)
+    else:
+        queryset = _search_fallback(queryset, query)
+    return queryset.order_by("-rank", "-date", "-id")
+
+
+def _search_postgresql(queryset, query):
+    from django.contrib.postgres.search import SearchHeadline, SearchQuery
+
+    table = queryset.model._meta.db_table
+    tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+    return (
+        queryset.alias(
+            matches=RawSQL(
+                f'"{table}"."search_vector" @@ {tsquery}',
+                [query],
+                output_field=BooleanField(),
+            )
+        )
+        .filter(matches=True)
+        .annotate(
+            rank=RawSQL(
+                f'ts_rank("{table}"."search_vector", {tsquery})',
+                [query],
+                output_field=FloatField(),
+            ),
+            snippet=SearchHeadline(
+                "story",
+                SearchQuery(query, config=SEARCH_CONFIG, search_type="websearch"),
+                config=SEARCH_CONFIG,
+                start_sel=HIGHLIGHT_START,
+                stop_sel=HIGHLIGHT_STOP,
+                max_words=SNIPPET_WORDS,
+                min_words=SNIPPET_WORDS // 2,
+            ),
+        )
+    )
+
+
+def _search_sqlite(queryset, query):
+    table = queryset.model._meta.db_table
+    match = _fts5_query(query)
+    if not match:
+        return queryset.none().annotate(rank=Value(0.0), snippet=Value(""))
+
+    # bm25() and snippet() only work inside a full-text query, hence the
+    # correlated subqueries; each one is a rowid lookup in the FTS index
+    correlated = (
+        f'FROM "{FTS_TABLE}" WHERE "{FTS_TABLE}" MATCH %s AND rowid = "{table}"."id"'
+    )
+    return queryset.filter(
+        id__in=RawSQL(
+            f'SELECT rowid FROM "{FTS_TABLE}" WHERE "{FTS_TABLE}" MATCH %s', [match]
+        )
+    ).annotate(
+        rank=RawSQL(
+            f'SELECT -bm25("{FTS_TABLE}", 2.0, 1.0) {correlated}',
+            [match],
+            output_field=FloatField(),
+        ),
+        snippet=RawSQL(
+            f"SELECT snippet(\"{FTS_TABLE}\", 1, %s, %s, '…', %s) {correlated}",
+            [HIGHLIGHT_START, HIGHLIGHT_STOP, SNIPPET_WORDS, match],
+        ),
+    )
+
+
+def _fts5_query(query):
+    # quote every term so user input can't use (or break on) FTS5 syntax;
+    # the terms are implicitly AND-ed
+    terms = query.split()
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def _search_fallback(queryset, query):
+    return queryset.filter(
+        Q(title__icontains=query) | Q(story__icontains=query)
+    ).annotate(
+        rank=Value(0.0, output_field=FloatField()),
+        snippet=Substr(F("story"), 1, 200),
+    )
@@ -1,8 +1,17 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
 
-from ilgi.energy_journal.models import EnergyLog
+from ilgi.energy_journal.models import (
+    ENERGY_ROLLUPS,
+    DailyEnergyRollup,
+    EnergyLog,
+    EnergyLogImport,
+    update_energy_rollups,
+)
 from ilgi.users.serializers import UserSerializer
+from utils.response_cache import invalidate_user_responses
 
 
 class EnergyLogSerializer(ModelSerializer):
@@ -20,3 +29,204 @@ class EnergyLogSerializer(ModelSerializer):
             "external_id",
             "deleted",
         )
+
+
+class EnergyLogSearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=255, help_text="Words to search for")
+
+
+class EnergyLogSearchSerializer(EnergyLogSerializer):
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(
+        read_only=True, help_text="Excerpt of the story with matches in <mark>"
+    )
+
+
+class EnergyLogExportQuerySerializer(serializers.Serializer):
+    file_format = serializers.ChoiceField(choices=["ndjson", "csv"], default="ndjson")
+    compress = serializers.BooleanField(
+        default=False, help_text="Gzip the exported file"
+    )
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if "start" in attrs and "end" in attrs and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end")
+        return attrs
+
+
+class EnergyTrendsQuerySerializer(serializers.Serializer):
+    period = serializers.ChoiceField(choices=list(ENERGY_ROLLUPS), default="day")
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        if "start" in attrs and "end" in attrs and attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end")
+        return attrs
+
+
+class EnergyRollupSerializer(ModelSerializer):
+    average = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DailyEnergyRollup
+        fields = ("bucket", "count", "total", "minimum", "maximum", "average")
+
+    def get_average(self, obj) -> float:
+        return obj.total / obj.count
+
+
+class EnergyLogBulkUpdateSerializer(EnergyLogSerializer):
+    id = serializers.UUIDField(source="external_id")
+
+
+class EnergyLogBulkSerializer(serializers.Serializer):
+    """
+    A batch of energy log creates, updates (full, by id) and soft deletes,
+    validated up front and applied in a single transaction with bulk
+    INSERT and UPDATE statements rather than a query per item.
+    """
+
+    max_items = 1000
+
+    def get_fields(self):
+        # declared here as the "create" and "update" keys would otherwise
+        # shadow the serializer methods of the same name
+        return {
+            "create": EnergyLogSerializer(many=True, required=False, default=list),
+            "update": EnergyLogBulkUpdateSerializer(
+                many=True, required=False, default=list
+            ),
+            "delete": serializers.ListField(
+                child=serializers.UUIDField(), required=False, default=list
+            ),
+        }
+
+    def validate(self, attrs):
+        total = len(attrs["create"]) + len(attrs["update"]) + len(attrs["delete"])
+        if total > self.max_items:
+            raise serializers.ValidationError(
+                f"A batch may contain at most {self.max_items} items."
+            )
+
+        ids = [item["external_id"] for item in attrs["update"]] + attrs["delete"]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError(
+                "An energy log may only be updated or deleted once per batch."
+            )
+        return attrs
+
+    def create(self, validated_data):
+        created_by = validated_data["created_by"]
+        now = timezone.now()
+        added, removed = [], []
+
+        with transaction.atomic():
+            existing = self.get_existing(validated_data, created_by)
+
+            created = EnergyLog.objects.bulk_create(
+                EnergyLog(created_by=created_by, **item)
+                for item in validated_data["create"]
+            )
+            added += [log.get_rollup_key() for log in created]
+
+            updated = [
+                existing[item["external_id"]] for item in validated_data["update"]
+            ]
+            for log, item in zip(updated, validated_data["update"]):
+                removed.append(log.get_rollup_key())
+                for attr, value in item.items():
+                    setattr(log, attr, value)
+                log.updated_at = now
+                added.append(log.get_rollup_key())
+            update_fields = {
+                attr for item in validated_data["update"] for attr in item
+            } - {"external_id"}
+            if updated:
+                EnergyLog.objects.bulk_update(
+                    updated, fields=[*update_fields, "updated_at"]
+                )
+
+            deleted = [
+                existing[external_id] for external_id in validated_data["delete"]
+            ]
+            for log in deleted:
+                removed.append(log.get_rollup_key())
+                log.deleted = True
+                log.updated_at = now
+            if deleted:
+                EnergyLog.objects.bulk_update(deleted, fields=["deleted", "updated_at"])
+
+            update_energy_rollups(added=added, removed=removed)
+            invalidate_user_responses(created_by.pk)
+
+        for log in created + updated + deleted:
+            log._saved_rollup_key = log.get_rollup_key()
+
+        return {
+            "create": created,
+            "update": updated,
+            "delete": [log.external_id for log in deleted],
+        }
+
+    def get_existing(self, validated_data, created_by):
+        updates = [item["external_id"] for item in validated_data["update"]]
+        deletes = validated_data["delete"]
+
+        existing = (
+            EnergyLog.objects.select_for_update()
+            .select_related("created_by")
+            .filter(created_by=created_by, external_id__in=updates + deletes)
+            .in_bulk(field_name="external_id")
+        )
+
+        errors = {}
+        for operation, ids in (("update", updates), ("delete", deletes)):
+            missing = {
+                index: ["Not found."]
+                for index, external_id in enumerate(ids)
+                if external_id not in existing
+            }
+            if missing:
+                errors[operation] = missing
+        if errors:
+            raise serializers.ValidationError(errors)
+        return existing
+
+
+class EnergyLogImportSerializer(ModelSerializer):
+    id = serializers.UUIDField(read_only=True, source="external_id")
+    file = serializers.FileField(write_only=True)
+    file_format = serializers.ChoiceField(
+        choices=EnergyLogImport.FileFormat.choices,
+        required=False,
+        help_text="Defaults to csv for .csv files and ndjson otherwise",
+    )
+
+    class Meta:
+        model = EnergyLogImport
+        fields = (
+            "id",
+            "file",
+            "file_format",
+            "status",
+            "processed_rows",
+            "imported_rows",
+            "failed_rows",
+            "errors",
+            "created_at",
+            "finished_at",
+        )
+        read_only_fields = fields
+
+    def validate(self, attrs):
+        if "file_format" not in attrs:
+            is_csv = attrs["file"].name.lower().endswith(".csv")
+            attrs["file_format"] = (
+                EnergyLogImport.FileFormat.CSV
+                if is_csv
+                else EnergyLogImport.FileFormat.NDJSON
+            )
+        return attrs
@@ -0,0 +1,3 @@
+from .imports import import_energy_logs
+
+__all__ = ["import_energy_logs"]
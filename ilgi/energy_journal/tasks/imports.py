@@ -0,0 +1,10 @@
+from celery import shared_task
+
+from ilgi.energy_journal.importer import run_energy_log_import
+from ilgi.energy_journal.models import EnergyLogImport
+
+
+@shared_task
+def import_energy_logs(job_id):
+    job = EnergyLogImport.objects.get(pk=job_id)
+    run_energy_log_import(job)
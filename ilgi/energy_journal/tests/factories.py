@@ -0,0 +1,16 @@
+from factory.django import DjangoModelFactory
+import factory
+
+from ilgi.energy_journal.models import EnergyLog
+from ilgi.users.tests.factories import UserFactory
+
+
+class EnergyLogFactory(DjangoModelFactory):
+    class Meta:
+        model = EnergyLog
+
+    title = factory.Faker("sentence", nb_words=4)
+    story = factory.Faker("paragraph")
+    date = factory.Faker("date_object")
+    energy_delta = factory.Faker("pyint", min_value=-5, max_value=5)
+    created_by = factory.SubFactory(UserFactory)
@@ -0,0 +1,74 @@
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.test import TestCase
+
+from ilgi.energy_journal.viewsets import EnergyLogViewSet
+from ilgi.users.serializers import TokenObtainPairSerializer
+from ilgi.users.tests.factories import UserFactory
+from ilgi.users.views import UserMeView
+from utils.cache import clear_local_caches
+from .factories import EnergyLogFactory
+
+
+class TestAsyncReadPath(TestCase):
+    def setUp(self):
+        clear_local_caches()
+        self.addCleanup(clear_local_caches)
+        self.user = UserFactory()
+        self.logs = EnergyLogFactory.create_batch(3, created_by=self.user)
+        EnergyLogFactory()
+        token = TokenObtainPairSerializer.get_token(self.user).access_token
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def test_views_are_async(self):
+        """Test that the hot read views are coroutines"""
+
+        for view in (
+            EnergyLogViewSet.as_view({"get": "list"}),
+            EnergyLogViewSet.as_view({"get": "retrieve"}),
+            UserMeView.as_view(),
+        ):
+            self.assertTrue(iscoroutinefunction(view))
+
+    async def test_list(self):
+        """Test that the list is served over ASGI"""
+
+        resp = await self.async_client.get("/api/energy-logs/", headers=self.headers)
+        self.assertEqual(resp.status_code, 200)
+        ids = {log["id"] for log in resp.json()["results"]}
+        self.assertEqual(ids, {str(log.external_id) for log in self.logs})
+
+        again = await self.async_client.get(
+            "/api/energy-logs/",
+            headers={**self.headers, "If-None-Match": resp["ETag"]},
+        )
+        self.assertEqual(again.status_code, 304)
+
+    async def test_retrieve(self):
+        """Test that details and missing logs are served over ASGI"""
+
+        log = self.logs[0]
+        url = f"/api/energy-logs/{log.external_id}/"
+        resp = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["id"], str(log.external_id))
+
+        resp = await self.async_client.get("/api/energy-logs/1/", headers=self.headers)
+        self.assertEqual(resp.status_code, 404)
+
+    async def test_writes_stay_sync(self):
+        """Test that sync actions of the async viewset still work"""
+
+        log = self.logs[0]
+        resp = await self.async_client.delete(
+            f"/api/energy-logs/{log.external_id}/", headers=self.headers
+        )
+        self.assertEqual(resp.status_code, 204)
+        exists = await sync_to_async(type(log).objects.filter(pk=log.pk).exists)()
+        self.assertFalse(exists)
+
+    async def test_me(self):
+        """Test that the me endpoint is served over ASGI"""
+
+        resp = await self.async_client.get("/api/auth/me/", headers=self.headers)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["email"], self.user.email)
@@ -0,0 +1,130 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.test import APIClient
+
+from ilgi.energy_journal.models import EnergyLog
+from ilgi.energy_journal.viewsets import EnergyLogPagination, EnergyLogViewSet
+from ilgi.users.tests.factories import UserFactory
+from utils.benchmark import benchmark, measure, report
+
+PAGE_SIZE = 10
+PAGES = (1, 10, 100, 1_000, 10_000)
+
+
+@benchmark
+class BenchmarkEnergyLogPagination(TestCase):
+    """
+    Compare page latency of keyset and limit/offset pagination from page 1
+    to page 10,000 of a single heavy user's journal.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = UserFactory()
+        start = date(2000, 1, 1)
+        EnergyLog.objects.bulk_create(
+            EnergyLog(
+                title=f"Log {i}",
+                story="",
+                date=start + timedelta(days=i // 4),
+                energy_delta=i % 11 - 5,
+                created_by=cls.user,
+            )
+            for i in range(PAGE_SIZE * max(PAGES))
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def keyset_url(self, page):
+        url = f"http://testserver/api/energy-logs/?limit={PAGE_SIZE}"
+        if page == 1:
+            return url
+        paginator = EnergyLogPagination()
+        paginator.base_url = url
+        boundary = EnergyLog.objects.filter(created_by=self.user).order_by(
+            *paginator.ordering
+        )[(page - 1) * PAGE_SIZE - 1]
+        position = paginator.get_position(boundary)
+        return paginator.encode_cursor({"r": False, "p": position})
+
+    def test_page_latency(self):
+        rows = []
+        for page in PAGES:
+            keyset_url = self.keyset_url(page)
+            keyset = measure(lambda: self.client.get(keyset_url))
+
+            offset_url = (
+                f"/api/energy-logs/?limit={PAGE_SIZE}&offset={(page - 1) * PAGE_SIZE}"
+            )
+            EnergyLogViewSet.pagination_class = LimitOffsetPagination
+            try:
+                offset = measure(lambda: self.client.get(offset_url))
+            finally:
+                EnergyLogViewSet.pagination_class = EnergyLogPagination
+
+            rows.append(
+                (
+                    f"page {page:>6}",
+                    f"keyset {keyset * 1000:7.2f} ms   offset {offset * 1000:7.2f} ms",
+                )
+            )
+        report("EnergyLog list latency (median of 5)", rows)
+
+
+@benchmark
+class BenchmarkEnergyLogBulk(TestCase):
+    """
+    Compare the throughput of syncing energy logs through the bulk endpoint
+    against one POST per log.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+        # a thousand single POSTs would trip the per-user rate limit
+        throttles = patch.object(EnergyLogViewSet, "throttle_classes", ())
+        throttles.start()
+        self.addCleanup(throttles.stop)
+
+    def items(self, count):
+        return [
+            {
+                "title": f"Log {i}",
+                "story": "Synced from the mobile app",
+                "date": str(date(2024, 1, 1) + timedelta(days=i % 365)),
+                "energy_delta": i % 11 - 5,
+            }
+            for i in range(count)
+        ]
+
+    def test_throughput(self):
+        rows = []
+        for count in (10, 100, 1_000):
+            items = self.items(count)
+
+            def per_item():
+                for item in items:
+                    resp = self.client.post("/api/energy-logs/", item)
+                    self.assertEqual(resp.status_code, 201)
+
+            def bulk():
+                resp = self.client.post("/api/energy-logs/bulk/", {"create": items})
+                self.assertEqual(resp.status_code, 200)
+
+            single = measure(per_item, repeat=3)
+            batched = measure(bulk, repeat=3)
+            rows.append(
+                (
+                    f"{count:>5} items",
+                    f"per-item {count / single:8.0f} logs/s   "
+                    f"bulk {count / batched:8.0f} logs/s",
+                )
+            )
+        report("EnergyLog sync throughput (median of 3)", rows)
@@ -0,0 +1,111 @@
+from datetime import date
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ilgi.energy_journal.models import DailyEnergyRollup, EnergyLog
+from ilgi.users.tests.factories import UserFactory
+from .factories import EnergyLogFactory
+
+
+def log_data(**kwargs):
+    return {
+        "title": "Morning run",
+        "story": "Felt great",
+        "date": "2024-05-06",
+        "energy_delta": 3,
+        **kwargs,
+    }
+
+
+class TestEnergyLogBulk(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+    def test_create_update_delete(self):
+        """Test that a mixed batch is applied and reported per item"""
+
+        to_update = EnergyLogFactory(created_by=self.user, date=date(2024, 5, 6))
+        to_delete = EnergyLogFactory(created_by=self.user, date=date(2024, 5, 6))
+
+        resp = self.client.post(
+            "/api/energy-logs/bulk/",
+            {
+                "create": [log_data(title="One"), log_data(title="Two")],
+                "update": [log_data(id=str(to_update.external_id), energy_delta=-5)],
+                "delete": [str(to_delete.external_id)],
+            },
+        )
+        self.assertEqual(resp.status_code, 200)
+
+        data = resp.json()
+        self.assertEqual([log["title"] for log in data["create"]], ["One", "Two"])
+        self.assertEqual(data["update"][0]["energy_delta"], -5)
+        self.assertEqual(data["delete"], [str(to_delete.external_id)])
+
+        self.assertEqual(EnergyLog.objects.filter(created_by=self.user).count(), 3)
+        to_delete.refresh_from_db()
+        self.assertTrue(to_delete.deleted)
+
+        rollup = DailyEnergyRollup.objects.get(created_by=self.user)
+        self.assertEqual((rollup.count, rollup.total, rollup.minimum), (3, 1, -5))
+
+    def test_constant_queries(self):
+        """Test that the number of queries doesn't grow with the batch"""
+
+        def post(count):
+            return self.client.post(
+                "/api/energy-logs/bulk/",
+                {"create": [log_data() for _ in range(count)]},
+            )
+
+        post(1)  # create the rollup buckets the batches below fall into
+        with CaptureQueriesContext(connection) as small:
+            post(2)
+        with CaptureQueriesContext(connection) as large:
+            post(50)
+        self.assertEqual(len(small), len(large))
+
+    def test_invalid_item(self):
+        """Test that one invalid item rejects the whole batch with its index"""
+
+        resp = self.client.post(
+            "/api/energy-logs/bulk/",
+            {"create": [log_data(), log_data(energy_delta=9)]},
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json()["create"][0], {})
+        self.assertIn("energy_delta", resp.json()["create"][1])
+        self.assertFalse(EnergyLog.objects.exists())
+
+    def test_unknown_id(self):
+        """Test that updating someone else's log fails and rolls back"""
+
+        other = EnergyLogFactory()
+        resp = self.client.post(
+            "/api/energy-logs/bulk/",
+            {
+                "create": [log_data()],
+                "delete": [str(other.external_id)],
+            },
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(resp.json(), {"delete": {"0": ["Not found."]}})
+        self.assertFalse(EnergyLog.objects.filter(created_by=self.user).exists())
+
+    def test_duplicate_id(self):
+        """Test that a log can't be touched twice in one batch"""
+
+        log = EnergyLogFactory(created_by=self.user)
+        resp = self.client.post(
+            "/api/energy-logs/bulk/",
+            {
+                "update": [log_data(id=str(log.external_id))],
+                "delete": [str(log.external_id)],
+            },
+        )
+        self.assertEqual(resp.status_code, 400)
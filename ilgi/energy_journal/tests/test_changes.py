@@ -0,0 +1,96 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ilgi.energy_journal.models import EnergyLog
+from ilgi.energy_journal.viewsets import EnergyLogViewSet
+from ilgi.users.tests.factories import UserFactory
+from .factories import EnergyLogFactory
+
+
+@patch.object(EnergyLogViewSet, "changes_settle_time", timedelta(0))
+class TestEnergyLogChanges(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+    def sync(self, since=None):
+        params = {"since": since} if since else {}
+        resp = self.client.get("/api/energy-logs/changes/", params)
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_initial_sync(self):
+        """Test that the first sync returns every log and a cursor"""
+
+        logs = [EnergyLogFactory(created_by=self.user) for _ in range(3)]
+        EnergyLogFactory()  # belongs to someone else
+
+        data = self.sync()
+        self.assertEqual(
+            [log["id"] for log in data["changed"]],
+            [str(log.external_id) for log in logs],
+        )
+        self.assertEqual(data["deleted"], [])
+        self.assertFalse(data["has_more"])
+        self.assertTrue(data["cursor"])
+
+    def test_incremental_sync(self):
+        """Test that later syncs only return changes, with tombstones"""
+
+        kept, edited, deleted = [
+            EnergyLogFactory(created_by=self.user) for _ in range(3)
+        ]
+        cursor = self.sync()["cursor"]
+
+        edited.title = "Edited"
+        edited.save()
+        deleted.delete()
+        created = EnergyLogFactory(created_by=self.user)
+
+        data = self.sync(cursor)
+        self.assertEqual(
+            [log["id"] for log in data["changed"]],
+            [str(edited.external_id), str(created.external_id)],
+        )
+        self.assertEqual(data["changed"][0]["title"], "Edited")
+        self.assertEqual(data["deleted"], [str(deleted.external_id)])
+
+        # nothing changed since, the cursor is handed back as is
+        again = self.sync(data["cursor"])
+        self.assertEqual(again["changed"] + again["deleted"], [])
+        self.assertEqual(again["cursor"], data["cursor"])
+
+    def test_pages(self):
+        """Test that large change sets are returned over several syncs"""
+
+        logs = [EnergyLogFactory(created_by=self.user) for _ in range(5)]
+        # rows sharing a timestamp are still ordered by id
+        EnergyLog.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+
+        ids, cursor, has_more = [], None, True
+        with patch.object(EnergyLogViewSet, "changes_page_size", 2):
+            while has_more:
+                data = self.sync(cursor)
+                ids += [log["id"] for log in data["changed"]]
+                cursor, has_more = data["cursor"], data["has_more"]
+        self.assertEqual(ids, [str(log.external_id) for log in logs])
+
+    def test_settle_time(self):
+        """Test that very recent changes wait for the next sync"""
+
+        EnergyLogFactory(created_by=self.user)
+        with patch.object(
+            EnergyLogViewSet, "changes_settle_time", timedelta(minutes=1)
+        ):
+            self.assertEqual(self.sync()["changed"], [])
+
+    def test_invalid_cursor(self):
+        """Test that malformed cursors are rejected"""
+
+        resp = self.client.get("/api/energy-logs/changes/", {"since": "nope"})
+        self.assertEqual(resp.status_code, 400)
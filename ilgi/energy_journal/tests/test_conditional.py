@@ -0,0 +1,110 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ilgi.users.tests.factories import UserFactory
+from .factories import EnergyLogFactory
+
+
+class TestEnergyLogConditionalGet(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.log = EnergyLogFactory(created_by=self.user)
+
+    def test_list_not_modified(self):
+        """Test that an unchanged list is answered with 304 in one query"""
+
+        resp = self.client.get("/api/energy-logs/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp["ETag"].startswith('W/"'))
+        self.assertIn("Last-Modified", resp)
+        self.assertIn("private", resp["Cache-Control"])
+
+        with self.assertNumQueries(1):
+            again = self.client.get(
+                "/api/energy-logs/", HTTP_IF_NONE_MATCH=resp["ETag"]
+            )
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], resp["ETag"])
+
+    def test_list_modified(self):
+        """Test that creates, edits and soft deletes change the list ETag"""
+
+        etags = [self.client.get("/api/energy-logs/")["ETag"]]
+
+        other = EnergyLogFactory(created_by=self.user)
+        etags.append(self.client.get("/api/energy-logs/")["ETag"])
+
+        self.log.title = "Edited"
+        self.log.save()
+        etags.append(self.client.get("/api/energy-logs/")["ETag"])
+
+        other.delete()
+        resp = self.client.get("/api/energy-logs/", HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertEqual(resp.status_code, 200)
+        etags.append(resp["ETag"])
+
+        self.assertEqual(len(set(etags)), 4)
+
+    def test_list_etag_per_page(self):
+        """Test that different pages of the same data have different ETags"""
+
+        first = self.client.get("/api/energy-logs/")["ETag"]
+        resp = self.client.get("/api/energy-logs/?limit=1", HTTP_IF_NONE_MATCH=first)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], first)
+
+    def test_retrieve(self):
+        """Test that details honour If-None-Match and If-Modified-Since"""
+
+        url = f"/api/energy-logs/{self.log.external_id}/"
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+
+        with self.assertNumQueries(1):
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+        since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=resp["Last-Modified"])
+        self.assertEqual(since.status_code, 304)
+
+        self.log.energy_delta = -self.log.energy_delta or 1
+        self.log.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(changed.status_code, 200)
+
+    def test_creator_changes(self):
+        """Test that changes to the embedded creator change the ETags"""
+
+        urls = ["/api/energy-logs/", f"/api/energy-logs/{self.log.external_id}/"]
+        etags = [self.client.get(url)["ETag"] for url in urls]
+
+        self.user.name = "Renamed"
+        self.user.save()
+        for url, etag in zip(urls, etags):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(resp.status_code, 200)
+            self.assertIn('"name":"Renamed"', resp.content.decode())
+
+        # saves of only some fields, as of last_login on login
+        etags = [self.client.get(url)["ETag"] for url in urls]
+        self.user.last_login = self.user.date_joined
+        self.user.save(update_fields=["last_login"])
+        for url, etag in zip(urls, etags):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(resp.status_code, 200)
+
+    def test_retrieve_missing(self):
+        """Test that missing logs are still 404s"""
+
+        other = EnergyLogFactory()
+        resp = self.client.get(f"/api/energy-logs/{other.external_id}/")
+        self.assertEqual(resp.status_code, 404)
+        self.assertNotIn("ETag", resp)
+
+    def test_retrieve_malformed_id(self):
+        """Test that malformed ids are 404s"""
+
+        resp = self.client.get("/api/energy-logs/1/")
+        self.assertEqual(resp.status_code, 404)
@@ -0,0 +1,104 @@
+import csv
+import gzip
+import json
+from datetime import date
+from io import StringIO
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ilgi.users.serializers import TokenObtainPairSerializer
+from ilgi.users.tests.factories import UserFactory
+from .factories import EnergyLogFactory
+
+
+class TestEnergyLogExport(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+        self.logs = [
+            EnergyLogFactory(created_by=self.user, date=date(2024, 1, day))
+            for day in (3, 1, 2)
+        ]
+        EnergyLogFactory(created_by=self.user).delete()
+        EnergyLogFactory()  # belongs to someone else
+
+    def export(self, **params):
+        resp = self.client.get("/api/energy-logs/export/", params)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        return resp, b"".join(resp.streaming_content)
+
+    def test_ndjson(self):
+        """Test that the export streams one JSON object per log, oldest first"""
+
+        resp, content = self.export()
+        self.assertEqual(resp["Content-Type"], "application/x-ndjson")
+
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(
+            [row["date"] for row in rows], ["2024-01-01", "2024-01-02", "2024-01-03"]
+        )
+        self.assertEqual(rows[0]["id"], str(self.logs[1].external_id))
+        self.assertEqual(rows[0]["story"], self.logs[1].story)
+
+    def test_csv(self):
+        """Test that the export can be a CSV file with a header row"""
+
+        resp, content = self.export(file_format="csv")
+        self.assertEqual(resp["Content-Type"], "text/csv")
+        self.assertIn('filename="energy-logs.csv"', resp["Content-Disposition"])
+
+        rows = list(csv.DictReader(StringIO(content.decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[2]["energy_delta"], str(self.logs[0].energy_delta))
+
+    def test_gzip_and_date_range(self):
+        """Test that the export can be compressed and limited to a range"""
+
+        resp, content = self.export(
+            compress="true", start="2024-01-02", end="2024-01-02"
+        )
+        self.assertEqual(resp["Content-Type"], "application/gzip")
+
+        rows = gzip.decompress(content).decode().splitlines()
+        self.assertEqual([json.loads(row)["date"] for row in rows], ["2024-01-02"])
+
+    def test_small_chunks(self):
+        """Test that small read chunks and write buffers give the same output"""
+
+        with patch("ilgi.energy_journal.export.CHUNK_SIZE", 2), patch(
+            "ilgi.energy_journal.export.BUFFER_SIZE", 1
+        ):
+            _, content = self.export()
+        self.assertEqual(content, self.export()[1])
+
+    def test_invalid_range(self):
+        """Test that start must not be after end"""
+
+        resp = self.client.get(
+            "/api/energy-logs/export/", {"start": "2024-02-01", "end": "2024-01-01"}
+        )
+        self.assertEqual(resp.status_code, 400)
+
+    async def test_asgi(self):
+        """Test that the export streams an async iterator under ASGI"""
+
+        _, expected = await sync_to_async(self.export)(file_format="csv")
+        token = await sync_to_async(TokenObtainPairSerializer.get_token)(self.user)
+        with patch("ilgi.energy_journal.export.BUFFER_SIZE", 1):
+            resp = await self.async_client.get(
+                "/api/energy-logs/export/",
+                {"file_format": "csv"},
+                headers={"Authorization": f"Bearer {token.access_token}"},
+            )
+            self.assertEqual(resp.status_code, 200)
+            self.assertTrue(resp.is_async)
+            chunks = [chunk async for chunk in resp.streaming_content]
+        # a chunk per log, the first with the header
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(b"".join(chunks), expected)
@@ -0,0 +1,176 @@
+import json
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ilgi.energy_journal.importer import run_energy_log_import
+from ilgi.energy_journal.models import DailyEnergyRollup, EnergyLog, EnergyLogImport
+from ilgi.energy_journal.tasks import import_energy_logs
+from ilgi.energy_journal.viewsets import EnergyLogImportViewSet
+from ilgi.users.tests.factories import UserFactory
+
+
+def ndjson(*rows):
+    return "".join(
+        row if isinstance(row, str) else json.dumps(row) + "\n" for row in rows
+    ).encode()
+
+
+def log_row(**kwargs):
+    return {
+        "title": "Imported",
+        "story": "From another app",
+        "date": "2024-05-06",
+        "energy_delta": 2,
+        **kwargs,
+    }
+
+
+class TestEnergyLogImport(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, name, content, **data):
+        return self.client.post(
+            "/api/energy-log-imports/",
+            {"file": SimpleUploadedFile(name, content), **data},
+            format="multipart",
+        )
+
+    def test_inline_ndjson(self):
+        """Test that small files are imported within the request"""
+
+        resp = self.upload(
+            "journal.ndjson", ndjson(log_row(), log_row(energy_delta=-3))
+        )
+        self.assertEqual(resp.status_code, 201)
+
+        data = resp.json()
+        self.assertEqual(data["status"], "completed")
+        self.assertEqual((data["imported_rows"], data["failed_rows"]), (2, 0))
+        self.assertEqual(EnergyLog.objects.filter(created_by=self.user).count(), 2)
+        self.assertEqual(DailyEnergyRollup.objects.get(created_by=self.user).total, -1)
+
+    def test_row_errors(self):
+        """Test that invalid rows are reported by row number and skipped"""
+
+        resp = self.upload(
+            "journal.ndjson",
+            ndjson(log_row(), log_row(energy_delta=6), "{not json\n", log_row()),
+        )
+        data = resp.json()
+        self.assertEqual((data["imported_rows"], data["failed_rows"]), (2, 2))
+        self.assertEqual([error["row"] for error in data["errors"]], [2, 3])
+        self.assertIn("energy_delta", data["errors"][0]["errors"])
+
+    def test_unreadable_rows(self):
+        """Test that undecodable and oversized rows fail alone"""
+
+        content = (
+            b"\xef\xbb\xbftitle,story,date,energy_delta\n"
+            b"Walk,In the park,2024-05-06,1\n"
+            b"Caf\xe9,Latin-1,2024-05-06,1\n"
+            b"Essay," + b"x" * 200000 + b",2024-05-06,1\n"
+            b"Nap,Short one,2024-05-07,-1\n"
+        )
+        resp = self.upload("journal.csv", content)
+        data = resp.json()
+        self.assertEqual(data["status"], "completed")
+        self.assertEqual((data["imported_rows"], data["failed_rows"]), (2, 2))
+        self.assertEqual([error["row"] for error in data["errors"]], [2, 3])
+
+        resp = self.upload(
+            "journal.ndjson",
+            ndjson(log_row()) + b'{"title": "\xff"}\n' + ndjson(log_row()),
+        )
+        data = resp.json()
+        self.assertEqual((data["imported_rows"], data["failed_rows"]), (2, 1))
+        self.assertIn("utf-8", str(data["errors"][0]["errors"]))
+
+    def test_csv(self):
+        """Test that CSV files, e.g. from the export, can be imported"""
+
+        content = (
+            "id,title,story,date,energy_delta\n"
+            "ignored,Walk,In the park,2024-05-06,1\n"
+            "ignored,Nap,Short one,2024-05-07,-1\n"
+        ).encode()
+        resp = self.upload("journal.csv", content)
+        self.assertEqual(resp.json()["imported_rows"], 2)
+        self.assertEqual(
+            list(EnergyLog.objects.order_by("date").values_list("title", flat=True)),
+            ["Walk", "Nap"],
+        )
+
+    def test_batches(self):
+        """Test that rows are inserted in fixed-size batches"""
+
+        job = EnergyLogImport.objects.create(
+            created_by=self.user,
+            file=SimpleUploadedFile("journal.ndjson", ndjson(*[log_row()] * 5)),
+            file_format="ndjson",
+        )
+        with patch.object(
+            EnergyLog.objects, "bulk_create", wraps=EnergyLog.objects.bulk_create
+        ) as bulk_create:
+            run_energy_log_import(job, batch_size=2)
+
+        batches = [len(call.args[0]) for call in bulk_create.call_args_list]
+        self.assertEqual(batches, [2, 2, 1])
+
+    @patch.object(EnergyLogImportViewSet, "inline_max_size", 10)
+    def test_large_file_queued(self):
+        """Test that large files are handed to a task and can be polled"""
+
+        with patch.object(import_energy_logs, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.upload("journal.ndjson", ndjson(log_row()))
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(resp.json()["status"], "pending")
+
+        job = EnergyLogImport.objects.get()
+        delay.assert_called_once_with(job.pk)
+
+        import_energy_logs(job.pk)
+        resp = self.client.get(f"/api/energy-log-imports/{resp.json()['id']}/")
+        self.assertEqual(resp.json()["status"], "completed")
+        self.assertEqual(resp.json()["imported_rows"], 1)
+
+    def test_other_users_jobs(self):
+        """Test that users can't poll each other's imports"""
+
+        resp = self.upload("journal.ndjson", ndjson(log_row()))
+        self.client.force_authenticate(user=UserFactory())
+        resp = self.client.get(f"/api/energy-log-imports/{resp.json()['id']}/")
+        self.assertEqual(resp.status_code, 404)
+
+    def test_command(self):
+        """Test that the management command imports a local file"""
+
+        with tempfile.NamedTemporaryFile(suffix=".ndjson") as file:
+            file.write(ndjson(log_row(), log_row(title="")))
+            file.flush()
+
+            stdout, stderr = StringIO(), StringIO()
+            call_command(
+                "import_energy_logs",
+                file.name,
+                user=self.user.email,
+                stdout=stdout,
+                stderr=stderr,
+            )
+        self.assertIn("1 imported, 1 failed of 2 rows", stdout.getvalue())
+        self.assertIn("Row 2:", stderr.getvalue())
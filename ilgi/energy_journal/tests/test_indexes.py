@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ilgi.energy_journal.models import EnergyLog
+from ilgi.energy_journal.viewsets import EnergyLogPagination, EnergyLogViewSet
+from ilgi.users.tests.factories import UserFactory
+from utils.pagination import keyset_filter
+from utils.testing import QueryPlanMixin
+from .factories import EnergyLogFactory
+
+
+class TestEnergyLogIndexes(QueryPlanMixin, TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.log = EnergyLogFactory(created_by=self.user)
+
+    def get_view(self, action):
+        view = EnergyLogViewSet(action=action, kwargs={}, format_kwarg=None)
+        view.request = Request(APIRequestFactory().get("/api/energy-logs/"))
+        view.request.user = self.user
+        return view
+
+    def test_list(self):
+        """Test that list pages use the partial (created_by, date, id) index"""
+
+        queryset = self.get_view("list").get_queryset()
+        ordering = EnergyLogPagination.ordering
+        self.assertUsesIndex(queryset.order_by(*ordering), "energy_log_user_date_idx")
+
+        position = [self.log.date, self.log.id]
+        after = queryset.filter(keyset_filter(ordering, position))
+        self.assertUsesIndex(after.order_by(*ordering), "energy_log_user_date_idx")
+
+    def test_retrieve(self):
+        """Test that detail lookups use the external_id unique index"""
+
+        queryset = self.get_view("retrieve").get_queryset()
+        self.assertUsesIndex(
+            queryset.filter(external_id=self.log.external_id), "external_id"
+        )
+
+    def test_changes(self):
+        """Test that delta sync uses the (created_by, updated_at, id) index"""
+
+        queryset = self.get_view("changes").get_changes_queryset()
+        since = [self.log.updated_at - timedelta(days=1), 0]
+        changes = queryset.filter(
+            keyset_filter(("updated_at", "id"), since),
+            updated_at__lt=timezone.now(),
+        ).order_by("updated_at", "id")
+        self.assertUsesIndex(changes, "energy_log_user_changes_idx")
+
+    def test_no_single_column_indexes(self):
+        """Test that BaseModel no longer indexes its bookkeeping columns"""
+
+        for name in ("created_at", "updated_at", "deleted"):
+            self.assertFalse(EnergyLog._meta.get_field(name).db_index)
@@ -0,0 +1,78 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ilgi.users.tests.factories import UserFactory
+from .factories import EnergyLogFactory
+
+
+class TestEnergyLogPagination(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+        # several logs share a date so the id tie-breaker matters
+        start = date(2024, 1, 1)
+        self.logs = [
+            EnergyLogFactory(created_by=self.user, date=start + timedelta(days=i // 3))
+            for i in range(10)
+        ]
+        EnergyLogFactory()  # belongs to someone else
+
+    def expected_ids(self):
+        logs = sorted(self.logs, key=lambda log: (log.date, log.id), reverse=True)
+        return [str(log.external_id) for log in logs]
+
+    def walk(self, url):
+        ids = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            data = resp.json()
+            ids += [log["id"] for log in data["results"]]
+            url = data["next"]
+        return ids
+
+    def test_pages_follow_date_then_id(self):
+        """Test that walking all pages yields every log once, newest first"""
+
+        self.assertEqual(self.walk("/api/energy-logs/?limit=3"), self.expected_ids())
+
+    def test_no_count_query(self):
+        """Test that a page is served without a COUNT(*) query"""
+
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get("/api/energy-logs/?limit=3")
+        self.assertNotIn("count", resp.json())
+        for query in queries:
+            self.assertNotIn("COUNT(", query["sql"])
+
+    def test_stable_under_inserts(self):
+        """Test that rows inserted while paging don't shift unseen pages"""
+
+        first = self.client.get("/api/energy-logs/?limit=4").json()
+        EnergyLogFactory(created_by=self.user, date=date(2030, 1, 1))
+        self.logs.append(EnergyLogFactory(created_by=self.user, date=date(2020, 1, 1)))
+
+        ids = [log["id"] for log in first["results"]] + self.walk(first["next"])
+        self.assertEqual(ids, self.expected_ids())
+
+    def test_previous_link(self):
+        """Test that the previous link of page two returns page one"""
+
+        first = self.client.get("/api/energy-logs/?limit=4").json()
+        self.assertIsNone(first["previous"])
+
+        second = self.client.get(first["next"]).json()
+        back = self.client.get(second["previous"]).json()
+        self.assertEqual(back["results"], first["results"])
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+
+        resp = self.client.get("/api/energy-logs/?cursor=garbage")
+        self.assertEqual(resp.status_code, 404)
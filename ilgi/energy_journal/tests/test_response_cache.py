@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ilgi.users.tests.factories import UserFactory
+from utils.cache import LRUCache, clear_local_caches
+from utils.response_cache import response_cache_stats, responses
+from utils.testing import fake_redis
+from .factories import EnergyLogFactory
+
+
+class TestEnergyLogResponseCache(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.log = EnergyLogFactory(created_by=self.user, title="Original")
+
+    def test_list_cached(self):
+        """Test that a repeated list is served from the cache"""
+
+        resp = self.client.get("/api/energy-logs/")
+        self.assertEqual(resp["X-Cache"], "MISS")
+
+        before = response_cache_stats()
+        # only the conditional GET validators are queried on a hit
+        with self.assertNumQueries(1):
+            again = self.client.get("/api/energy-logs/")
+        self.assertEqual(again["X-Cache"], "HIT")
+        self.assertEqual(again.json(), resp.json())
+        self.assertEqual(response_cache_stats()["hits"], before["hits"] + 1)
+        # the counts are this process' own
+        self.assertEqual(before["pid"], os.getpid())
+
+    def test_keyed_by_query_params(self):
+        """Test that different query parameters are cached separately"""
+
+        EnergyLogFactory(created_by=self.user)
+        self.client.get("/api/energy-logs/?limit=1")
+        resp = self.client.get("/api/energy-logs/?limit=2")
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(len(resp.json()["results"]), 2)
+
+    def test_keyed_by_user(self):
+        """Test that users never see each other's cached responses"""
+
+        self.client.get("/api/energy-logs/")
+
+        other = UserFactory()
+        self.client.force_authenticate(user=other)
+        resp = self.client.get("/api/energy-logs/")
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.json()["results"], [])
+
+    def test_invalidated_on_writes(self):
+        """Test that creates, updates and soft deletes invalidate the cache"""
+
+        url = f"/api/energy-logs/{self.log.external_id}/"
+        self.client.get("/api/energy-logs/")
+        self.client.get(url)
+
+        self.client.patch(url, {"title": "Edited"}, format="json")
+        resp = self.client.get(url)
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.json()["title"], "Edited")
+
+        self.client.get("/api/energy-logs/")
+        EnergyLogFactory(created_by=self.user)
+        resp = self.client.get("/api/energy-logs/")
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(len(resp.json()["results"]), 2)
+
+        self.log.delete()
+        resp = self.client.get("/api/energy-logs/")
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(len(resp.json()["results"]), 1)
+
+    def test_invalidated_on_bulk_writes(self):
+        """Test that bulk writes invalidate the cache"""
+
+        self.client.get("/api/energy-logs/")
+        self.client.post(
+            "/api/energy-logs/bulk/",
+            {"delete": [str(self.log.external_id)]},
+            format="json",
+        )
+        resp = self.client.get("/api/energy-logs/")
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.json()["results"], [])
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        """Test that a zero timeout disables the cache"""
+
+        self.client.get("/api/energy-logs/")
+        resp = self.client.get("/api/energy-logs/")
+        self.assertNotIn("X-Cache", resp)
+
+
+@fake_redis()
+class TestTwoTierResponseCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.addCleanup(clear_local_caches)
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.log = EnergyLogFactory(created_by=self.user, title="Original")
+
+    def test_local_tier(self):
+        """Test that repeated reads are served from the process' LRU"""
+
+        self.client.get("/api/energy-logs/")
+        before = responses.metrics()
+        self.assertEqual(self.client.get("/api/energy-logs/")["X-Cache"], "HIT")
+        self.assertEqual(responses.metrics()["local_hits"], before["local_hits"] + 1)
+
+        # another process only has the shared cache
+        clear_local_caches()
+        self.assertEqual(self.client.get("/api/energy-logs/")["X-Cache"], "HIT")
+        self.assertEqual(responses.metrics()["shared_hits"], before["shared_hits"] + 1)
+
+    def test_tags_invalidate_local_entries(self):
+        """Test that a write makes the LRU entries of the user stale too"""
+
+        self.client.get("/api/energy-logs/")
+        self.log.title = "Edited"
+        self.log.save()
+        resp = self.client.get("/api/energy-logs/")
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.json()["results"][0]["title"], "Edited")
+
+    def test_single_flight(self):
+        """Test that concurrent misses of a key compute it once"""
+
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+
+        threads = [
+            threading.Thread(target=responses.get_or_set, args=("flight", compute))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(responses.get("flight"), "value")
+
+    def test_concurrent_counts(self):
+        """Test that counts of concurrent reads aren't lost"""
+
+        before = responses.metrics()["misses"]
+
+        def read():
+            for _ in range(500):
+                responses.get("missing")
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(responses.metrics()["misses"], before + 8 * 500)
+
+    def test_lru_evictions(self):
+        """Test that the LRU keeps its size and counts evictions"""
+
+        lru = LRUCache(max_size=2, timeout=60)
+        for key in "abc":
+            lru.set(key, key)
+        self.assertEqual(len(lru), 2)
+        self.assertEqual(lru.evictions, 1)
+        self.assertIsNone(lru.get("a"))
@@ -0,0 +1,170 @@
+from datetime import date, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ilgi.energy_journal.models import (
+    ENERGY_ROLLUPS,
+    DailyEnergyRollup,
+    EnergyLog,
+    MonthlyEnergyRollup,
+    WeeklyEnergyRollup,
+)
+from ilgi.users.tests.factories import UserFactory
+from .factories import EnergyLogFactory
+
+
+def snapshot(rollup):
+    return sorted(
+        rollup.objects.values_list(
+            "created_by_id", "bucket", "count", "total", "minimum", "maximum"
+        )
+    )
+
+
+class TestEnergyRollups(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+
+    def log(self, day, energy_delta):
+        return EnergyLogFactory(
+            created_by=self.user, date=day, energy_delta=energy_delta
+        )
+
+    def assertMatchesRebuild(self):
+        incremental = {period: snapshot(r) for period, r in ENERGY_ROLLUPS.items()}
+        call_command("rebuild_energy_rollups", stdout=StringIO())
+        rebuilt = {period: snapshot(r) for period, r in ENERGY_ROLLUPS.items()}
+        self.assertEqual(incremental, rebuilt)
+
+    def test_create(self):
+        """Test that creating logs folds them into every bucket size"""
+
+        self.log(date(2024, 5, 6), 3)  # a Monday
+        self.log(date(2024, 5, 6), -2)
+        self.log(date(2024, 5, 12), 5)
+
+        daily = DailyEnergyRollup.objects.get(bucket=date(2024, 5, 6))
+        self.assertEqual((daily.count, daily.total), (2, 1))
+        self.assertEqual((daily.minimum, daily.maximum), (-2, 3))
+
+        weekly = WeeklyEnergyRollup.objects.get()
+        self.assertEqual(
+            (weekly.bucket, weekly.count, weekly.total), (date(2024, 5, 6), 3, 6)
+        )
+
+        monthly = MonthlyEnergyRollup.objects.get()
+        self.assertEqual((monthly.bucket, monthly.maximum), (date(2024, 5, 1), 5))
+        self.assertMatchesRebuild()
+
+    def test_buckets(self):
+        """Test that buckets are computed as the database truncates dates"""
+
+        days = [date(2023, 12, 1) + timedelta(days=i) for i in range(100)]
+        for day in days:
+            self.log(day, 1)
+
+        for period, rollup in ENERGY_ROLLUPS.items():
+            buckets = sorted({rollup.truncate(day) for day in days})
+            truncated = rollup.aggregate(EnergyLog.objects.all())
+            self.assertEqual(buckets, sorted(row["bucket"] for row in truncated))
+            for bucket, following in zip(buckets, buckets[1:]):
+                self.assertEqual(rollup.next_bucket(bucket), following, period)
+
+    def test_edit(self):
+        """Test that moving a log between buckets and changing it is reflected"""
+
+        self.log(date(2024, 5, 6), 1)
+        log = self.log(date(2024, 5, 6), 5)
+
+        log.date = date(2024, 6, 30)
+        log.energy_delta = -4
+        log.save()
+
+        daily = DailyEnergyRollup.objects.get(bucket=date(2024, 5, 6))
+        self.assertEqual((daily.count, daily.maximum), (1, 1))
+        self.assertEqual(MonthlyEnergyRollup.objects.count(), 2)
+        self.assertMatchesRebuild()
+
+    def test_soft_delete(self):
+        """Test that soft deleting a log removes it and empties its buckets"""
+
+        log = self.log(date(2024, 5, 6), 2)
+        log.delete()
+
+        for rollup in ENERGY_ROLLUPS.values():
+            self.assertFalse(rollup.objects.exists())
+        self.assertMatchesRebuild()
+
+    def test_rebuild(self):
+        """Test that the rebuild command restores lost rollups"""
+
+        self.log(date(2024, 5, 6), 2)
+        self.log(date(2024, 8, 1), -1)
+        expected = snapshot(MonthlyEnergyRollup)
+
+        MonthlyEnergyRollup.objects.all().delete()
+        call_command("rebuild_energy_rollups", stdout=StringIO())
+        self.assertEqual(snapshot(MonthlyEnergyRollup), expected)
+
+
+class TestEnergyTrends(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+        for day, energy_delta in [
+            (date(2024, 1, 1), 4),
+            (date(2024, 1, 2), -2),
+            (date(2024, 1, 15), 1),
+            (date(2024, 2, 9), 3),
+        ]:
+            EnergyLogFactory(created_by=self.user, date=day, energy_delta=energy_delta)
+        EnergyLogFactory(date=date(2024, 1, 1))  # belongs to someone else
+
+    def test_monthly(self):
+        """Test that trends are served per bucket from the rollups"""
+
+        with self.assertNumQueries(1):
+            resp = self.client.get("/api/energy-logs/trends/?period=month")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp.json(),
+            [
+                {
+                    "bucket": "2024-01-01",
+                    "count": 3,
+                    "total": 3,
+                    "minimum": -2,
+                    "maximum": 4,
+                    "average": 1.0,
+                },
+                {
+                    "bucket": "2024-02-01",
+                    "count": 1,
+                    "total": 3,
+                    "minimum": 3,
+                    "maximum": 3,
+                    "average": 3.0,
+                },
+            ],
+        )
+
+    def test_range(self):
+        """Test that trends can be limited to a date range"""
+
+        resp = self.client.get(
+            "/api/energy-logs/trends/?period=day&start=2024-01-02&end=2024-01-31"
+        )
+        self.assertEqual(
+            [bucket["bucket"] for bucket in resp.json()], ["2024-01-02", "2024-01-15"]
+        )
+
+    def test_invalid_period(self):
+        """Test that unknown periods are rejected"""
+
+        resp = self.client.get("/api/energy-logs/trends/?period=year")
+        self.assertEqual(resp.status_code, 400)
@@ -0,0 +1,89 @@
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ilgi.energy_journal.search import FTS_TABLE, ensure_sqlite_triggers
+from ilgi.users.tests.factories import UserFactory
+from .factories import EnergyLogFactory
+
+
+class TestEnergyLogSearch(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+
+    def log(self, title, story):
+        return EnergyLogFactory(created_by=self.user, title=title, story=story)
+
+    def search(self, q):
+        resp = self.client.get("/api/energy-logs/search/", {"q": q})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def test_ranked_with_snippets(self):
+        """Test that title matches rank above story matches and are highlighted"""
+
+        in_story = self.log("Tuesday", "Went for a long run by the river")
+        in_title = self.log("Morning run", "Legs felt heavy but the run helped")
+        self.log("Reading", "Finished a novel")
+
+        data = self.search("run")
+        self.assertEqual(data["count"], 2)
+
+        ids = [hit["id"] for hit in data["results"]]
+        self.assertEqual(ids, [str(in_title.external_id), str(in_story.external_id)])
+        self.assertIn("<mark>run</mark>", data["results"][1]["snippet"])
+
+    def test_stemming(self):
+        """Test that words match regardless of their inflection"""
+
+        log = self.log("Evening", "Ran three kilometres while running late")
+        hits = self.search("runs")["results"]
+        self.assertEqual([hit["id"] for hit in hits], [str(log.external_id)])
+
+    def test_index_follows_edits_and_soft_deletes(self):
+        """Test that edits are reindexed and soft deleted logs are dropped"""
+
+        log = self.log("Swim", "Laps at the pool")
+        log.story = "Laps in the lake"
+        log.save()
+        self.assertEqual(self.search("pool")["count"], 0)
+        self.assertEqual(self.search("lake")["count"], 1)
+
+        log.delete()
+        self.assertEqual(self.search("lake")["count"], 0)
+
+    def test_only_own_logs(self):
+        """Test that other users' logs are never returned"""
+
+        EnergyLogFactory(title="Yoga", story="Stretching")
+        self.assertEqual(self.search("yoga")["count"], 0)
+
+    def test_query_syntax_is_literal(self):
+        """Test that search operators in the input don't cause errors"""
+
+        self.log("Notes", "title: AND OR NOT (stuff)")
+        self.assertEqual(self.search('title: "stuff')["count"], 1)
+
+    def test_missing_query(self):
+        """Test that a search term is required"""
+
+        resp = self.client.get("/api/energy-logs/search/")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_missing_triggers_reinstalled(self):
+        """Test that triggers dropped by a table rebuild are put back"""
+
+        log = self.log("Swim", "Laps at the pool")
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {FTS_TABLE}_update")
+        log.story = "Laps in the lake"
+        log.save()
+        self.assertEqual(self.search("lake")["count"], 0)
+
+        ensure_sqlite_triggers()
+        self.assertEqual(self.search("lake")["count"], 1)
+        log.story = "Laps in the sea"
+        log.save()
+        self.assertEqual(self.search("sea")["count"], 1)
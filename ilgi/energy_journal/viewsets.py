@@ -1,18 +1,236 @@
-from rest_framework.viewsets import ModelViewSet
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.functions import Coalesce, Greatest
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import mixins, status
+from rest_framework.decorators import action
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
 from rest_framework.permissions import IsAuthenticated
 
-from ilgi.energy_journal.serializers import EnergyLogSerializer
-from ilgi.energy_journal.models import EnergyLog
+from ilgi.energy_journal.serializers import (
+    EnergyLogBulkSerializer,
+    EnergyLogExportQuerySerializer,
+    EnergyLogImportSerializer,
+    EnergyLogSearchQuerySerializer,
+    EnergyLogSearchSerializer,
+    EnergyLogSerializer,
+    EnergyRollupSerializer,
+    EnergyTrendsQuerySerializer,
+)
+from ilgi.energy_journal.export import (
+    CONTENT_TYPES,
+    aexport_energy_logs,
+    export_energy_logs,
+)
+from ilgi.energy_journal.importer import run_energy_log_import
+from ilgi.energy_journal.models import ENERGY_ROLLUPS, EnergyLog, EnergyLogImport
+from ilgi.energy_journal.search import search_energy_logs
+from ilgi.energy_journal.tasks import import_energy_logs
+from utils.asyncviews import AsyncViewMixin
+from utils.conditional import ConditionalGetMixin
+from utils.pagination import KeysetPagination
+from utils.response_cache import CachedResponseMixin
+from utils.sync import ChangesMixin
 
 
-class EnergyLogViewSet(ModelViewSet):
+class EnergyLogPagination(KeysetPagination):
+    ordering = ("-date", "-id")
+
+
+class EnergyLogViewSet(
+    AsyncViewMixin, ConditionalGetMixin, CachedResponseMixin, ChangesMixin, ModelViewSet
+):
+    """
+    Energy logs of the user. The hot read paths, list and retrieve, are
+    async; the other actions run as sync code.
+    """
+
     serializer_class = EnergyLogSerializer
     queryset = EnergyLog.objects.select_related("created_by")
     lookup_field = "external_id"
     permission_classes = (IsAuthenticated,)
+    pagination_class = EnergyLogPagination
 
     def get_queryset(self):
         return super().get_queryset().filter(created_by=self.request.user)
 
+    def get_list_validators(self, queryset):
+        # Soft deletes bump updated_at too, so the newest updated_at of all
+        # the user's logs, deleted or not, changes on every write. It is a
+        # single seek on energy_log_user_changes_idx rather than a COUNT.
+        return self.with_user_validators(
+            self.get_changes_queryset().aggregate(last_modified=Max("updated_at"))
+        )
+
+    async def aget_list_validators(self, queryset):
+        return self.with_user_validators(
+            await self.get_changes_queryset().aaggregate(
+                last_modified=Max("updated_at")
+            )
+        )
+
+    def with_user_validators(self, validators):
+        # The logs embed their creator, the request's user, who comes from
+        # the user cache, so their changes are covered without a query.
+        user_updated_at = self.request.user.updated_at
+        return {
+            "last_modified": max(
+                filter(None, (validators["last_modified"], user_updated_at)),
+                default=None,
+            ),
+            "user_updated_at": user_updated_at,
+        }
+
+    def get_object_timestamp_queryset(self):
+        # the later of the log's and its creator's updated_at, see above
+        updated_at = Greatest(
+            "updated_at", Coalesce("created_by__updated_at", "updated_at")
+        )
+        queryset = super().get_object_timestamp_queryset()
+        return queryset.values_list(updated_at, flat=True)
+
+    async def list(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def retrieve(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+    def get_changes_queryset(self):
+        return super().get_changes_queryset().select_related("created_by")
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
+
+    @extend_schema(
+        summary="Search energy logs",
+        description="Full-text search over titles and stories, best matches first",
+        parameters=[EnergyLogSearchQuerySerializer],
+        responses={200: EnergyLogSearchSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"], pagination_class=LimitOffsetPagination)
+    def search(self, request):
+        query = EnergyLogSearchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        queryset = search_energy_logs(self.get_queryset(), query.validated_data["q"])
+        page = self.paginate_queryset(queryset)
+        serializer = EnergyLogSearchSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(
+        summary="Export energy logs",
+        description="Streams the whole journal, oldest first, as NDJSON or CSV",
+        parameters=[EnergyLogExportQuerySerializer],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        query = EnergyLogExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        queryset = self.get_queryset()
+        if "start" in params:
+            queryset = queryset.filter(date__gte=params["start"])
+        if "end" in params:
+            queryset = queryset.filter(date__lte=params["end"])
+
+        file_format, compress = params["file_format"], params["compress"]
+        filename = f"energy-logs.{file_format}"
+        content_type = CONTENT_TYPES[file_format]
+        if compress:
+            filename, content_type = f"{filename}.gz", "application/gzip"
+
+        # each server streams only its own kind of iterator, the other it
+        # reads whole into memory first
+        if isinstance(request._request, ASGIRequest):
+            export = aexport_energy_logs
+        else:
+            export = export_energy_logs
+        return StreamingHttpResponse(
+            export(queryset, file_format, compress),
+            content_type=content_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    @extend_schema(
+        summary="Energy trends",
+        description="Per-bucket count, sum, min, max and average of energy deltas",
+        parameters=[EnergyTrendsQuerySerializer],
+        responses={200: EnergyRollupSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def trends(self, request):
+        query = EnergyTrendsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        rollup = ENERGY_ROLLUPS[params["period"]]
+        rollups = rollup.objects.filter(created_by=request.user).order_by("bucket")
+        if "start" in params:
+            rollups = rollups.filter(bucket__gte=rollup.truncate(params["start"]))
+        if "end" in params:
+            rollups = rollups.filter(bucket__lte=params["end"])
+
+        return Response(EnergyRollupSerializer(rollups, many=True).data)
+
+    @extend_schema(
+        summary="Bulk create, update and delete energy logs",
+        description="Applies a batch of changes in a single transaction",
+        request=EnergyLogBulkSerializer,
+        responses={200: EnergyLogBulkSerializer},
+    )
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        serializer = EnergyLogBulkSerializer(
+            data=request.data, context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save(created_by=request.user)
+        return Response(serializer.data)
+
+
+class EnergyLogImportViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    """
+    Upload NDJSON or CSV files of energy logs and poll the resulting jobs.
+
+    Small files are imported within the request; larger ones are handed to
+    a Celery task and the job is returned right away with status 202.
+    """
+
+    serializer_class = EnergyLogImportSerializer
+    queryset = EnergyLogImport.objects.all()
+    lookup_field = "external_id"
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (MultiPartParser,)
+    inline_max_size = 512 * 1024
+
+    def get_queryset(self):
+        return super().get_queryset().filter(created_by=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(created_by=request.user)
+
+        if job.file.size <= self.inline_max_size:
+            run_energy_log_import(job)
+            return Response(
+                self.get_serializer(job).data, status=status.HTTP_201_CREATED
+            )
+
+        transaction.on_commit(lambda: import_energy_logs.delay(job.pk))
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,165 @@
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Trunc
+
+from ilgi.finance.models import MonthlyCashFlow, TransactionEntry
+
+PERIODS = ("day", "week", "month")
+# longest range of a day or week report through the API, which aggregates
+# the entries; months read the precomputed buckets and aren't limited
+MAX_REPORT_DAYS = 366
+
+
+def add_cash_flows(items, removed=()):
+    """
+    Add (account pk, date, amount) items, e.g. newly posted entries, to the
+    monthly cash flow buckets, and take the `removed` items back out of
+    them, with two queries regardless of their number: one to read the
+    affected buckets and one INSERT ... ON CONFLICT DO UPDATE writing their
+    new totals.
+
+    Callers hold the locks of the accounts (see `lock_accounts`), which
+    serializes all writers of their buckets.
+    """
+
+    deltas = {}
+    for sign, group in ((1, items), (-1, removed)):
+        for account_id, date, amount in group:
+            key = (account_id, date.replace(day=1))
+            inflow, outflow = deltas.get(key, (0, 0))
+            if amount > 0:
+                inflow += sign * amount
+            else:
+                outflow -= sign * amount
+            deltas[key] = (inflow, outflow)
+    if not deltas:
+        return
+
+    existing = MonthlyCashFlow.objects.filter(
+        account_id__in={account_id for account_id, _ in deltas},
+        bucket__in={bucket for _, bucket in deltas},
+    ).values_list("account_id", "bucket", "inflow", "outflow")
+    for account_id, bucket, inflow, outflow in existing:
+        delta = deltas.get((account_id, bucket))
+        if delta is not None:
+            deltas[account_id, bucket] = (delta[0] + inflow, delta[1] + outflow)
+
+    MonthlyCashFlow.objects.bulk_create(
+        [
+            MonthlyCashFlow(
+                account_id=account_id, bucket=bucket, inflow=inflow, outflow=outflow
+            )
+            for (account_id, bucket), (inflow, outflow) in deltas.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["account", "bucket"],
+        update_fields=["inflow", "outflow"],
+    )
+
+
+def rebuild_cash_flows():
+    """
+    Recompute all monthly cash flow buckets from the entries with a single
+    grouped query. Returns the number of buckets.
+    """
+
+    flows = aggregate_cash_flows(entries_for_cash_flow(), "month")
+    with transaction.atomic():
+        MonthlyCashFlow.objects.all().delete()
+        created = MonthlyCashFlow.objects.bulk_create(
+            MonthlyCashFlow(
+                account_id=flow["account"],
+                bucket=flow["bucket"],
+                inflow=flow["inflow"],
+                outflow=flow["outflow"],
+            )
+            for flow in flows.iterator()
+        )
+    return len(created)
+
+
+def entries_for_cash_flow():
+    return TransactionEntry.objects.filter(
+        transaction__deleted=False, account__isnull=False
+    )
+
+
+def aggregate_cash_flows(entries, period, account="account"):
+    """
+    GROUP BY `account` (a field path) and `period` bucket of the transaction
+    date, summing positive amounts as inflow and negative ones as outflow.
+    """
+
+    money = MonthlyCashFlow._meta.get_field("inflow")
+    zero = Value(0, output_field=money)
+    if period == "day":
+        # performed_on is a date already, truncating it would only cost a
+        # function call per row
+        bucket = F("transaction__performed_on")
+    else:
+        bucket = Trunc("transaction__performed_on", period)
+    return (
+        entries.annotate(bucket=bucket)
+        .values(account, "bucket")
+        .annotate(
+            inflow=Coalesce(Sum("amount", filter=Q(amount__gt=0)), zero),
+            outflow=Coalesce(
+                ExpressionWrapper(
+                    -Sum("amount", filter=Q(amount__lt=0)), output_field=money
+                ),
+                zero,
+            ),
+        )
+        .order_by("bucket", account)
+    )
+
+
+def cash_flow_report(user, period, start=None, end=None, accounts=None):
+    """
+    Return the inflow, outflow and net of the user's accounts per `period`
+    (day, week or month) between `start` and `end`, optionally only of the
+    `accounts` with the given external ids, as dicts ordered by bucket and
+    account.
+
+    Months are read from the precomputed MonthlyCashFlow buckets, so
+    `start` and `end` count by whole months: pass the first and last days
+    of months. Days and weeks are aggregated from the entries in the
+    database, between exactly `start` and `end`.
+    """
+
+    if period == "month":
+        flows = MonthlyCashFlow.objects.filter(account__owner=user)
+        if start is not None:
+            flows = flows.filter(bucket__gte=start.replace(day=1))
+        if end is not None:
+            flows = flows.filter(bucket__lte=end)
+        if accounts is not None:
+            flows = flows.filter(account__external_id__in=accounts)
+        flows = flows.values(
+            "account__external_id", "bucket", "inflow", "outflow"
+        ).order_by("bucket", "account__external_id")
+    else:
+        # the accounts' owner, as of months; transactions only post to their
+        # creator's accounts, and filtering on the creator too lets the
+        # database start from their transactions by date
+        entries = entries_for_cash_flow().filter(
+            account__owner=user, transaction__created_by=user
+        )
+        if start is not None:
+            entries = entries.filter(transaction__performed_on__gte=start)
+        if end is not None:
+            entries = entries.filter(transaction__performed_on__lte=end)
+        if accounts is not None:
+            entries = entries.filter(account__external_id__in=accounts)
+        flows = aggregate_cash_flows(entries, period, "account__external_id")
+
+    return [
+        {
+            "account": flow["account__external_id"],
+            "bucket": flow["bucket"],
+            "inflow": flow["inflow"],
+            "outflow": flow["outflow"],
+            "net": flow["inflow"] - flow["outflow"],
+        }
+        for flow in flows
+    ]
@@ -0,0 +1,159 @@
+import calendar
+from datetime import date
+
+from django.db.models import Count, F, Max, Min, Q, Sum
+from django.db.models.functions import ExtractDay, Lower, Trunc
+from django.utils import timezone
+
+from ilgi.finance.models import MonthlyCashFlow
+from ilgi.finance.snapshots import entries_of, month_end
+from utils.cache import TwoTierCache, invalidate_tags
+
+CACHE_TIMEOUT = 24 * 60 * 60
+LOOKBACK_MONTHS = 12
+MAX_MONTHS = 60
+MIN_OCCURRENCES = 3
+
+forecasts = TwoTierCache("forecast", timeout=CACHE_TIMEOUT)
+
+
+def add_months(day, months):
+    """
+    The first of the month `months` after the month of `day`.
+    """
+
+    month = day.year * 12 + day.month - 1 + months
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def detect_recurring(account, today):
+    """
+    Find the account's recurring entries: those of transactions with the
+    same name and amount, seen at most once a month in at least
+    MIN_OCCURRENCES of the last LOOKBACK_MONTHS months, most recently in
+    this or the previous month. Salaries and subscriptions look like this.
+
+    A single grouped query; besides the `name`, `amount` and typical `day`
+    of the month, each item has the `occurrences`, the `last` date and the
+    `window_total` over the complete months of the lookback window.
+    """
+
+    this_month = today.replace(day=1)
+    performed_on = "transaction__performed_on"
+    return list(
+        entries_of([account.pk])
+        .filter(
+            transaction__performed_on__gte=add_months(today, -LOOKBACK_MONTHS),
+            transaction__performed_on__lte=today,
+        )
+        .values("amount", key=Lower("transaction__name"))
+        .annotate(
+            name=Max("transaction__name"),
+            occurrences=Count("id"),
+            months=Count(Trunc(performed_on, "month"), distinct=True),
+            last=Max(performed_on),
+            day=Max(ExtractDay(performed_on)),
+            window_total=Sum("amount", filter=Q(**{f"{performed_on}__lt": this_month})),
+        )
+        .filter(
+            months__gte=MIN_OCCURRENCES,
+            occurrences=F("months"),
+            last__gte=add_months(today, -1),
+        )
+        .order_by("day", "key", "amount")
+    )
+
+
+def forecast_balances(account, months, today=None):
+    """
+    Project the balance of `account` at the end of each of the next
+    `months` months from its current balance, the recurring entries (see
+    `detect_recurring`) and the average monthly net of everything else over
+    the last LOOKBACK_MONTHS complete months, read from the monthly cash
+    flow buckets.
+
+    Both inputs are aggregated in the database, so the cost doesn't grow
+    with the account's history; the projection itself is closed form per
+    month. Results are cached per account for the day and made stale by
+    `invalidate_forecasts` whenever entries of the account are written.
+    """
+
+    today = today or timezone.localdate()
+    cached = forecasts.get_or_set(
+        f"{account.pk}:{today}",
+        lambda: _forecast(account, today),
+        tags=[account_tag(account.pk)],
+    )
+    return {**cached, "projection": cached["projection"][:months]}
+
+
+def account_tag(account_id):
+    return f"account:{account_id}"
+
+
+def invalidate_forecasts(account_ids):
+    """
+    Drop the cached forecasts of the accounts, right away and again once
+    the surrounding transaction commits, so a forecast computed from
+    pre-commit data in between is dropped as well.
+    """
+
+    invalidate_tags([account_tag(pk) for pk in account_ids])
+
+
+def _forecast(account, today):
+    this_month = today.replace(day=1)
+    recurring = detect_recurring(account, today)
+
+    history = MonthlyCashFlow.objects.filter(
+        account=account,
+        bucket__gte=add_months(today, -LOOKBACK_MONTHS),
+        bucket__lt=this_month,
+    ).aggregate(net=Sum("inflow") - Sum("outflow"), first=Min("bucket"))
+    if history["first"] is None:
+        variable = 0
+    else:
+        window = (this_month.year - history["first"].year) * 12 + (
+            this_month.month - history["first"].month
+        )
+        recurring_total = sum(item["window_total"] or 0 for item in recurring)
+        variable = (history["net"] - recurring_total) / window
+
+    monthly = sum(item["amount"] for item in recurring)
+    # still due this month: not seen yet and its day is yet to come
+    pending = sum(
+        item["amount"]
+        for item in recurring
+        if item["last"] < this_month and item["day"] > today.day
+    )
+    days = calendar.monthrange(today.year, today.month)[1]
+    remaining = (days - today.day) / days
+
+    projection = []
+    for ahead in range(1, MAX_MONTHS + 1):
+        recurring_total = pending + monthly * ahead
+        variable_total = round(variable * (remaining + ahead))
+        projection.append(
+            {
+                "month": month_end(add_months(today, ahead)),
+                "balance": account.balance + recurring_total + variable_total,
+                "recurring": recurring_total,
+                "variable": variable_total,
+            }
+        )
+
+    return {
+        "date": today,
+        "balance": account.balance,
+        "recurring": [
+            {
+                "name": item["name"],
+                "amount": item["amount"],
+                "day": item["day"],
+                "occurrences": item["occurrences"],
+                "last": item["last"],
+            }
+            for item in recurring
+        ],
+        "projection": projection,
+    }
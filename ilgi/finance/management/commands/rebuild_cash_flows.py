@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from ilgi.finance.cash_flow import rebuild_cash_flows
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly cash flow buckets from scratch"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Rebuilt {rebuild_cash_flows()} monthly cash flows")
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ilgi.finance.reconciliation import RECONCILE_CHUNK_SIZE, reconcile_balances
+
+
+class Command(BaseCommand):
+    help = "Compare account balances with the sum of their entries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix", action="store_true", help="Correct mismatched balances"
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Check every account, not only those touched since the last run",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=RECONCILE_CHUNK_SIZE,
+            help="Number of accounts to check per query",
+        )
+
+    def handle(self, *args, fix, full, chunk_size, **options):
+        run = reconcile_balances(fix=fix, full=full, chunk_size=chunk_size)
+        for mismatch in run.mismatches:
+            self.stderr.write(
+                f"Account {mismatch['account']}: balance {mismatch['balance']}, "
+                f"entries sum to {mismatch['expected']}"
+            )
+        self.stdout.write(
+            f"Checked {run.accounts_checked} accounts "
+            f"({run.accounts_per_second:.0f} accounts/s), "
+            f"{len(run.mismatches)} mismatched"
+        )
+        if run.mismatches and not fix:
+            raise CommandError("Balances drifted, rerun with --fix to correct them")
@@ -1,19 +1,21 @@
-# Generated by Django 5.1.2 on 2024-11-30 12:37
+# Generated by Django 5.1.2 on 2026-10-18 12:36
 
-import django.core.validators
+import django.db.models.deletion
 import uuid
+from django.conf import settings
 from django.db import migrations, models
 
 
 class Migration(migrations.Migration):
-
     initial = True
 
-    dependencies = []
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
 
     operations = [
         migrations.CreateModel(
-            name="EnergyLog",
+            name="Account",
             fields=[
                 (
                     "id",
@@ -28,30 +30,120 @@ class Migration(migrations.Migration):
                     "external_id",
                     models.UUIDField(db_index=True, default=uuid.uuid4, unique=True),
                 ),
+                ("created_at", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True, null=True)),
+                ("deleted", models.BooleanField(default=False)),
+                ("name", models.CharField(max_length=255)),
+                ("balance", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("active", models.BooleanField(default=True)),
                 (
-                    "created_at",
-                    models.DateTimeField(auto_now_add=True, db_index=True, null=True),
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
                 ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Transaction",
+            fields=[
                 (
-                    "updated_at",
-                    models.DateTimeField(auto_now=True, db_index=True, null=True),
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "external_id",
+                    models.UUIDField(db_index=True, default=uuid.uuid4, unique=True),
                 ),
-                ("deleted", models.BooleanField(db_index=True, default=False)),
-                ("title", models.CharField(max_length=255)),
-                ("story", models.TextField()),
-                ("date", models.DateField()),
+                ("created_at", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True, null=True)),
+                ("deleted", models.BooleanField(default=False)),
+                ("name", models.CharField(max_length=255)),
+                ("description", models.TextField()),
+                ("performed_on", models.DateField()),
                 (
-                    "energy_delta",
-                    models.SmallIntegerField(
-                        validators=[
-                            django.core.validators.MinValueValidator(-5),
-                            django.core.validators.MaxValueValidator(5),
-                        ]
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to=settings.AUTH_USER_MODEL,
                     ),
                 ),
             ],
-            options={
-                "abstract": False,
-            },
+        ),
+        migrations.CreateModel(
+            name="TransactionEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "external_id",
+                    models.UUIDField(db_index=True, default=uuid.uuid4, unique=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True, null=True)),
+                ("deleted", models.BooleanField(default=False)),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("name", models.CharField(max_length=255)),
+                (
+                    "account",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="transaction_entries",
+                        to="finance.account",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="entries",
+                        to="finance.transaction",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="account",
+            index=models.Index(
+                condition=models.Q(("deleted", False)),
+                fields=["owner", "name", "id"],
+                name="account_owner_name_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(("deleted", False)),
+                fields=["created_by", "-performed_on", "-id"],
+                name="transaction_user_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transactionentry",
+            index=models.Index(
+                condition=models.Q(("deleted", False)),
+                fields=["account", "amount"],
+                name="entry_account_amount_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="transactionentry",
+            unique_together={("transaction", "account")},
         ),
     ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:44
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("finance", "0002_balance_snapshots"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BalanceReconciliation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("started_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("full", models.BooleanField(default=False)),
+                (
+                    "fixed",
+                    models.BooleanField(
+                        default=False,
+                        help_text="Whether mismatched balances were corrected",
+                    ),
+                ),
+                ("accounts_checked", models.PositiveIntegerField(default=0)),
+                (
+                    "mismatches",
+                    models.JSONField(
+                        default=list,
+                        help_text="Accounts whose balance differed from their entries",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="transactionentry",
+            index=models.Index(fields=["updated_at"], name="entry_updated_idx"),
+        ),
+    ]
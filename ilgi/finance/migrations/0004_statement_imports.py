@@ -0,0 +1,119 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:45
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("finance", "0003_balance_reconciliation"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatementImport",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "external_id",
+                    models.UUIDField(db_index=True, default=uuid.uuid4, unique=True),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True, null=True)),
+                ("deleted", models.BooleanField(default=False)),
+                ("file", models.FileField(upload_to="statement-imports/")),
+                (
+                    "file_format",
+                    models.CharField(
+                        choices=[("csv", "CSV"), ("ofx", "OFX")], max_length=10
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("processed_rows", models.PositiveIntegerField(default=0)),
+                ("imported_rows", models.PositiveIntegerField(default=0)),
+                ("duplicate_rows", models.PositiveIntegerField(default=0)),
+                ("failed_rows", models.PositiveIntegerField(default=0)),
+                (
+                    "errors",
+                    models.JSONField(
+                        default=list,
+                        help_text="Validation errors of the first failed rows",
+                    ),
+                ),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.AddField(
+            model_name="transactionentry",
+            name="fingerprint",
+            field=models.CharField(
+                blank=True,
+                default="",
+                help_text="Hash of the statement line an entry was imported from",
+                max_length=40,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transactionentry",
+            index=models.Index(
+                condition=models.Q(
+                    ("deleted", False), models.Q(("fingerprint", ""), _negated=True)
+                ),
+                fields=["account", "fingerprint"],
+                name="entry_fingerprint_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="statementimport",
+            name="account",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="finance.account",
+            ),
+        ),
+        migrations.AddField(
+            model_name="statementimport",
+            name="counter_account",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="finance.account",
+            ),
+        ),
+        migrations.AddField(
+            model_name="statementimport",
+            name="created_by",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
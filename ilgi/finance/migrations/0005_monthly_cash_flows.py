@@ -0,0 +1,84 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:58
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Q, Sum
+from django.db.models.functions import Trunc
+
+
+def build_cash_flows(apps, schema_editor):
+    TransactionEntry = apps.get_model("finance", "TransactionEntry")
+    MonthlyCashFlow = apps.get_model("finance", "MonthlyCashFlow")
+
+    flows = (
+        TransactionEntry.objects.filter(
+            deleted=False, transaction__deleted=False, account__isnull=False
+        )
+        .annotate(bucket=Trunc("transaction__performed_on", "month"))
+        .values("account", "bucket")
+        .annotate(
+            inflow=Sum("amount", filter=Q(amount__gt=0)),
+            outflow=Sum("amount", filter=Q(amount__lt=0)),
+        )
+        .order_by()
+    )
+    MonthlyCashFlow.objects.bulk_create(
+        MonthlyCashFlow(
+            account_id=flow["account"],
+            bucket=flow["bucket"],
+            inflow=Decimal(flow["inflow"] or 0).quantize(Decimal("0.01")),
+            outflow=-Decimal(flow["outflow"] or 0).quantize(Decimal("0.01")),
+        )
+        for flow in flows.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("finance", "0004_statement_imports"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MonthlyCashFlow",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("bucket", models.DateField(help_text="First day of the month")),
+                (
+                    "inflow",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "outflow",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="finance.account",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("account", "bucket"),
+                        name="monthly_cash_flow_account_bucket",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(build_cash_flows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:10
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Value
+from django.db.models.functions import Round
+
+import utils.fields
+from utils.money import minor_units
+
+# the decimal columns converted to integer minor units, (model, field)
+MONEY_FIELDS = [
+    ("Account", "balance"),
+    ("TransactionEntry", "amount"),
+    ("AccountBalanceSnapshot", "balance"),
+    ("MonthlyCashFlow", "inflow"),
+    ("MonthlyCashFlow", "outflow"),
+]
+
+
+# the decimal columns all have two decimal places, whatever CURRENCY is
+SCALE = 100
+
+
+def to_minor_units(apps, schema_editor):
+    has_data = any(
+        apps.get_model("finance", model).objects.exists() for model, _ in MONEY_FIELDS
+    )
+    if has_data and minor_units() != 2:
+        raise RuntimeError(
+            "The existing amounts have two decimal places, but CURRENCY "
+            f"({settings.CURRENCY}) has {minor_units()}; migrate with a "
+            "currency that has two, CURRENCY can't change once there is data"
+        )
+    for model, field in MONEY_FIELDS:
+        apps.get_model("finance", model).objects.update(
+            **{f"{field}_minor": Round(F(field) * SCALE)}
+        )
+
+
+def to_decimal(apps, schema_editor):
+    unit = Value(Decimal(1) / SCALE)
+    decimal = DecimalField(max_digits=14, decimal_places=2)
+    for model, field in MONEY_FIELDS:
+        apps.get_model("finance", model).objects.update(
+            **{field: ExpressionWrapper(F(f"{field}_minor") * unit, decimal)}
+        )
+
+
+def add_minor_fields():
+    # the new columns are nullable until filled in, and so are the decimal
+    # ones before they're dropped, so that reversing can re-add them
+    operations = []
+    for model, field in MONEY_FIELDS:
+        if model == "MonthlyCashFlow":
+            decimal = models.DecimalField(
+                max_digits=14, decimal_places=2, default=0, null=True
+            )
+        else:
+            decimal = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+        operations += [
+            migrations.AlterField(model_name=model.lower(), name=field, field=decimal),
+            migrations.AddField(
+                model_name=model.lower(),
+                name=f"{field}_minor",
+                field=models.BigIntegerField(null=True),
+            ),
+        ]
+    return operations
+
+
+def replace_decimal_fields():
+    operations = []
+    for model, field in MONEY_FIELDS:
+        default = {"default": 0} if model == "MonthlyCashFlow" else {}
+        operations += [
+            migrations.RemoveField(model_name=model.lower(), name=field),
+            migrations.RenameField(
+                model_name=model.lower(), old_name=f"{field}_minor", new_name=field
+            ),
+            migrations.AlterField(
+                model_name=model.lower(),
+                name=field,
+                field=utils.fields.MoneyField(**default),
+            ),
+        ]
+    return operations
+
+
+class Migration(migrations.Migration):
+    """
+    Convert the DecimalField amounts to MoneyField, integer hundredths, the
+    minor units of CURRENCY, which must have two if there's data: each
+    column is copied into a new BIGINT one with a single UPDATE, which then
+    replaces it. Reversible, back to two decimal places.
+    """
+
+    dependencies = [
+        ("finance", "0005_monthly_cash_flows"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transactionentry",
+            name="entry_account_amount_idx",
+        ),
+        *add_minor_fields(),
+        migrations.RunPython(to_minor_units, to_decimal),
+        *replace_decimal_fields(),
+        migrations.AddIndex(
+            model_name="transactionentry",
+            index=models.Index(
+                condition=models.Q(("deleted", False)),
+                fields=["account", "amount"],
+                name="entry_account_amount_idx",
+            ),
+        ),
+    ]
@@ -1,14 +1,26 @@
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
 
+from utils.fields import MoneyField
 from utils.models import BaseModel
 
 
 class Account(BaseModel):
     name = models.CharField(max_length=255)
-    balance = models.DecimalField(max_digits=10, decimal_places=2)
+    balance = MoneyField()
     owner = models.ForeignKey("users.User", on_delete=models.PROTECT)
     active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["owner", "name", "id"],
+                name="account_owner_name_idx",
+                condition=Q(deleted=False),
+            ),
+        ]
+
 
 class Transaction(BaseModel):
     name = models.CharField(max_length=255)
@@ -16,14 +28,163 @@ class Transaction(BaseModel):
     performed_on = models.DateField()
     created_by = models.ForeignKey("users.User", on_delete=models.PROTECT)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["created_by", "-performed_on", "-id"],
+                name="transaction_user_date_idx",
+                condition=Q(deleted=False),
+            ),
+        ]
+
 
 class TransactionEntry(BaseModel):
     transaction = models.ForeignKey("finance.Transaction", on_delete=models.PROTECT, related_name="entries")
     account = models.ForeignKey(
-        "finance.Account", on_delete=models.PROTECT, null=True, blank=True, related_name="transaction_entries"
+        "finance.Account",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="transaction_entries",
+        db_index=False,  # see entry_account_amount_idx
     )
-    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    amount = MoneyField()
     name = models.CharField(max_length=255)
+    fingerprint = models.CharField(
+        max_length=40,
+        blank=True,
+        default="",
+        help_text="Hash of the statement line an entry was imported from",
+    )
 
     class Meta:
         unique_together = ("transaction", "account")
+        indexes = [
+            # covers summing an account's balance from its entries, and
+            # replaces the account foreign key index as accounts are only
+            # ever soft deleted; entries of a transaction use the
+            # (transaction, account) unique index
+            models.Index(
+                fields=["account", "amount"],
+                name="entry_account_amount_idx",
+                condition=Q(deleted=False),
+            ),
+            # finds the entries written since the last reconciliation,
+            # soft deleted ones included
+            models.Index(fields=["updated_at"], name="entry_updated_idx"),
+            # duplicate detection of imported statement lines
+            models.Index(
+                fields=["account", "fingerprint"],
+                name="entry_fingerprint_idx",
+                condition=Q(deleted=False) & ~Q(fingerprint=""),
+            ),
+        ]
+
+
+class AccountBalanceSnapshot(models.Model):
+    """
+    Balance of an account at the end of `date`, i.e. the sum of its entries
+    on transactions performed on or before that date. Checkpoints are taken
+    at the end of each month with entries, see ilgi.finance.snapshots.
+    """
+
+    account = models.ForeignKey(
+        "finance.Account", on_delete=models.CASCADE, related_name="+"
+    )
+    date = models.DateField()
+    balance = MoneyField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "date"], name="account_snapshot_account_date"
+            ),
+        ]
+
+
+class MonthlyCashFlow(models.Model):
+    """
+    Inflow (sum of positive amounts) and outflow (sum of negative amounts,
+    as a positive number) of an account's entries over one calendar month,
+    kept up to date by `ilgi.finance.cash_flow.add_cash_flows`.
+    """
+
+    account = models.ForeignKey(
+        "finance.Account", on_delete=models.CASCADE, related_name="+"
+    )
+    bucket = models.DateField(help_text="First day of the month")
+    inflow = MoneyField(default=0)
+    outflow = MoneyField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "bucket"], name="monthly_cash_flow_account_bucket"
+            ),
+        ]
+
+
+class BalanceReconciliation(models.Model):
+    """
+    A run of `ilgi.finance.reconciliation.reconcile_balances`, comparing
+    account balances with the sum of their entries. Incremental runs only
+    check the accounts touched since the start of the last finished run.
+    """
+
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    full = models.BooleanField(default=False)
+    fixed = models.BooleanField(
+        default=False, help_text="Whether mismatched balances were corrected"
+    )
+    accounts_checked = models.PositiveIntegerField(default=0)
+    mismatches = models.JSONField(
+        default=list, help_text="Accounts whose balance differed from their entries"
+    )
+
+    @property
+    def accounts_per_second(self):
+        elapsed = (self.finished_at - self.started_at).total_seconds()
+        return self.accounts_checked / elapsed if elapsed else 0
+
+
+class StatementImport(BaseModel):
+    """
+    An import of a bank statement (CSV or OFX) into an account, run in
+    batches by `ilgi.finance.statements` and polled for progress. Every
+    statement line is posted as a transaction between `account` and
+    `counter_account`.
+    """
+
+    class FileFormat(models.TextChoices):
+        CSV = "csv", "CSV"
+        OFX = "ofx", "OFX"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    created_by = models.ForeignKey(
+        "users.User", on_delete=models.PROTECT, related_name="+"
+    )
+    account = models.ForeignKey(
+        "finance.Account", on_delete=models.PROTECT, related_name="+"
+    )
+    counter_account = models.ForeignKey(
+        "finance.Account", on_delete=models.PROTECT, related_name="+"
+    )
+    file = models.FileField(upload_to="statement-imports/")
+    file_format = models.CharField(max_length=10, choices=FileFormat.choices)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    processed_rows = models.PositiveIntegerField(default=0)
+    imported_rows = models.PositiveIntegerField(default=0)
+    duplicate_rows = models.PositiveIntegerField(default=0)
+    failed_rows = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(
+        default=list, help_text="Validation errors of the first failed rows"
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
@@ -0,0 +1,212 @@
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, F, Value, When
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from ilgi.finance.cash_flow import add_cash_flows
+from ilgi.finance.forecast import invalidate_forecasts
+from ilgi.finance.models import Account, Transaction, TransactionEntry
+from ilgi.finance.snapshots import invalidate_snapshots
+from utils.money import Money
+
+
+def post_transaction(created_by, entries, **fields):
+    """
+    Post a balanced transaction: create the Transaction, insert all of its
+    entries with one bulk INSERT, apply them to the account balances with
+    one UPDATE and to the monthly cash flows, and drop the balance snapshots
+    and forecasts they make stale, atomically.
+
+    `entries` is a list of dicts with the `account` (external id), `amount`
+    and `name` of each entry; amounts must sum to zero and each account may
+    appear once. The accounts are locked with SELECT ... FOR UPDATE in
+    primary key order, so concurrent postings touching the same accounts
+    wait for each other instead of deadlocking.
+    """
+
+    validate_entries(entries)
+
+    with transaction.atomic():
+        accounts = lock_accounts(created_by, [entry["account"] for entry in entries])
+
+        txn = Transaction.objects.create(created_by=created_by, **fields)
+        created = TransactionEntry.objects.bulk_create(
+            TransactionEntry(
+                transaction=txn,
+                account=accounts[entry["account"]],
+                amount=entry["amount"],
+                name=entry["name"],
+            )
+            for entry in entries
+        )
+        apply_to_balances(created)
+        add_cash_flows(
+            (entry.account_id, txn.performed_on, entry.amount) for entry in created
+        )
+        invalidate_snapshots(
+            [account.pk for account in accounts.values()], txn.performed_on
+        )
+        invalidate_forecasts([account.pk for account in accounts.values()])
+
+    return txn, created
+
+
+def update_transaction(txn, entries=None, **fields):
+    """
+    Change the fields of a posted transaction and, if `entries` is given,
+    replace its entries, moving the account balances, monthly cash flows,
+    balance snapshots and forecasts along, atomically.
+
+    An account appears once per transaction, so entries are matched to the
+    existing ones by account: those are updated (soft deleted ones revived,
+    as the unique constraint covers them too), the others created and the
+    existing entries left out deleted, with one bulk_update, one bulk_create
+    and one UPDATE whatever their number. The transaction row is locked
+    first and then the accounts of the old and new entries, as in
+    `post_transaction`.
+    """
+
+    if entries is not None:
+        validate_entries(entries)
+
+    with transaction.atomic():
+        txn = Transaction.objects.select_for_update().get(pk=txn.pk)
+        rows = list(
+            TransactionEntry.all_objects.filter(transaction=txn)
+            .select_related("account")
+            .order_by("id")
+        )
+        old = [entry for entry in rows if not entry.deleted and entry.account]
+        old_items = [
+            (entry.account_id, txn.performed_on, entry.amount) for entry in old
+        ]
+
+        external_ids = [entry.account.external_id for entry in old]
+        if entries is not None:
+            external_ids += [entry["account"] for entry in entries]
+        accounts = lock_accounts(txn.created_by_id, list(dict.fromkeys(external_ids)))
+
+        for field, value in fields.items():
+            setattr(txn, field, value)
+        txn.save(update_fields=[*fields, "updated_at"])
+
+        current = old
+        if entries is not None:
+            current = _replace_entries(txn, rows, entries, accounts)
+
+        deltas = {}
+        for account_id, _, amount in old_items:
+            deltas[account_id] = deltas.get(account_id, 0) - amount
+        for entry in current:
+            deltas[entry.account_id] = deltas.get(entry.account_id, 0) + entry.amount
+        apply_balance_deltas({pk: delta for pk, delta in deltas.items() if delta})
+        add_cash_flows(
+            [(entry.account_id, txn.performed_on, entry.amount) for entry in current],
+            removed=old_items,
+        )
+        invalidate_snapshots(
+            [account.pk for account in accounts.values()],
+            min(txn.performed_on, *(on for _, on, _ in old_items)),
+        )
+        invalidate_forecasts([account.pk for account in accounts.values()])
+
+    return txn, current
+
+
+def _replace_entries(txn, rows, entries, accounts):
+    by_account = {entry.account_id: entry for entry in rows if entry.account_id}
+    removed = {entry.pk for entry in rows if not entry.deleted}
+
+    now = timezone.now()
+    updated, created = [], []
+    for entry in entries:
+        account = accounts[entry["account"]]
+        instance = by_account.get(account.pk)
+        if instance is None:
+            instance = TransactionEntry(transaction=txn, account=account)
+            created.append(instance)
+        else:
+            removed.discard(instance.pk)
+            instance.deleted = False
+            instance.updated_at = now
+            updated.append(instance)
+        instance.amount = entry["amount"]
+        instance.name = entry["name"]
+
+    # all_objects, as the default manager would skip the revived rows
+    TransactionEntry.all_objects.bulk_update(
+        updated, fields=["amount", "name", "deleted", "updated_at"]
+    )
+    TransactionEntry.objects.bulk_create(created)
+    TransactionEntry.objects.filter(pk__in=removed).update(deleted=True, updated_at=now)
+    return updated + created
+
+
+def validate_entries(entries):
+    if len(entries) < 2:
+        raise ValidationError({"entries": "A transaction needs at least two entries."})
+
+    accounts = [entry["account"] for entry in entries]
+    if len(accounts) != len(set(accounts)):
+        raise ValidationError(
+            {"entries": "Each account may only appear once per transaction."}
+        )
+
+    total = sum(entry["amount"] for entry in entries)
+    if total != 0:
+        raise ValidationError(
+            {"entries": f"Entries must sum to zero, they sum to {Money(total)}."}
+        )
+
+
+def lock_accounts(owner, external_ids):
+    """
+    Lock the owner's active accounts with the given external ids, in primary
+    key order, and return them keyed by external id.
+    """
+
+    accounts = {
+        account.external_id: account
+        for account in Account.objects.select_for_update()
+        .filter(owner=owner, external_id__in=external_ids, active=True)
+        .order_by("pk")
+    }
+    missing = [
+        str(external_id) for external_id in external_ids if external_id not in accounts
+    ]
+    if missing:
+        raise ValidationError(
+            {"entries": f"Unknown or inactive accounts: {', '.join(missing)}."}
+        )
+    return accounts
+
+
+def apply_to_balances(entries):
+    """
+    Add the entry amounts to their account balances in a single UPDATE.
+    """
+
+    deltas = {}
+    for entry in entries:
+        deltas[entry.account_id] = deltas.get(entry.account_id, 0) + entry.amount
+    apply_balance_deltas(deltas)
+
+
+def apply_balance_deltas(deltas):
+    """
+    Add the amounts of a {account pk: amount} dict to the account balances
+    in a single UPDATE. The balances are updated with F() expressions, so
+    the database computes them from the locked rows rather than from
+    possibly stale values in Python.
+    """
+
+    if not deltas:
+        return
+
+    delta = Case(
+        *(When(pk=pk, then=Value(amount)) for pk, amount in deltas.items()),
+        output_field=BigIntegerField(),
+    )
+    Account.objects.filter(pk__in=deltas).update(
+        balance=F("balance") + delta, updated_at=timezone.now()
+    )
@@ -1,10 +1,235 @@
+from datetime import timedelta
+
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
 from rest_framework import serializers
 
-from ilgi.finance.models import Account
+from ilgi.finance.cash_flow import MAX_REPORT_DAYS, PERIODS
+from ilgi.finance.forecast import MAX_MONTHS
+from ilgi.finance.models import (
+    Account,
+    StatementImport,
+    Transaction,
+    TransactionEntry,
+)
+from ilgi.finance.posting import post_transaction, update_transaction
+from utils.serializers import MoneyField
+
 
 class AccountSerializer(serializers.ModelSerializer):
     id = serializers.UUIDField(source="external_id")
+    balance = MoneyField()
 
     class Meta:
         model = Account
         fields = "__all__"
+
+
+class AccountIdField(serializers.UUIDField):
+    """
+    An account referenced by its external id. Accounts are looked up (and
+    locked) by the posting service, not one query per entry here.
+    """
+
+    def to_representation(self, value):
+        return super().to_representation(value.external_id)
+
+
+class TransactionEntrySerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(read_only=True, source="external_id")
+    account = AccountIdField()
+    amount = MoneyField()
+
+    class Meta:
+        model = TransactionEntry
+        fields = ("id", "account", "amount", "name")
+
+
+class TransactionSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(read_only=True, source="external_id")
+    entries = TransactionEntrySerializer(many=True)
+
+    class Meta:
+        model = Transaction
+        fields = (
+            "id",
+            "name",
+            "description",
+            "performed_on",
+            "entries",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = ("created_at", "updated_at")
+
+    def validate_entries(self, entries):
+        # entries are replaced as a whole, also by partial updates
+        for entry in entries:
+            missing = [
+                field for field in ("account", "amount", "name") if field not in entry
+            ]
+            if missing:
+                raise serializers.ValidationError(f"Entries need {', '.join(missing)}.")
+        return entries
+
+    def create(self, validated_data):
+        txn, _ = post_transaction(**validated_data)
+        prefetch_related_objects([txn], entries_prefetch())
+        return txn
+
+    def update(self, instance, validated_data):
+        txn, _ = update_transaction(instance, **validated_data)
+        # a fresh instance, as the view drops the prefetch cache of the one
+        # it passed in after saving
+        return Transaction.objects.prefetch_related(entries_prefetch()).get(pk=txn.pk)
+
+
+class CashFlowQuerySerializer(serializers.Serializer):
+    period = serializers.ChoiceField(choices=PERIODS, default="month")
+    start = serializers.DateField(
+        required=False,
+        help_text="The first day of a month for monthly reports. Day and week "
+        f"reports default to {MAX_REPORT_DAYS} days before end, and can't "
+        "span more",
+    )
+    end = serializers.DateField(
+        required=False,
+        help_text="The last day of a month for monthly reports. Day and week "
+        "reports default to today",
+    )
+    account = serializers.ListField(
+        child=serializers.UUIDField(),
+        required=False,
+        help_text="Only report these accounts, may be repeated",
+    )
+
+    def validate(self, attrs):
+        start, end = attrs.get("start"), attrs.get("end")
+        if attrs["period"] == "month":
+            if start is not None and start.day != 1:
+                raise serializers.ValidationError(
+                    {"start": "Must be the first day of a month for monthly reports"}
+                )
+            if end is not None and (end + timedelta(days=1)).day != 1:
+                raise serializers.ValidationError(
+                    {"end": "Must be the last day of a month for monthly reports"}
+                )
+        else:
+            end = attrs.setdefault("end", timezone.localdate())
+            start = attrs.setdefault("start", end - timedelta(days=MAX_REPORT_DAYS))
+            if end - start > timedelta(days=MAX_REPORT_DAYS):
+                raise serializers.ValidationError(
+                    f"Day and week reports can't span more than {MAX_REPORT_DAYS} days"
+                )
+        if start is not None and end is not None and start > end:
+            raise serializers.ValidationError("start must not be after end")
+        return attrs
+
+
+class CashFlowSerializer(serializers.Serializer):
+    account = serializers.UUIDField()
+    bucket = serializers.DateField(help_text="First day of the period")
+    inflow = MoneyField()
+    outflow = MoneyField()
+    net = MoneyField()
+
+
+class ForecastQuerySerializer(serializers.Serializer):
+    account = serializers.UUIDField()
+    months = serializers.IntegerField(min_value=1, max_value=MAX_MONTHS, default=12)
+
+
+class RecurringEntrySerializer(serializers.Serializer):
+    name = serializers.CharField()
+    amount = MoneyField()
+    day = serializers.IntegerField(help_text="Day of the month it occurs on")
+    occurrences = serializers.IntegerField()
+    last = serializers.DateField()
+
+
+class ProjectedBalanceSerializer(serializers.Serializer):
+    month = serializers.DateField(help_text="Last day of the month")
+    balance = MoneyField()
+    recurring = MoneyField(help_text="Recurring entries expected until then")
+    variable = MoneyField(help_text="Other entries expected until then")
+
+
+class ForecastSerializer(serializers.Serializer):
+    account = serializers.UUIDField(source="account.external_id")
+    balance = MoneyField()
+    recurring = RecurringEntrySerializer(many=True)
+    projection = ProjectedBalanceSerializer(many=True)
+
+
+class StatementImportSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(read_only=True, source="external_id")
+    account = serializers.SlugRelatedField(
+        slug_field="external_id",
+        queryset=Account.objects.all(),
+        help_text="Account the statement belongs to",
+    )
+    counter_account = serializers.SlugRelatedField(
+        slug_field="external_id",
+        queryset=Account.objects.all(),
+        help_text="Account to post the other side of every line to",
+    )
+    file = serializers.FileField(write_only=True)
+    file_format = serializers.ChoiceField(
+        choices=StatementImport.FileFormat.choices,
+        required=False,
+        help_text="Defaults to ofx for .ofx and .qfx files and csv otherwise",
+    )
+
+    class Meta:
+        model = StatementImport
+        fields = (
+            "id",
+            "account",
+            "counter_account",
+            "file",
+            "file_format",
+            "status",
+            "processed_rows",
+            "imported_rows",
+            "duplicate_rows",
+            "failed_rows",
+            "errors",
+            "created_at",
+            "finished_at",
+        )
+        read_only_fields = (
+            "status",
+            "processed_rows",
+            "imported_rows",
+            "duplicate_rows",
+            "failed_rows",
+            "errors",
+            "created_at",
+            "finished_at",
+        )
+
+    def validate(self, attrs):
+        user = self.context["request"].user
+        for field in ("account", "counter_account"):
+            if attrs[field].owner_id != user.pk:
+                raise serializers.ValidationError({field: "Account not found."})
+        if attrs["account"] == attrs["counter_account"]:
+            raise serializers.ValidationError(
+                {"counter_account": "Must differ from the statement account."}
+            )
+
+        if "file_format" not in attrs:
+            is_ofx = attrs["file"].name.lower().endswith((".ofx", ".qfx"))
+            attrs["file_format"] = (
+                StatementImport.FileFormat.OFX
+                if is_ofx
+                else StatementImport.FileFormat.CSV
+            )
+        return attrs
+
+
+def entries_prefetch():
+    return Prefetch(
+        "entries",
+        queryset=TransactionEntry.objects.select_related("account").order_by("id"),
+    )
@@ -0,0 +1,134 @@
+import operator
+from datetime import timedelta
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from ilgi.finance.models import Account, AccountBalanceSnapshot, TransactionEntry
+
+REBUILD_CHUNK_SIZE = 500
+
+
+def balance_as_of(account, on):
+    """
+    Return the balance of `account` at the end of `on`: the nearest snapshot
+    on or before it plus the entries after that snapshot, so the cost is
+    bounded by a month of entries rather than the whole history.
+    """
+
+    snapshot = (
+        AccountBalanceSnapshot.objects.filter(account=account, date__lte=on)
+        .order_by("-date")
+        .first()
+    )
+    entries = entries_of([account.pk]).filter(transaction__performed_on__lte=on)
+    balance = 0
+    if snapshot is not None:
+        entries = entries.filter(transaction__performed_on__gt=snapshot.date)
+        balance = snapshot.balance
+    return balance + (entries.aggregate(total=Sum("amount"))["total"] or 0)
+
+
+def invalidate_snapshots(account_ids, since):
+    """
+    Drop the snapshots a backdated entry on `since` makes stale, i.e. those
+    of the accounts on or after that date. Earlier ones stay valid.
+    """
+
+    AccountBalanceSnapshot.objects.filter(
+        account_id__in=account_ids, date__gte=since
+    ).delete()
+
+
+def rebuild_snapshots(account_ids=None, full=False):
+    """
+    Extend the snapshots of the given accounts (all by default) up to the
+    last completed month, starting from each account's latest snapshot, or
+    from scratch with `full`. Returns the number of snapshots created.
+    """
+
+    accounts = Account.objects.order_by("pk")
+    if account_ids is not None:
+        accounts = accounts.filter(pk__in=account_ids)
+    ids = list(accounts.values_list("pk", flat=True))
+
+    created = 0
+    for start in range(0, len(ids), REBUILD_CHUNK_SIZE):
+        created += _rebuild_chunk(ids[start : start + REBUILD_CHUNK_SIZE], full)
+    return created
+
+
+def entries_of(account_ids):
+    return TransactionEntry.objects.filter(
+        account_id__in=account_ids, transaction__deleted=False
+    )
+
+
+def month_end(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+def _rebuild_chunk(account_ids, full):
+    cutoff = timezone.localdate().replace(day=1) - timedelta(days=1)
+
+    with transaction.atomic():
+        # same lock order as posting, so a concurrent backdated posting
+        # can't invalidate snapshots while they are being computed
+        list(
+            Account.objects.select_for_update()
+            .filter(pk__in=account_ids)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+        snapshots = AccountBalanceSnapshot.objects.filter(account_id__in=account_ids)
+        if full:
+            snapshots.delete()
+            latest = {}
+        else:
+            latest_date = (
+                AccountBalanceSnapshot.objects.filter(account=OuterRef("account"))
+                .order_by("-date")
+                .values("date")[:1]
+            )
+            latest = {
+                snapshot.account_id: snapshot
+                for snapshot in snapshots.filter(date=Subquery(latest_date))
+            }
+
+        pending = reduce(
+            operator.or_,
+            [
+                Q(account_id=account_id, transaction__performed_on__gt=snapshot.date)
+                for account_id, snapshot in latest.items()
+            ]
+            + [Q(account_id__in=set(account_ids) - set(latest))],
+        )
+        months = (
+            entries_of(account_ids)
+            .filter(pending, transaction__performed_on__lte=cutoff)
+            .annotate(month=Trunc("transaction__performed_on", "month"))
+            .values("account_id", "month")
+            .annotate(total=Sum("amount"))
+            .order_by("account_id", "month")
+        )
+
+        balances = {
+            account_id: snapshot.balance for account_id, snapshot in latest.items()
+        }
+        created = []
+        for row in months:
+            account_id = row["account_id"]
+            balance = balances.get(account_id, 0) + row["total"]
+            balances[account_id] = balance
+            created.append(
+                AccountBalanceSnapshot(
+                    account_id=account_id, date=month_end(row["month"]), balance=balance
+                )
+            )
+        AccountBalanceSnapshot.objects.bulk_create(created)
+
+    return len(created)
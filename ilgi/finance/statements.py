@@ -0,0 +1,285 @@
+import csv
+import hashlib
+import io
+import logging
+import re
+from collections import OrderedDict
+from datetime import date, datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from ilgi.finance.cash_flow import add_cash_flows
+from ilgi.finance.forecast import invalidate_forecasts
+from ilgi.finance.models import StatementImport, Transaction, TransactionEntry
+from ilgi.finance.posting import apply_balance_deltas, lock_accounts
+from ilgi.finance.snapshots import invalidate_snapshots
+from utils.money import Money
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+# distinct lines whose occurrences are counted, the most recently seen ones
+OCCURRENCE_WINDOW = 10000
+
+CSV_COLUMNS = {
+    "date": ("date", "posted", "transaction date", "booking date"),
+    "amount": ("amount", "value"),
+    "description": ("description", "memo", "payee", "name", "details"),
+}
+
+
+class StatementLine:
+    __slots__ = ("date", "amount", "description", "fingerprint")
+
+    def __init__(self, date, amount, description):
+        self.date = date
+        self.amount = amount
+        self.description = description
+        self.fingerprint = None
+
+
+def parse_statement(file, file_format):
+    """
+    Iterate over the lines of a binary CSV or OFX statement as dicts with
+    the raw date, amount and description, reading the file incrementally.
+    """
+
+    if file_format == StatementImport.FileFormat.OFX:
+        yield from _parse_ofx(file)
+        return
+
+    reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for name in reader.fieldnames or ():
+            if name.strip().casefold() in aliases:
+                columns[field] = name
+                break
+    for row in reader:
+        yield {field: row.get(name) for field, name in columns.items()}
+
+
+def _parse_ofx(file):
+    line = None
+    for tag, value in _ofx_elements(file):
+        if tag == "STMTTRN":
+            line = {"date": None, "amount": None, "description": ""}
+        elif line is None:
+            continue
+        elif tag == "/STMTTRN":
+            yield line
+            line = None
+        elif tag == "DTPOSTED":
+            line["date"] = value[:8]
+        elif tag == "TRNAMT":
+            line["amount"] = value
+        elif tag in ("NAME", "MEMO") and value:
+            line["description"] = f"{line['description']} {value}".strip()
+
+
+def _ofx_elements(file):
+    # OFX 1.x is SGML where leaf elements usually aren't closed, so split the
+    # stream on "<" instead of using an XML parser; this handles OFX 2.x too
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace")
+    rest = ""
+    while chunk := text.read(64 * 1024):
+        *tokens, rest = (rest + chunk).split("<")
+        for token in tokens:
+            tag, _, value = token.partition(">")
+            yield tag.strip().upper(), value.strip()
+    tag, _, value = rest.partition(">")
+    yield tag.strip().upper(), value.strip()
+
+
+def clean_line(row):
+    """
+    Validate a parsed statement row, returning a StatementLine or raising
+    ValueError with a message to report.
+    """
+
+    raw_date = (row.get("date") or "").strip()
+    try:
+        if len(raw_date) == 8 and raw_date.isdigit():
+            on = datetime.strptime(raw_date, "%Y%m%d").date()
+        else:
+            on = date.fromisoformat(raw_date)
+    except ValueError:
+        raise ValueError(f"Invalid date: {raw_date!r}")
+
+    raw_amount = (row.get("amount") or "").strip()
+    amount = Money.parse(raw_amount).minor
+    if not amount:
+        raise ValueError(f"Invalid amount: {raw_amount!r}")
+
+    description = " ".join((row.get("description") or "").split())
+    if not description:
+        raise ValueError("Missing description")
+    return StatementLine(on, amount, description)
+
+
+def normalize_description(description):
+    return " ".join(re.sub(r"[^\w\s]", " ", description.casefold()).split())
+
+
+def fingerprint(line, occurrence):
+    """
+    Identify a statement line by its date, amount and normalized
+    description. `occurrence` numbers identical lines on the same date, so
+    two equal purchases on one day stay two entries while importing the
+    same statement twice still finds every line again.
+
+    Occurrences are counted for the OCCURRENCE_WINDOW distinct lines seen
+    most recently, so memory doesn't grow with the file. Identical lines
+    only need to be that close together, not in the same batch: in a
+    statement sorted by date they are at most a day's lines apart.
+    """
+
+    description = normalize_description(line.description)
+    key = f"{line.date}|{Money(line.amount)}|{description}|{occurrence}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def imported_fingerprints(account, fingerprints):
+    """
+    Return the fingerprints among `fingerprints` already imported into
+    `account`. The empty fingerprint is excluded explicitly so the query
+    matches the condition of the partial entry_fingerprint_idx.
+    """
+
+    return (
+        TransactionEntry.objects.filter(account=account, fingerprint__in=fingerprints)
+        .exclude(fingerprint="")
+        .values_list("fingerprint", flat=True)
+    )
+
+
+def run_statement_import(job, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import the statement of a StatementImport job.
+
+    Lines are read incrementally and posted in batches: per batch, one query
+    finds the lines already imported into the account (by fingerprint, see
+    entry_fingerprint_idx), then the remaining transactions and their entries
+    are inserted with `bulk_create` and the balances updated with one
+    UPDATE, under the same account locks as `post_transaction`. The job's
+    counters are saved after each batch so clients can poll it for progress.
+    """
+
+    job.status = StatementImport.Status.RUNNING
+    job.save(update_fields=["status", "updated_at"])
+
+    batch = []
+    occurrences = OrderedDict()
+    try:
+        with job.file.open("rb") as file:
+            for number, row in enumerate(parse_statement(file, job.file_format), 1):
+                job.processed_rows += 1
+                try:
+                    line = clean_line(row)
+                except ValueError as error:
+                    job.failed_rows += 1
+                    if len(job.errors) < MAX_REPORTED_ERRORS:
+                        job.errors.append({"row": number, "errors": str(error)})
+                    continue
+
+                key = (line.date, line.amount, normalize_description(line.description))
+                occurrence = occurrences.pop(key, 0) + 1
+                occurrences[key] = occurrence
+                if len(occurrences) > OCCURRENCE_WINDOW:
+                    occurrences.popitem(last=False)
+                line.fingerprint = fingerprint(line, occurrence)
+
+                batch.append(line)
+                if len(batch) >= batch_size:
+                    _post_batch(job, batch)
+                    batch = []
+        _post_batch(job, batch)
+    except Exception:
+        logger.exception("Statement import %s failed", job.external_id)
+        job.status = StatementImport.Status.FAILED
+    else:
+        job.status = StatementImport.Status.COMPLETED
+
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+
+def _post_batch(job, batch):
+    with transaction.atomic():
+        if batch:
+            accounts = lock_accounts(
+                job.created_by,
+                [job.account.external_id, job.counter_account.external_id],
+            )
+            account = accounts[job.account.external_id]
+            counter_account = accounts[job.counter_account.external_id]
+
+            existing = set(
+                imported_fingerprints(account, {line.fingerprint for line in batch})
+            )
+            lines = [line for line in batch if line.fingerprint not in existing]
+            job.duplicate_rows += len(batch) - len(lines)
+
+            if lines:
+                _insert_lines(job, account, counter_account, lines)
+                total = sum(line.amount for line in lines)
+                apply_balance_deltas({account.pk: total, counter_account.pk: -total})
+                add_cash_flows(
+                    item
+                    for line in lines
+                    for item in (
+                        (account.pk, line.date, line.amount),
+                        (counter_account.pk, line.date, -line.amount),
+                    )
+                )
+                invalidate_snapshots(
+                    [account.pk, counter_account.pk], min(line.date for line in lines)
+                )
+                invalidate_forecasts([account.pk, counter_account.pk])
+            job.imported_rows += len(lines)
+
+        job.save(
+            update_fields=[
+                "processed_rows",
+                "imported_rows",
+                "duplicate_rows",
+                "failed_rows",
+                "errors",
+                "updated_at",
+            ]
+        )
+
+
+def _insert_lines(job, account, counter_account, lines):
+    transactions = Transaction.objects.bulk_create(
+        (
+            Transaction(
+                name=line.description[:255],
+                description=line.description,
+                performed_on=line.date,
+                created_by_id=job.created_by_id,
+            )
+            for line in lines
+        ),
+        batch_size=IMPORT_BATCH_SIZE,
+    )
+    TransactionEntry.objects.bulk_create(
+        (
+            TransactionEntry(
+                transaction=txn,
+                account=entry_account,
+                amount=amount,
+                name=line.description[:255],
+                fingerprint=fingerprint,
+            )
+            for txn, line in zip(transactions, lines)
+            for entry_account, amount, fingerprint in (
+                (account, line.amount, line.fingerprint),
+                (counter_account, -line.amount, ""),
+            )
+        ),
+        batch_size=IMPORT_BATCH_SIZE,
+    )
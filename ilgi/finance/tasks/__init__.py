@@ -0,0 +1,9 @@
+from .reconciliation import reconcile_account_balances
+from .snapshots import rebuild_balance_snapshots
+from .statements import import_statement
+
+__all__ = [
+    "import_statement",
+    "reconcile_account_balances",
+    "rebuild_balance_snapshots",
+]
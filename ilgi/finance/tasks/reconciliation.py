@@ -0,0 +1,13 @@
+from celery import shared_task
+
+from ilgi.finance.reconciliation import reconcile_balances
+
+
+@shared_task
+def reconcile_account_balances(fix=False, full=False):
+    run = reconcile_balances(fix=fix, full=full)
+    return {
+        "accounts_checked": run.accounts_checked,
+        "accounts_per_second": run.accounts_per_second,
+        "mismatches": run.mismatches,
+    }
@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from ilgi.finance.snapshots import rebuild_snapshots
+
+
+@shared_task
+def rebuild_balance_snapshots(account_ids=None, full=False):
+    return rebuild_snapshots(account_ids, full=full)
@@ -0,0 +1,10 @@
+from celery import shared_task
+
+from ilgi.finance.models import StatementImport
+from ilgi.finance.statements import run_statement_import
+
+
+@shared_task
+def import_statement(job_id):
+    job = StatementImport.objects.get(pk=job_id)
+    run_statement_import(job)
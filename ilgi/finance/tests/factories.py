@@ -0,0 +1,36 @@
+from factory.django import DjangoModelFactory
+import factory
+
+from ilgi.finance.models import Account, Transaction, TransactionEntry
+from ilgi.users.tests.factories import UserFactory
+
+
+class AccountFactory(DjangoModelFactory):
+    class Meta:
+        model = Account
+
+    name = factory.Faker("word")
+    balance = 0
+    owner = factory.SubFactory(UserFactory)
+
+
+class TransactionFactory(DjangoModelFactory):
+    class Meta:
+        model = Transaction
+
+    name = factory.Faker("sentence", nb_words=3)
+    description = factory.Faker("paragraph")
+    performed_on = factory.Faker("date_object")
+    created_by = factory.SubFactory(UserFactory)
+
+
+class TransactionEntryFactory(DjangoModelFactory):
+    class Meta:
+        model = TransactionEntry
+
+    transaction = factory.SubFactory(TransactionFactory)
+    account = factory.SubFactory(
+        AccountFactory, owner=factory.SelfAttribute("..transaction.created_by")
+    )
+    amount = 1000
+    name = factory.Faker("word")
@@ -0,0 +1,262 @@
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Value
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from ilgi.finance.models import StatementImport, TransactionEntry
+from ilgi.finance.statements import run_statement_import
+from ilgi.finance.viewsets import TransactionViewSet
+from ilgi.users.tests.factories import UserFactory
+from utils.benchmark import benchmark, measure, report
+from utils.serializers import MoneyField
+from .factories import AccountFactory
+
+STATEMENT_ROWS = 100_000
+CASH_FLOW_YEARS = 10
+CASH_FLOW_PER_DAY = 12
+# seconds every report the endpoint accepts must answer within
+CASH_FLOW_BUDGET = 0.1
+MONEY_SERIALIZED_ROWS = 50_000
+
+
+@benchmark
+class BenchmarkStatementImport(TestCase):
+    """
+    Time a 100k line CSV statement import and its peak Python memory, then
+    the reimport of the same file, which only finds duplicates.
+    """
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = UserFactory()
+        self.bank = AccountFactory(owner=self.user)
+        self.other = AccountFactory(owner=self.user)
+
+        start = date(2000, 1, 1)
+        lines = [b"date,amount,description\n"]
+        for i in range(STATEMENT_ROWS):
+            on = start + timedelta(days=i // 20)
+            lines.append(
+                b"%s,%d.%02d,Payee %d\n"
+                % (on.isoformat().encode(), i % 500 - 250, i % 100, i % 37)
+            )
+        self.content = b"".join(lines)
+
+    def run_import(self, account, counter_account):
+        job = StatementImport.objects.create(
+            created_by=self.user,
+            account=account,
+            counter_account=counter_account,
+            file=SimpleUploadedFile("statement.csv", self.content),
+            file_format="csv",
+        )
+        start = time.perf_counter()
+        run_statement_import(job)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(job.status, StatementImport.Status.COMPLETED)
+        self.assertEqual(job.imported_rows + job.duplicate_rows, STATEMENT_ROWS)
+        return job, elapsed
+
+    def test_statement_import(self):
+        rows = []
+        for label in ("first import", "reimport"):
+            job, elapsed = self.run_import(self.bank, self.other)
+            rows.append(
+                (
+                    label,
+                    f"{elapsed:.1f} s, {STATEMENT_ROWS / elapsed:,.0f} lines/s, "
+                    f"{job.imported_rows} imported, {job.duplicate_rows} duplicates",
+                )
+            )
+
+        # traced separately as tracing slows allocations down
+        tracemalloc.start()
+        self.run_import(
+            AccountFactory(owner=self.user), AccountFactory(owner=self.user)
+        )
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows.append(("peak memory", f"{peak / 2**20:.1f} MiB"))
+
+        report(f"Statement import ({STATEMENT_ROWS:,} lines)", rows)
+
+
+@benchmark
+class BenchmarkCashFlow(TestCase):
+    """
+    Time the cash flow report endpoint per period for a user with ten years
+    of transactions over four accounts, imported as statements so the
+    monthly buckets are maintained the same way as in production.
+    """
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        throttles = patch.object(TransactionViewSet, "throttle_classes", ())
+        throttles.start()
+        self.addCleanup(throttles.stop)
+
+        self.user = UserFactory()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        accounts = [AccountFactory(owner=self.user) for _ in range(4)]
+
+        start = date.today() - timedelta(days=365 * CASH_FLOW_YEARS)
+        for account, counter_account in zip(accounts[::2], accounts[1::2]):
+            lines = [b"date,amount,description\n"]
+            for day in range(365 * CASH_FLOW_YEARS):
+                on = (start + timedelta(days=day)).isoformat().encode()
+                for i in range(CASH_FLOW_PER_DAY // 2):
+                    lines.append(b"%s,%d.%02d,Payee %d\n" % (on, i * 40 - 90, i, i))
+            job = StatementImport.objects.create(
+                created_by=self.user,
+                account=account,
+                counter_account=counter_account,
+                file=SimpleUploadedFile("statement.csv", b"".join(lines)),
+                file_format="csv",
+            )
+            run_statement_import(job)
+            self.assertEqual(job.status, StatementImport.Status.COMPLETED)
+
+    def test_cash_flow(self):
+        today = date.today()
+        rows = []
+        for label, query in (
+            ("month", "period=month"),
+            ("week, last year", "period=week"),
+            ("day, last year", "period=day"),
+            ("day, last 90 days", f"period=day&start={today - timedelta(90)}"),
+        ):
+            url = f"/api/transactions/cash-flow/?{query}"
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, 200)
+            buckets = len(resp.json())
+            elapsed = measure(lambda: self.client.get(url))
+            rows.append((label, f"{elapsed * 1000:.1f} ms, {buckets:,} rows"))
+            self.assertLess(elapsed, CASH_FLOW_BUDGET, label)
+
+        # the longest day and week reports are the default ones, of a year
+        resp = self.client.get(
+            f"/api/transactions/cash-flow/?period=day&start={today - timedelta(400)}"
+        )
+        self.assertEqual(resp.status_code, 400)
+
+        entries = CASH_FLOW_PER_DAY * 2 * 365 * CASH_FLOW_YEARS
+        report(f"Cash flow report ({CASH_FLOW_YEARS} years, {entries:,} entries)", rows)
+
+
+class IntAmountSerializer(serializers.Serializer):
+    amount = MoneyField()
+
+
+class DecimalAmountSerializer(serializers.Serializer):
+    amount = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+@benchmark
+class BenchmarkMoney(TestCase):
+    """
+    Compare integer minor unit amounts with Decimal ones over the entries of
+    a 100k line statement: loading, summing in Python and in the database,
+    and serializing. The Decimal side reads the amounts through a decimal
+    expression, which goes through the same driver conversion as the former
+    DecimalField columns.
+    """
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        user = UserFactory()
+        lines = [b"date,amount,description\n"]
+        for i in range(STATEMENT_ROWS):
+            on = date(2000, 1, 1) + timedelta(days=i // 20)
+            lines.append(
+                b"%s,%d.%02d,Payee %d\n"
+                % (on.isoformat().encode(), i % 500 - 250, i % 100, i)
+            )
+        job = StatementImport.objects.create(
+            created_by=user,
+            account=AccountFactory(owner=user),
+            counter_account=AccountFactory(owner=user),
+            file=SimpleUploadedFile("statement.csv", b"".join(lines)),
+            file_format="csv",
+        )
+        run_statement_import(job)
+        self.assertEqual(job.imported_rows, STATEMENT_ROWS)
+
+    def test_money(self):
+        decimal = DecimalField(max_digits=10, decimal_places=2)
+        total = DecimalField(max_digits=14, decimal_places=2)
+        as_decimal = ExpressionWrapper(F("amount") * Value(Decimal("0.01")), decimal)
+        entries = TransactionEntry.objects.all()
+        ints = list(entries.values_list("amount", flat=True))
+        decimals = list(
+            entries.annotate(decimal=as_decimal).values_list("decimal", flat=True)
+        )
+        self.assertEqual(sum(ints), 0)
+        self.assertEqual(sum(decimals), 0)
+
+        cases = (
+            (
+                "load amounts",
+                lambda: list(entries.values_list("amount", flat=True)),
+                lambda: list(
+                    entries.annotate(decimal=as_decimal).values_list(
+                        "decimal", flat=True
+                    )
+                ),
+            ),
+            ("sum in Python", lambda: sum(ints), lambda: sum(decimals)),
+            (
+                "SUM per account",
+                lambda: list(
+                    entries.values("account_id").annotate(total=Sum("amount"))
+                ),
+                lambda: list(
+                    entries.values("account_id").annotate(
+                        total=Sum(as_decimal, output_field=total)
+                    )
+                ),
+            ),
+            (
+                f"serialize {MONEY_SERIALIZED_ROWS // 1000}k",
+                lambda: IntAmountSerializer(
+                    [{"amount": v} for v in ints[:MONEY_SERIALIZED_ROWS]], many=True
+                ).data,
+                lambda: DecimalAmountSerializer(
+                    [{"amount": v} for v in decimals[:MONEY_SERIALIZED_ROWS]],
+                    many=True,
+                ).data,
+            ),
+        )
+        rows = []
+        for label, integer, decimal in cases:
+            int_time, decimal_time = measure(integer), measure(decimal)
+            rows.append(
+                (
+                    label,
+                    f"int {int_time * 1000:.1f} ms, Decimal {decimal_time * 1000:.1f} ms"
+                    f" ({decimal_time / int_time:.1f}x)",
+                )
+            )
+        report(f"Money amounts ({len(ints):,} entries)", rows)
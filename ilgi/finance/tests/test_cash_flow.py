@@ -0,0 +1,193 @@
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ilgi.finance.cash_flow import cash_flow_report, rebuild_cash_flows
+from ilgi.finance.models import MonthlyCashFlow
+from ilgi.finance.posting import post_transaction
+from ilgi.users.tests.factories import UserFactory
+from .factories import AccountFactory
+
+
+class TestCashFlow(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.bank = AccountFactory(owner=self.user)
+        self.food = AccountFactory(owner=self.user)
+
+    def post(self, on, amount, source=None, target=None):
+        source, target = source or self.bank, target or self.food
+        post_transaction(
+            self.user,
+            [
+                {"account": source.external_id, "amount": -amount, "name": "out"},
+                {"account": target.external_id, "amount": amount, "name": "in"},
+            ],
+            name="Transfer",
+            description="",
+            performed_on=on,
+        )
+
+    def test_periods(self):
+        """Test inflow, outflow and net per day, week and month"""
+
+        self.post(date(2024, 1, 1), 1000)
+        self.post(date(2024, 1, 3), 250, self.food, self.bank)
+        self.post(date(2024, 2, 10), 500)
+
+        month = cash_flow_report(self.user, "month", accounts=[self.bank.external_id])
+        self.assertEqual(
+            [(f["bucket"], f["inflow"], f["outflow"], f["net"]) for f in month],
+            [
+                (date(2024, 1, 1), 250, 1000, -750),
+                (date(2024, 2, 1), 0, 500, -500),
+            ],
+        )
+
+        week = cash_flow_report(self.user, "week", accounts=[self.bank.external_id])
+        # 2024-01-01 is a Monday, so the first two postings share a week
+        self.assertEqual(
+            [(f["bucket"], f["net"]) for f in week],
+            [
+                (date(2024, 1, 1), -750),
+                (date(2024, 2, 5), -500),
+            ],
+        )
+
+        day = cash_flow_report(
+            self.user, "day", start=date(2024, 1, 2), end=date(2024, 1, 31)
+        )
+        self.assertEqual(
+            [(f["account"], f["inflow"], f["outflow"]) for f in day],
+            sorted(
+                [
+                    (self.bank.external_id, 250, 0),
+                    (self.food.external_id, 0, 250),
+                ]
+            ),
+        )
+
+    def test_buckets_match_entries(self):
+        """Test that maintained monthly buckets match aggregating the entries"""
+
+        rng = random.Random(7)
+        accounts = [self.bank, self.food, AccountFactory(owner=self.user)]
+        for _ in range(150):
+            source, target = rng.sample(accounts, 2)
+            on = date(2020, 1, 1) + timedelta(days=rng.randrange(1500))
+            self.post(on, rng.randint(1, 100000), source, target)
+
+        expected = defaultdict(lambda: [0, 0])
+        for flow in cash_flow_report(self.user, "day"):
+            totals = expected[flow["account"], flow["bucket"].replace(day=1)]
+            totals[0] += flow["inflow"]
+            totals[1] += flow["outflow"]
+
+        def monthly():
+            return {
+                (flow["account"], flow["bucket"]): [flow["inflow"], flow["outflow"]]
+                for flow in cash_flow_report(self.user, "month")
+            }
+
+        self.assertEqual(monthly(), dict(expected))
+        rebuild_cash_flows()
+        self.assertEqual(monthly(), dict(expected))
+
+    def test_month_reads_buckets(self):
+        """Test that a monthly report is a single query over the buckets"""
+
+        for month in range(1, 13):
+            self.post(date(2023, month, 15), 100)
+        self.assertEqual(MonthlyCashFlow.objects.count(), 24)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(len(cash_flow_report(self.user, "month")), 24)
+
+    def test_api(self):
+        """Test the cash flow endpoint and that it only reports own accounts"""
+
+        self.post(date(2024, 3, 1), 400)
+        other = UserFactory()
+        AccountFactory(owner=other)
+
+        resp = self.client.get("/api/transactions/cash-flow/?period=month")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            resp.json(),
+            [
+                {
+                    "account": str(account.external_id),
+                    "bucket": "2024-03-01",
+                    "inflow": inflow,
+                    "outflow": outflow,
+                    "net": net,
+                }
+                for account, inflow, outflow, net in sorted(
+                    [
+                        (self.bank, 0.0, 4.0, -4.0),
+                        (self.food, 4.0, 0.0, 4.0),
+                    ],
+                    key=lambda row: row[0].external_id,
+                )
+            ],
+        )
+
+        resp = self.client.get(
+            "/api/transactions/cash-flow/?period=day&start=2024-01-01&end=2024-12-31"
+            f"&account={self.food.external_id}"
+        )
+        self.assertEqual([flow["net"] for flow in resp.json()], [4.0])
+
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get("/api/transactions/cash-flow/").json(), [])
+
+        resp = self.client.get("/api/transactions/cash-flow/?period=year")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_api_month_bounds(self):
+        """Test that monthly reports take whole months only"""
+
+        self.post(date(2024, 3, 10), 400)
+
+        resp = self.client.get(
+            "/api/transactions/cash-flow/?start=2024-03-01&end=2024-03-31"
+        )
+        self.assertEqual(len(resp.json()), 2)
+
+        for query, field in [
+            ("start=2024-03-15", "start"),
+            ("end=2024-03-15", "end"),
+            ("end=2024-02-28", "end"),
+        ]:
+            resp = self.client.get(f"/api/transactions/cash-flow/?{query}")
+            self.assertEqual(resp.status_code, 400)
+            self.assertIn(field, resp.json())
+
+        # leap day is the last of February
+        resp = self.client.get("/api/transactions/cash-flow/?end=2024-02-29")
+        self.assertEqual(resp.json(), [])
+
+    def test_api_day_and_week_bounds(self):
+        """Test that day and week reports cover at most a year, the last by default"""
+
+        today = timezone.localdate()
+        self.post(today, 100)
+        self.post(today - timedelta(days=400), 100)
+
+        for period in ("day", "week"):
+            resp = self.client.get(f"/api/transactions/cash-flow/?period={period}")
+            self.assertEqual(resp.status_code, 200)
+            # only the recent posting, of both accounts
+            self.assertEqual(len(resp.json()), 2)
+
+            resp = self.client.get(
+                f"/api/transactions/cash-flow/?period={period}"
+                f"&start={today - timedelta(days=367)}&end={today}"
+            )
+            self.assertEqual(resp.status_code, 400)
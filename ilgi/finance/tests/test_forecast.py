@@ -0,0 +1,153 @@
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from ilgi.finance.forecast import detect_recurring, forecast_balances
+from ilgi.finance.models import Account
+from ilgi.finance.posting import post_transaction
+from ilgi.users.tests.factories import UserFactory
+from .factories import AccountFactory
+
+TODAY = date(2024, 6, 10)
+
+
+class TestForecast(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = UserFactory()
+        self.bank = AccountFactory(owner=self.user)
+        self.employer = AccountFactory(owner=self.user)
+        self.shop = AccountFactory(owner=self.user)
+
+        self.groceries = 0
+        for month in range(1, 6):
+            self.post("Salary", self.employer, self.bank, 50000, date(2024, month, 1))
+            self.post("Streaming", self.bank, self.shop, 649, date(2024, month, 15))
+            for day in (5, 20):
+                amount = 1000 + month * 10 + day
+                self.post(
+                    "Groceries", self.bank, self.shop, amount, date(2024, month, day)
+                )
+                self.groceries += amount
+        self.post("Salary", self.employer, self.bank, 50000, date(2024, 6, 1))
+        self.post("Groceries", self.bank, self.shop, 2000, date(2024, 6, 5))
+        self.bank.refresh_from_db()
+
+    def post(self, name, source, target, amount, on):
+        post_transaction(
+            self.user,
+            [
+                {"account": source.external_id, "amount": -amount, "name": name},
+                {"account": target.external_id, "amount": amount, "name": name},
+            ],
+            name=name,
+            description="",
+            performed_on=on,
+        )
+
+    def test_detect_recurring(self):
+        """Test that monthly entries of the same name and amount are recurring"""
+
+        self.assertEqual(
+            [
+                (item["name"], item["amount"], item["day"], item["occurrences"])
+                for item in detect_recurring(self.bank, TODAY)
+            ],
+            [("Salary", 50000, 1, 6), ("Streaming", -649, 15, 5)],
+        )
+        # stopped more than a month ago
+        self.assertEqual(detect_recurring(self.bank, date(2024, 8, 1)), [])
+
+    def test_projection(self):
+        """Test the projected balances from recurring and average other entries"""
+
+        forecast = forecast_balances(self.bank, 3, today=TODAY)
+        self.assertEqual(forecast["balance"], self.bank.balance)
+        self.assertEqual(
+            [point["month"] for point in forecast["projection"]],
+            [date(2024, 7, 31), date(2024, 8, 31), date(2024, 9, 30)],
+        )
+
+        # streaming is still due this month, the salary came already
+        variable = -self.groceries / 5
+        for ahead, point in enumerate(forecast["projection"], 1):
+            recurring = -649 + ahead * (50000 - 649)
+            self.assertEqual(point["recurring"], recurring)
+            self.assertEqual(point["variable"], round(variable * (20 / 30 + ahead)))
+            self.assertEqual(
+                point["balance"], self.bank.balance + recurring + point["variable"]
+            )
+
+    def test_cache(self):
+        """Test that forecasts are cached until entries of the account change"""
+
+        first = forecast_balances(self.bank, 12, today=TODAY)
+        with self.assertNumQueries(0):
+            self.assertEqual(forecast_balances(self.bank, 12, today=TODAY), first)
+            self.assertEqual(
+                forecast_balances(self.bank, 2, today=TODAY)["projection"],
+                first["projection"][:2],
+            )
+
+        self.post("Salary", self.employer, self.bank, 50000, date(2024, 6, 9))
+        self.bank.refresh_from_db()
+        with self.assertNumQueries(2):
+            forecast = forecast_balances(self.bank, 12, today=TODAY)
+        self.assertEqual(forecast["balance"], first["balance"] + 50000)
+
+
+class TestForecastViewSet(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.bank = AccountFactory(owner=self.user)
+        employer = AccountFactory(owner=self.user)
+
+        today = timezone.localdate()
+        for months_ago in range(4):
+            on = (today.replace(day=1) - timedelta(days=months_ago * 28)).replace(day=1)
+            post_transaction(
+                self.user,
+                [
+                    {"account": employer.external_id, "amount": -50000, "name": "x"},
+                    {"account": self.bank.external_id, "amount": 50000, "name": "x"},
+                ],
+                name="Salary",
+                description="",
+                performed_on=on,
+            )
+
+    def test_forecast(self):
+        """Test the forecast endpoint"""
+
+        resp = self.client.get(
+            f"/api/transactions/forecast/?account={self.bank.external_id}&months=6"
+        )
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data["account"], str(self.bank.external_id))
+        self.assertEqual(data["balance"], 2000.0)
+        self.assertEqual(
+            [(item["name"], item["amount"]) for item in data["recurring"]],
+            [("Salary", 500.0)],
+        )
+        self.assertEqual(len(data["projection"]), 6)
+        self.assertEqual(data["projection"][-1]["recurring"], 3000.0)
+
+    def test_invalid(self):
+        """Test that only own accounts and valid horizons are forecast"""
+
+        other = AccountFactory()
+        resp = self.client.get(
+            f"/api/transactions/forecast/?account={other.external_id}"
+        )
+        self.assertEqual(resp.status_code, 404)
+
+        url = f"/api/transactions/forecast/?account={self.bank.external_id}&months=61"
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(Account.objects.count(), 3)
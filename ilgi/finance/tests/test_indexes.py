@@ -0,0 +1,43 @@
+from django.db.models import Sum
+from django.test import TestCase
+
+from ilgi.finance.models import Account, Transaction, TransactionEntry
+from ilgi.finance.statements import imported_fingerprints
+from utils.testing import QueryPlanMixin
+from .factories import TransactionEntryFactory
+
+
+class TestFinanceIndexes(QueryPlanMixin, TestCase):
+    def setUp(self):
+        self.entry = TransactionEntryFactory()
+        self.user = self.entry.transaction.created_by
+
+    def test_accounts(self):
+        """Test that a user's accounts are listed from the partial owner index"""
+
+        queryset = Account.objects.filter(owner=self.user).order_by("name", "id")
+        self.assertUsesIndex(queryset, "account_owner_name_idx")
+
+    def test_transactions(self):
+        """Test that a user's transactions are listed newest first by index"""
+
+        queryset = Transaction.objects.filter(created_by=self.user).order_by(
+            "-performed_on", "-id"
+        )
+        self.assertUsesIndex(queryset, "transaction_user_date_idx")
+
+    def test_account_balance(self):
+        """Test that summing an account's entries only reads the index"""
+
+        queryset = (
+            TransactionEntry.objects.filter(account=self.entry.account)
+            .values("account")
+            .annotate(balance=Sum("amount"))
+        )
+        self.assertUsesIndex(queryset, "entry_account_amount_idx")
+
+    def test_statement_duplicates(self):
+        """Test that imported statement lines are found by fingerprint index"""
+
+        queryset = imported_fingerprints(self.entry.account, ["a" * 40, "b" * 40])
+        self.assertUsesIndex(queryset, "entry_fingerprint_idx")
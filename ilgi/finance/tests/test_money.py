@@ -0,0 +1,76 @@
+from datetime import date
+
+from django.test import SimpleTestCase, override_settings
+from rest_framework.exceptions import ValidationError
+
+from ilgi.finance.statements import StatementLine, fingerprint
+from utils.money import MAX_MINOR, Money
+from utils.serializers import MoneyField
+
+
+class TestMoney(SimpleTestCase):
+    def test_parse(self):
+        """Test that decimal amounts parse to minor units of the currency"""
+
+        for value, minor in (
+            ("12.50", 1250),
+            ("-0.05", -5),
+            ("7", 700),
+            (12.5, 1250),
+            (0.1, 10),
+            (3, 300),
+        ):
+            self.assertEqual(Money.parse(value).minor, minor)
+        self.assertEqual(Money.parse("1.234", "KWD").minor, 1234)
+        self.assertEqual(Money.parse("500", "JPY").minor, 500)
+
+        for value in ("1.234", "abc", "", "NaN", "Infinity", None):
+            with self.assertRaises(ValueError):
+                Money.parse(value)
+        with self.assertRaises(ValueError):
+            Money.parse("1.5", "JPY")
+
+        self.assertEqual(Money.parse("9999999999999.99").minor, MAX_MINOR)
+        for value in ("1e30", "-10000000000000"):
+            with self.assertRaises(ValueError):
+                Money.parse(value)
+
+    def test_format(self):
+        """Test that amounts format with the currency's decimal places"""
+
+        self.assertEqual(str(Money(1250)), "12.50")
+        self.assertEqual(str(Money(-5)), "-0.05")
+        self.assertEqual(str(Money(-123456)), "-1234.56")
+        self.assertEqual(str(Money(1234, "KWD")), "1.234")
+        self.assertEqual(str(Money(500, "JPY")), "500")
+        self.assertEqual(float(Money(-1250)), -12.5)
+
+    @override_settings(CURRENCY="EUR")
+    def test_currencies(self):
+        """Test that amounts of different currencies don't mix"""
+
+        self.assertEqual(Money(100) + Money(50), Money(150))
+        self.assertLess(Money(-1), Money(0))
+        self.assertNotEqual(Money(100), Money(100, "USD"))
+        with self.assertRaises(ValueError):
+            Money(100) + Money(100, "USD")
+
+    def test_serializer_field(self):
+        """Test that the API reads and writes decimal amounts"""
+
+        field = MoneyField()
+        self.assertEqual(field.to_internal_value("-12.50"), -1250)
+        self.assertEqual(field.to_representation(-1250), -12.5)
+        for value in ("12.505", True, "12,50"):
+            with self.assertRaises(ValidationError):
+                field.to_internal_value(value)
+
+    def test_fingerprint(self):
+        """Test that statement fingerprints are those of the decimal amounts"""
+
+        line = StatementLine(date(2024, 1, 2), -1250, "Coffee")
+        # sha1 of "2024-01-02|-12.50|coffee|1", as before amounts were integers,
+        # so statements imported earlier are still recognized
+        self.assertEqual(
+            fingerprint(line, 1), "b9f347db6ce6b0f61a56dac68a71a7ed5d2014de"
+        )
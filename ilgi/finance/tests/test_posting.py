@@ -0,0 +1,410 @@
+import random
+import threading
+from datetime import date
+
+from django.db import connection
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from ilgi.finance.models import (
+    Account,
+    MonthlyCashFlow,
+    Transaction,
+    TransactionEntry,
+)
+from ilgi.finance.reconciliation import reconcile_balances
+from ilgi.finance.posting import post_transaction, update_transaction
+from ilgi.users.tests.factories import UserFactory
+from utils.money import Money
+from .factories import AccountFactory
+
+
+def entries(*pairs):
+    return [
+        {
+            "account": account.external_id,
+            "amount": Money.parse(amount).minor,
+            "name": "entry",
+        }
+        for account, amount in pairs
+    ]
+
+
+class TestPostTransaction(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.cash = AccountFactory(owner=self.user, balance=10000)
+        self.food = AccountFactory(owner=self.user)
+        self.rent = AccountFactory(owner=self.user)
+
+    def post(self, *pairs):
+        return post_transaction(
+            self.user,
+            entries(*pairs),
+            name="Groceries",
+            description="",
+            performed_on=date(2024, 1, 1),
+        )
+
+    def test_post(self):
+        """Test that posting creates the entries and applies the balances"""
+
+        txn, created = self.post((self.cash, "-30.00"), (self.food, "30.00"))
+
+        self.assertEqual(txn.entries.count(), 2)
+        self.assertEqual(len(created), 2)
+        self.cash.refresh_from_db()
+        self.food.refresh_from_db()
+        self.assertEqual(self.cash.balance, 7000)
+        self.assertEqual(self.food.balance, 3000)
+
+    def test_query_count(self):
+        """Test that posting takes the same queries regardless of entry count"""
+
+        def count(*pairs):
+            before = len(connection.queries)
+            self.post(*pairs)
+            return len(connection.queries) - before
+
+        with self.settings(DEBUG=True):
+            two = count((self.cash, "-30.00"), (self.food, "30.00"))
+            three = count(
+                (self.cash, "-50.00"), (self.food, "20.00"), (self.rent, "30.00")
+            )
+        self.assertEqual(two, three)
+
+    def test_unbalanced(self):
+        """Test that entries must sum to zero"""
+
+        with self.assertRaises(ValidationError):
+            self.post((self.cash, "-30.00"), (self.food, "20.00"))
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_single_entry(self):
+        """Test that a transaction needs at least two entries"""
+
+        with self.assertRaises(ValidationError):
+            self.post((self.cash, "0.00"))
+
+    def test_duplicate_account(self):
+        """Test that an account may only appear once per transaction"""
+
+        with self.assertRaises(ValidationError):
+            self.post((self.cash, "-30.00"), (self.cash, "30.00"))
+
+    def test_other_users_account(self):
+        """Test that only the user's own active accounts can be posted to"""
+
+        other = AccountFactory()
+        with self.assertRaises(ValidationError):
+            self.post((self.cash, "-30.00"), (other, "30.00"))
+
+        self.food.active = False
+        self.food.save()
+        with self.assertRaises(ValidationError):
+            self.post((self.cash, "-30.00"), (self.food, "30.00"))
+
+        self.cash.refresh_from_db()
+        self.assertEqual(self.cash.balance, 10000)
+
+
+class TestTransactionViewSet(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.cash = AccountFactory(owner=self.user)
+        self.food = AccountFactory(owner=self.user)
+
+    def payload(self, *amounts):
+        return {
+            "name": "Groceries",
+            "description": "Weekly shop",
+            "performed_on": "2024-01-01",
+            "entries": [
+                {"account": str(account.external_id), "amount": amount, "name": "x"}
+                for account, amount in zip((self.cash, self.food), amounts)
+            ],
+        }
+
+    def test_create(self):
+        """Test that a balanced transaction is posted"""
+
+        resp = self.client.post(
+            "/api/transactions/", self.payload("-12.50", "12.50"), format="json"
+        )
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(len(resp.json()["entries"]), 2)
+        self.assertEqual(
+            {entry["account"] for entry in resp.json()["entries"]},
+            {str(self.cash.external_id), str(self.food.external_id)},
+        )
+        self.food.refresh_from_db()
+        self.assertEqual(self.food.balance, 1250)
+
+        resp = self.client.get(f"/api/transactions/{resp.json()['id']}/")
+        self.assertEqual(resp.status_code, 200)
+
+    def test_create_unbalanced(self):
+        """Test that an unbalanced transaction is rejected"""
+
+        resp = self.client.post(
+            "/api/transactions/", self.payload("-12.50", "10.00"), format="json"
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("entries", resp.json())
+
+    def test_create_out_of_range(self):
+        """Test that amounts beyond the money columns are rejected"""
+
+        resp = self.client.post(
+            "/api/transactions/", self.payload("-1e30", "1e30"), format="json"
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("entries", resp.json())
+
+    def test_list_own(self):
+        """Test that users only list their own transactions"""
+
+        self.client.post(
+            "/api/transactions/", self.payload("-1.00", "1.00"), format="json"
+        )
+        self.assertEqual(
+            len(self.client.get("/api/transactions/").json()["results"]), 1
+        )
+
+        self.client.force_authenticate(user=UserFactory())
+        self.assertEqual(self.client.get("/api/transactions/").json()["results"], [])
+
+
+class TestUpdateTransaction(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.cash = AccountFactory(owner=self.user)
+        self.food = AccountFactory(owner=self.user)
+        self.rent = AccountFactory(owner=self.user)
+        self.txn, self.entries = post_transaction(
+            self.user,
+            entries((self.cash, "-30.00"), (self.food, "30.00")),
+            name="Groceries",
+            description="",
+            performed_on=date(2024, 1, 31),
+        )
+        self.url = f"/api/transactions/{self.txn.external_id}/"
+
+    def balances(self):
+        return {
+            account: Account.objects.get(pk=account.pk).balance
+            for account in (self.cash, self.food, self.rent)
+        }
+
+    def entry(self, account, amount):
+        return {"account": str(account.external_id), "amount": amount, "name": "x"}
+
+    def test_update_entries(self):
+        """Test that entries are updated, created and deleted with the balances"""
+
+        cash, food = self.entries
+        resp = self.client.patch(
+            self.url,
+            {
+                "entries": [
+                    self.entry(self.cash, "-50.00"),
+                    self.entry(self.rent, "40.00"),
+                    self.entry(self.food, "10.00"),
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            [entry["id"] for entry in resp.json()["entries"]][:2],
+            [str(cash.external_id), str(food.external_id)],
+        )
+        self.assertEqual(len(resp.json()["entries"]), 3)
+        self.assertEqual(
+            self.balances(),
+            {
+                self.cash: -5000,
+                self.food: 1000,
+                self.rent: 4000,
+            },
+        )
+
+        resp = self.client.patch(
+            self.url,
+            {
+                "entries": [
+                    self.entry(self.cash, "-5.00"),
+                    self.entry(self.food, "5.00"),
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.txn.entries.count(), 2)
+        self.assertEqual(TransactionEntry.all_objects.filter(deleted=True).count(), 1)
+
+        # the deleted entry is revived when its account is used again
+        resp = self.client.patch(
+            self.url,
+            {
+                "entries": [
+                    self.entry(self.cash, "-5.00"),
+                    self.entry(self.rent, "5.00"),
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            self.balances(),
+            {
+                self.cash: -500,
+                self.food: 0,
+                self.rent: 500,
+            },
+        )
+        self.assertEqual(reconcile_balances().mismatches, [])
+
+    def test_move_date(self):
+        """Test that changing the date moves the monthly cash flows"""
+
+        resp = self.client.patch(
+            self.url, {"performed_on": "2024-02-01"}, format="json"
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            {
+                (flow.bucket, flow.inflow, flow.outflow)
+                for flow in MonthlyCashFlow.objects.filter(account=self.food)
+            },
+            {
+                (date(2024, 1, 1), 0, 0),
+                (date(2024, 2, 1), 3000, 0),
+            },
+        )
+        self.assertEqual(self.balances()[self.food], 3000)
+
+    def test_invalid_update(self):
+        """Test that unbalanced, incomplete or unknown account entries are rejected"""
+
+        for payload in (
+            [self.entry(self.cash, "-5.00"), self.entry(self.food, "4.00")],
+            [self.entry(self.cash, "-5.00"), {"account": str(self.food.external_id)}],
+            [
+                self.entry(self.cash, "-5.00"),
+                self.entry(AccountFactory(), "5.00"),
+            ],
+        ):
+            resp = self.client.patch(self.url, {"entries": payload}, format="json")
+            self.assertEqual(resp.status_code, 400)
+            self.assertIn("entries", resp.json())
+        self.assertEqual(self.balances()[self.food], 3000)
+
+    def test_update_query_count(self):
+        """Test that updating takes the same queries regardless of entry count"""
+
+        def count(*pairs):
+            with self.settings(DEBUG=True):
+                before = len(connection.queries)
+                update_transaction(self.txn, entries(*pairs))
+                return len(connection.queries) - before
+
+        # both update the existing entries and create new ones
+        other, another = (
+            AccountFactory(owner=self.user),
+            AccountFactory(owner=self.user),
+        )
+        self.assertEqual(
+            count((self.cash, "-3.00"), (self.food, "1.00"), (self.rent, "2.00")),
+            count(
+                (self.cash, "-6.00"),
+                (self.food, "1.00"),
+                (self.rent, "2.00"),
+                (other, "1.00"),
+                (another, "2.00"),
+            ),
+        )
+
+
+class TestTransactionListQueries(TestCase):
+    def test_constant_queries(self):
+        """Test that listing takes the same queries whatever the page size"""
+
+        client = APIClient()
+        user = UserFactory()
+        client.force_authenticate(user=user)
+        accounts = [AccountFactory(owner=user) for _ in range(3)]
+        for day in range(1, 21):
+            post_transaction(
+                user,
+                entries(
+                    (accounts[0], "-3.00"), (accounts[1], "1.00"), (accounts[2], "2.00")
+                ),
+                name="Split",
+                description="",
+                performed_on=date(2024, 1, day),
+            )
+
+        # the page, then the entries with their accounts
+        for limit in (1, 5, 20):
+            with self.assertNumQueries(2):
+                resp = client.get(f"/api/transactions/?limit={limit}")
+            self.assertEqual(len(resp.json()["results"]), limit)
+            self.assertEqual(len(resp.json()["results"][-1]["entries"]), 3)
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class TestConcurrentPosting(TransactionTestCase):
+    threads = 8
+    postings = 25
+
+    def test_concurrent_postings(self):
+        """Test that parallel postings on shared accounts neither deadlock nor lose updates"""
+
+        user = UserFactory()
+        accounts = [AccountFactory(owner=user) for _ in range(4)]
+        errors = []
+
+        def worker(seed):
+            rng = random.Random(seed)
+            try:
+                for _ in range(self.postings):
+                    # random subsets in random order, so unordered locking
+                    # would deadlock
+                    picked = rng.sample(accounts, rng.randint(2, len(accounts)))
+                    amounts = [rng.randint(1, 100) for _ in picked[1:]]
+                    post_transaction(
+                        user,
+                        entries((picked[0], -sum(amounts)), *zip(picked[1:], amounts)),
+                        name="Transfer",
+                        description="",
+                        performed_on=date(2024, 1, 1),
+                    )
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=worker, args=(seed,))
+            for seed in range(self.threads)
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Transaction.objects.count(), self.threads * self.postings)
+        for account in Account.objects.all():
+            total = TransactionEntry.objects.filter(account=account).aggregate(
+                total=Sum("amount")
+            )["total"]
+            self.assertEqual(account.balance, total)
+        self.assertEqual(Account.objects.aggregate(total=Sum("balance"))["total"], 0)
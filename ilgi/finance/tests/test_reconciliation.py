@@ -0,0 +1,140 @@
+from datetime import date
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ilgi.finance.forecast import forecast_balances
+from ilgi.finance.models import Account, AccountBalanceSnapshot
+from ilgi.finance.posting import post_transaction
+from ilgi.finance.reconciliation import reconcile_balances
+from ilgi.finance.snapshots import rebuild_snapshots
+from ilgi.users.tests.factories import UserFactory
+from .factories import AccountFactory, TransactionEntryFactory
+
+
+class TestReconcileBalances(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.accounts = [AccountFactory(owner=self.user) for _ in range(4)]
+        for source, target in zip(self.accounts, self.accounts[1:]):
+            post_transaction(
+                self.user,
+                [
+                    {
+                        "account": source.external_id,
+                        "amount": -525,
+                        "name": "a",
+                    },
+                    {
+                        "account": target.external_id,
+                        "amount": 525,
+                        "name": "b",
+                    },
+                ],
+                name="Transfer",
+                description="",
+                performed_on=date(2024, 1, 1),
+            )
+
+    def test_consistent(self):
+        """Test that balances kept by posting reconcile cleanly"""
+
+        run = reconcile_balances(full=True)
+        self.assertEqual(run.accounts_checked, 4)
+        self.assertEqual(run.mismatches, [])
+        self.assertIsNotNone(run.finished_at)
+
+    def test_report_and_fix(self):
+        """Test that drift is reported, and corrected with fix"""
+
+        account = self.accounts[0]
+        Account.objects.filter(pk=account.pk).update(balance=9900)
+
+        run = reconcile_balances(full=True)
+        self.assertEqual(
+            run.mismatches,
+            [
+                {
+                    "account": str(account.external_id),
+                    "balance": "99.00",
+                    "expected": "-5.25",
+                }
+            ],
+        )
+        account.refresh_from_db()
+        self.assertEqual(account.balance, 9900)
+
+        reconcile_balances(fix=True, full=True)
+        account.refresh_from_db()
+        self.assertEqual(account.balance, -525)
+        self.assertEqual(reconcile_balances(full=True).mismatches, [])
+
+    def test_fix_invalidates(self):
+        """Test that a fix drops the forecasts and snapshots of the account"""
+
+        cache.clear()
+        account, other = self.accounts[0], self.accounts[1]
+        Account.objects.filter(pk=account.pk).update(balance=9900)
+        account.refresh_from_db()
+        rebuild_snapshots()
+        self.assertEqual(forecast_balances(account, 1)["balance"], 9900)
+        forecast_balances(other, 1)
+
+        reconcile_balances(fix=True, full=True)
+        account.refresh_from_db()
+        self.assertEqual(forecast_balances(account, 1)["balance"], -525)
+        self.assertFalse(AccountBalanceSnapshot.objects.filter(account=account))
+        self.assertTrue(AccountBalanceSnapshot.objects.filter(account=other))
+        with self.assertNumQueries(0):
+            forecast_balances(other, 1)
+
+    def test_incremental(self):
+        """Test that only accounts touched since the last run are checked"""
+
+        reconcile_balances()
+        self.assertEqual(reconcile_balances().accounts_checked, 0)
+
+        # an entry written around the posting path
+        entry = TransactionEntryFactory(account=self.accounts[2])
+        run = reconcile_balances()
+        self.assertEqual(run.accounts_checked, 1)
+        self.assertEqual(run.mismatches[0]["account"], str(entry.account.external_id))
+
+        account = self.accounts[3]
+        account.refresh_from_db()
+        account.name = "Renamed"
+        account.save()
+        run = reconcile_balances()
+        self.assertEqual(run.accounts_checked, 1)
+        self.assertEqual(run.mismatches, [])
+
+    def test_query_count(self):
+        """Test that a chunk takes the same queries regardless of its size"""
+
+        def count():
+            with CaptureQueriesContext(connection) as queries:
+                reconcile_balances(full=True)
+            return len(queries)
+
+        before = count()
+        for _ in range(10):
+            AccountFactory(owner=self.user)
+        self.assertEqual(count(), before)
+
+    def test_command(self):
+        """Test that the command reports throughput and fails on drift"""
+
+        out = StringIO()
+        call_command("reconcile_balances", "--full", stdout=out)
+        self.assertIn("Checked 4 accounts", out.getvalue())
+        self.assertIn("accounts/s", out.getvalue())
+
+        Account.objects.filter(pk=self.accounts[0].pk).update(balance=100)
+        with self.assertRaises(CommandError):
+            call_command("reconcile_balances", "--full", stdout=out, stderr=StringIO())
+        call_command("reconcile_balances", "--full", "--fix", stdout=out)
+        call_command("reconcile_balances", "--full", stdout=out)
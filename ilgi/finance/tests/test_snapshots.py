@@ -0,0 +1,148 @@
+import random
+from datetime import date, timedelta
+
+from django.test import TestCase
+
+from ilgi.finance.models import AccountBalanceSnapshot, TransactionEntry
+from ilgi.finance.posting import post_transaction
+from ilgi.finance.snapshots import balance_as_of
+from ilgi.finance.tasks import rebuild_balance_snapshots
+from ilgi.users.tests.factories import UserFactory
+from .factories import AccountFactory
+
+
+def full_recompute(account, on):
+    return sum(
+        TransactionEntry.objects.filter(
+            account=account,
+            transaction__deleted=False,
+            transaction__performed_on__lte=on,
+        ).values_list("amount", flat=True)
+    )
+
+
+class TestBalanceSnapshots(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.accounts = [AccountFactory(owner=self.user) for _ in range(3)]
+        self.rng = random.Random(42)
+
+    def post(self, on, source=None, target=None, amount=None):
+        source, target = source or self.accounts[0], target or self.accounts[1]
+        amount = amount or self.rng.randint(1, 10000)
+        post_transaction(
+            self.user,
+            [
+                {"account": source.external_id, "amount": -amount, "name": "out"},
+                {"account": target.external_id, "amount": amount, "name": "in"},
+            ],
+            name="Transfer",
+            description="",
+            performed_on=on,
+        )
+
+    def post_random(self, count, start=date(2023, 1, 1), days=540):
+        for _ in range(count):
+            source, target = self.rng.sample(self.accounts, 2)
+            on = start + timedelta(days=self.rng.randrange(days))
+            self.post(on, source, target)
+
+    def assertMatchesRecompute(self):
+        for account in self.accounts:
+            for on in [date(2022, 12, 31), date(2023, 1, 31), date(2023, 6, 15)] + [
+                date(2023, 1, 1) + timedelta(days=self.rng.randrange(600))
+                for _ in range(10)
+            ]:
+                self.assertEqual(
+                    balance_as_of(account, on),
+                    full_recompute(account, on),
+                    (account, on),
+                )
+
+    def test_as_of_matches_recompute(self):
+        """Test that as-of balances from snapshots match a full recompute"""
+
+        self.post_random(200)
+        created = rebuild_balance_snapshots()
+        self.assertGreater(created, 0)
+        self.assertMatchesRecompute()
+
+        self.assertEqual(
+            AccountBalanceSnapshot.objects.get(
+                account=self.accounts[0], date=date(2023, 3, 31)
+            ).balance,
+            full_recompute(self.accounts[0], date(2023, 3, 31)),
+        )
+
+    def test_as_of_queries(self):
+        """Test that an as-of balance reads one snapshot and one delta"""
+
+        self.post_random(50)
+        rebuild_balance_snapshots()
+        with self.assertNumQueries(2):
+            balance_as_of(self.accounts[0], date(2024, 1, 15))
+
+    def test_backdated_entry(self):
+        """Test that a backdated entry only drops the snapshots after it"""
+
+        self.post_random(100)
+        rebuild_balance_snapshots()
+        source, target, bystander = self.accounts
+        before = set(
+            AccountBalanceSnapshot.objects.filter(account=bystander).values_list(
+                "date", "balance"
+            )
+        )
+
+        self.post(date(2023, 4, 10), source, target)
+
+        for account in (source, target):
+            dates = AccountBalanceSnapshot.objects.filter(account=account).values_list(
+                "date", flat=True
+            )
+            self.assertTrue(dates)
+            self.assertTrue(all(d < date(2023, 4, 10) for d in dates))
+        self.assertEqual(
+            set(
+                AccountBalanceSnapshot.objects.filter(account=bystander).values_list(
+                    "date", "balance"
+                )
+            ),
+            before,
+        )
+        self.assertMatchesRecompute()
+
+        # an incremental rebuild restores the dropped snapshots
+        self.assertGreater(rebuild_balance_snapshots(), 0)
+        self.assertMatchesRecompute()
+        incremental = list(
+            AccountBalanceSnapshot.objects.order_by("account", "date").values_list(
+                "account", "date", "balance"
+            )
+        )
+        rebuild_balance_snapshots(full=True)
+        self.assertEqual(
+            list(
+                AccountBalanceSnapshot.objects.order_by("account", "date").values_list(
+                    "account", "date", "balance"
+                )
+            ),
+            incremental,
+        )
+
+    def test_incremental_rebuild(self):
+        """Test that a rebuild only adds snapshots after the latest one"""
+
+        self.post_random(50)
+        rebuild_balance_snapshots()
+        self.assertEqual(rebuild_balance_snapshots(), 0)
+
+        self.post(date(2025, 6, 1))
+        self.assertEqual(rebuild_balance_snapshots(), 2)
+        self.assertMatchesRecompute()
+
+    def test_current_month_not_snapshotted(self):
+        """Test that snapshots stop at the last completed month"""
+
+        self.post(date.today())
+        self.assertEqual(rebuild_balance_snapshots(), 0)
@@ -0,0 +1,221 @@
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ilgi.finance.models import StatementImport, Transaction, TransactionEntry
+from ilgi.finance.statements import parse_statement, run_statement_import
+from ilgi.finance.tasks import import_statement
+from ilgi.finance.viewsets import StatementImportViewSet
+from ilgi.users.tests.factories import UserFactory
+from .factories import AccountFactory
+
+CSV = b"""Date,Description,Amount
+2024-01-02,Coffee  Shop,-3.50
+2024-01-02,Coffee shop!,-3.50
+2024-01-03,Salary,2500.00
+2024-01-04,Bad amount,abc
+"""
+
+OFX = b"""OFXHEADER:100
+DATA:OFXSGML
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240105120000[0:GMT]
+<TRNAMT>-42.10
+<FITID>1
+<NAME>Grocer
+<MEMO>Card 1234
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240106<TRNAMT>10.00<FITID>2<NAME>Refund</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+class TestParseStatement(TestCase):
+    def test_csv(self):
+        """Test that CSV columns are matched case-insensitively by name"""
+
+        rows = list(parse_statement(BytesIO(CSV), "csv"))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            rows[0],
+            {"date": "2024-01-02", "amount": "-3.50", "description": "Coffee  Shop"},
+        )
+
+    def test_ofx(self):
+        """Test that SGML OFX transactions are parsed, on one line or many"""
+
+        rows = list(parse_statement(BytesIO(OFX), "ofx"))
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "date": "20240105",
+                    "amount": "-42.10",
+                    "description": "Grocer Card 1234",
+                },
+                {"date": "20240106", "amount": "10.00", "description": "Refund"},
+            ],
+        )
+
+
+class TestStatementImport(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.bank = AccountFactory(owner=self.user)
+        self.other = AccountFactory(owner=self.user)
+
+    def upload(self, name, content, **data):
+        return self.client.post(
+            "/api/statement-imports/",
+            {
+                "file": SimpleUploadedFile(name, content),
+                "account": str(self.bank.external_id),
+                "counter_account": str(self.other.external_id),
+                **data,
+            },
+            format="multipart",
+        )
+
+    def test_csv(self):
+        """Test that statement lines are posted against both accounts"""
+
+        resp = self.upload("statement.csv", CSV)
+        self.assertEqual(resp.status_code, 201)
+        data = resp.json()
+        self.assertEqual(data["status"], "completed")
+        self.assertEqual(
+            (data["imported_rows"], data["duplicate_rows"], data["failed_rows"]),
+            (3, 0, 1),
+        )
+        self.assertEqual(
+            data["errors"], [{"row": 4, "errors": "Invalid amount: 'abc'"}]
+        )
+
+        self.bank.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.bank.balance, 249300)
+        self.assertEqual(self.other.balance, -249300)
+        self.assertEqual(Transaction.objects.filter(created_by=self.user).count(), 3)
+
+    def test_duplicates(self):
+        """Test that reimporting a statement skips the lines already posted"""
+
+        self.upload("statement.csv", CSV)
+        data = self.upload("statement.csv", CSV).json()
+        self.assertEqual((data["imported_rows"], data["duplicate_rows"]), (0, 3))
+
+        # an overlapping statement with one more identical purchase
+        data = self.upload(
+            "statement.csv",
+            b"date,amount,description\n"
+            b"2024-01-02,-3.50,coffee shop\n"
+            b"2024-01-02,-3.50,COFFEE SHOP\n"
+            b"2024-01-02,-3.50,Coffee-Shop\n"
+            b"2024-01-03,2500.00,Salary\n"
+            b"2024-01-05,1.00,New\n",
+        ).json()
+        self.assertEqual((data["imported_rows"], data["duplicate_rows"]), (2, 3))
+
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.balance, 249050)
+
+    def test_ofx(self):
+        """Test that OFX files are detected by extension and imported"""
+
+        data = self.upload("statement.ofx", OFX).json()
+        self.assertEqual(data["file_format"], "ofx")
+        self.assertEqual(data["imported_rows"], 2)
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.balance, -3210)
+
+    def test_batches(self):
+        """Test that each batch takes the same number of queries"""
+
+        job = StatementImport.objects.create(
+            created_by=self.user,
+            account=self.bank,
+            counter_account=self.other,
+            file=SimpleUploadedFile(
+                "s.csv",
+                b"date,amount,description\n"
+                + b"".join(
+                    b"2024-02-%02d,1.00,Line %d\n" % (i % 28 + 1, i) for i in range(40)
+                ),
+            ),
+            file_format="csv",
+        )
+        # per batch: savepoint, lock, duplicate lookup, two inserts, balance
+        # update, reading and upserting the cash flows, snapshot
+        # invalidation, progress and release; plus the job status updates and
+        # the final (empty) batch's progress
+        with self.assertNumQueries(10 * 11 + 2 + 3):
+            run_statement_import(job, batch_size=4)
+        self.assertEqual(job.imported_rows, 40)
+        self.assertEqual(TransactionEntry.objects.filter(account=self.bank).count(), 40)
+
+    @patch("ilgi.finance.statements.OCCURRENCE_WINDOW", 2)
+    def test_unsorted_batches(self):
+        """Test that identical lines of an unsorted file count across batches"""
+
+        content = (
+            b"date,amount,description\n"
+            b"2024-01-01,-3.50,Coffee\n"
+            b"2024-01-02,-12.00,Lunch\n"
+            b"2024-01-01,-3.50,Coffee\n"
+        )
+        for batch_size in (2, 10):
+            job = StatementImport.objects.create(
+                created_by=self.user,
+                account=self.bank,
+                counter_account=self.other,
+                file=SimpleUploadedFile("s.csv", content),
+                file_format="csv",
+            )
+            run_statement_import(job, batch_size=batch_size)
+            # the second import finds all three lines again
+            imported = 3 if batch_size == 2 else 0
+            self.assertEqual(
+                (job.imported_rows, job.duplicate_rows), (imported, 3 - imported)
+            )
+
+        self.bank.refresh_from_db()
+        self.assertEqual(self.bank.balance, -1900)
+
+    def test_other_users_account(self):
+        """Test that statements can only be imported into own accounts"""
+
+        resp = self.upload(
+            "statement.csv", CSV, counter_account=str(AccountFactory().external_id)
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("counter_account", resp.json())
+
+    @patch.object(StatementImportViewSet, "inline_max_size", 0)
+    def test_deferred_to_celery(self):
+        """Test that large files are imported by the Celery task"""
+
+        with patch.object(import_statement, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.upload("statement.csv", CSV)
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(resp.json()["status"], "pending")
+
+        job_id = delay.call_args.args[0]
+        import_statement(job_id)
+        resp = self.client.get(f"/api/statement-imports/{resp.json()['id']}/")
+        self.assertEqual(resp.json()["status"], "completed")
+        self.assertEqual(resp.json()["imported_rows"], 3)
@@ -0,0 +1,136 @@
+from django.db import transaction
+from drf_spectacular.utils import extend_schema
+from rest_framework import mixins, status
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from ilgi.finance.cash_flow import cash_flow_report
+from ilgi.finance.forecast import forecast_balances
+from ilgi.finance.models import Account, StatementImport, Transaction
+from ilgi.finance.serializers import (
+    CashFlowQuerySerializer,
+    CashFlowSerializer,
+    ForecastQuerySerializer,
+    ForecastSerializer,
+    StatementImportSerializer,
+    TransactionSerializer,
+    entries_prefetch,
+)
+from ilgi.finance.statements import run_statement_import
+from ilgi.finance.tasks import import_statement
+from utils.pagination import KeysetPagination
+
+
+class TransactionPagination(KeysetPagination):
+    ordering = ("-performed_on", "-id")
+
+
+class TransactionViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    mixins.UpdateModelMixin,
+    GenericViewSet,
+):
+    """
+    Transactions are posted and updated with all of their entries at once,
+    through the posting service, which keeps account balances consistent
+    with the entries.
+
+    Entries and their accounts are prefetched in two queries per page, so
+    listing takes the same number of queries whatever the page size.
+    """
+
+    serializer_class = TransactionSerializer
+    queryset = Transaction.objects.prefetch_related(entries_prefetch())
+    lookup_field = "external_id"
+    permission_classes = (IsAuthenticated,)
+    pagination_class = TransactionPagination
+
+    def get_queryset(self):
+        return super().get_queryset().filter(created_by=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    @extend_schema(
+        summary="Cash flow",
+        description="Per account and period inflow, outflow and net of the entries",
+        parameters=[CashFlowQuerySerializer],
+        responses={200: CashFlowSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"], url_path="cash-flow", pagination_class=None)
+    def cash_flow(self, request):
+        query = CashFlowQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        flows = cash_flow_report(
+            request.user,
+            params["period"],
+            start=params.get("start"),
+            end=params.get("end"),
+            accounts=params.get("account"),
+        )
+        return Response(CashFlowSerializer(flows, many=True).data)
+
+    @extend_schema(
+        summary="Balance forecast",
+        description="Recurring entries of an account and its projected month-end "
+        "balances",
+        parameters=[ForecastQuerySerializer],
+        responses={200: ForecastSerializer},
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def forecast(self, request):
+        query = ForecastQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        account = get_object_or_404(
+            Account, owner=request.user, external_id=params["account"]
+        )
+        forecast = forecast_balances(account, params["months"])
+        return Response(ForecastSerializer({"account": account, **forecast}).data)
+
+
+class StatementImportViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    GenericViewSet,
+):
+    """
+    Upload CSV or OFX bank statements and poll the resulting jobs.
+
+    Small files are imported within the request; larger ones are handed to
+    a Celery task and the job is returned right away with status 202.
+    """
+
+    serializer_class = StatementImportSerializer
+    queryset = StatementImport.objects.select_related("account", "counter_account")
+    lookup_field = "external_id"
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (MultiPartParser,)
+    inline_max_size = 256 * 1024
+
+    def get_queryset(self):
+        return super().get_queryset().filter(created_by=self.request.user)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(created_by=request.user)
+
+        if job.file.size <= self.inline_max_size:
+            run_statement_import(job)
+            return Response(
+                self.get_serializer(job).data, status=status.HTTP_201_CREATED
+            )
+
+        transaction.on_commit(lambda: import_statement.delay(job.pk))
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class UsersConfig(AppConfig):
     name = "ilgi.users"
+
+    def ready(self):
+        from ilgi.users import signals  # noqa: F401
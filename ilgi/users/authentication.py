@@ -0,0 +1,40 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from ilgi.users.cache import TOKEN_VERSION_CLAIM, get_cached_user
+
+
+def get_token_user(validated_token):
+    """
+    Return the active user of a token, raising AuthenticationFailed if the
+    user doesn't exist or is inactive or the token was issued before their
+    token version was bumped. Tokens issued without the claim are version 0.
+    """
+
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    token_version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+    user = get_cached_user(user_id, token_version)
+    if user is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    if not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    if user.token_version != token_version:
+        raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves users through `ilgi.users.cache`
+    rather than a query per request, and rejects the tokens revoked by a
+    password change.
+    """
+
+    def get_user(self, validated_token):
+        return get_token_user(validated_token)
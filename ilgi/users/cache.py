@@ -0,0 +1,85 @@
+"""
+Cache of the users that authenticated requests resolve to, so resolving
+the user of a JWT doesn't query the database.
+
+Users are looked up in the two-tier cache (utils.cache), the LRU of the
+process and then the shared cache, and only then in the database.
+Entries are keyed by user id and hold the user's token version along with
+their fields, except for the password hash, which is loaded on access. The
+fields are stored by name, and an entry that doesn't have exactly the
+fields of the model, as when a deploy adds or removes one, is reloaded.
+
+A token carries the token version of its user at the time it was issued
+and is only good for that version; changing the password bumps it. An entry
+with a newer version than the token's answers without the database (the
+token is revoked), an older one is reloaded.
+
+Saving a user, deleting them or changing their groups or permissions drops
+their entries (`invalidate_cached_user`); the LRU entries of other
+processes only live for AUTH_USER_LOCAL_CACHE_TIMEOUT seconds, the longest a
+change takes to apply everywhere.
+
+Queryset updates and deletes (`User.objects.filter(...).update(...)`) don't
+save or send signals, so they don't drop any entries: call
+`invalidate_cached_user` for each of the users, or the change, say
+deactivating them, only applies once their entries expire.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+
+from utils.cache import TwoTierCache
+
+TOKEN_VERSION_CLAIM = "token_version"
+
+user_cache = TwoTierCache(
+    "auth-user",
+    timeout=settings.AUTH_USER_CACHE_TIMEOUT,
+    local_size=settings.AUTH_USER_LOCAL_CACHE_SIZE,
+    local_timeout=settings.AUTH_USER_LOCAL_CACHE_TIMEOUT,
+)
+
+
+def _user_fields():
+    User = get_user_model()
+    return [
+        field.attname
+        for field in User._meta.concrete_fields
+        if field.attname != "password"
+    ]
+
+
+def get_cached_user(user_id, token_version):
+    """
+    Return the user with the id `user_id`, as of `token_version` or later,
+    or None if there is no such user. Only queries the database when the
+    cache doesn't have the user at that version.
+
+    The user is a fresh instance on every call, so requests can't see each
+    other's changes to it.
+    """
+
+    User = get_user_model()
+    fields = _user_fields()
+
+    values = user_cache.get(user_id)
+    if (
+        values is None
+        or values.keys() != set(fields)
+        or values["token_version"] < token_version
+    ):
+        values = User._default_manager.filter(pk=user_id).values(*fields).first()
+        if values is None:
+            return None
+        user_cache.set(user_id, values)
+    return User.from_db(DEFAULT_DB_ALIAS, fields, [values[field] for field in fields])
+
+
+def invalidate_cached_user(user_id):
+    """
+    Drop the cached user, right away and again on commit. Call whenever the
+    user or their groups or permissions change.
+    """
+
+    user_cache.delete(user_id)
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="token_version",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Tokens issued for an older version are revoked",
+                verbose_name="Token version",
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.2 on 2026-10-18 13:18
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def normalize_emails(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    conflicts = list(
+        User.objects.values(normalized=Lower("email"))
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .values_list("normalized", flat=True)
+    )
+    if conflicts:
+        raise RuntimeError(
+            "Users whose emails only differ in case must be merged or changed "
+            f"first: {', '.join(sorted(conflicts))}"
+        )
+    User.objects.exclude(email=Lower("email")).update(email=Lower("email"))
+
+
+class Migration(migrations.Migration):
+    """
+    Lowercase the existing emails, as the manager does for new users, and
+    add the unique index on LOWER(email) that email lookups use. Emails that
+    only differ in case can't both stay, so those fail the migration.
+    """
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0002_user_token_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Lower("email"),
+                name="user_email_lower_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-18 14:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0003_user_email_lower_uniq"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                help_text="Date and time when the user was last changed",
+                null=True,
+                verbose_name="Updated on",
+            ),
+        ),
+    ]
@@ -2,8 +2,12 @@ from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils.timezone import now
 
+from ilgi.users.cache import invalidate_cached_user
+from utils.response_cache import invalidate_user_responses
+
 
 class UserManager(BaseUserManager):
     @classmethod
@@ -12,11 +16,17 @@ class UserManager(BaseUserManager):
         return email.lower()
 
     def get_by_natural_key(self, email):
-        """Ignore case for purposes of determining uniqueness"""
-        return self.get(email__iexact=email)
+        """
+        Ignore case for purposes of determining uniqueness. Compared as
+        LOWER(email) rather than with iexact, so that the lookup uses the
+        user_email_lower_uniq index.
+        """
+        return self.alias(email_lower=Lower("email")).get(
+            email_lower=self.normalize_email(email)
+        )
 
     def create_user(self, email, password=None, name=None):
-        user = self.create(email=email)
+        user = self.create(email=self.normalize_email(email))
         if password:
             user.set_password(password)
         if name:
@@ -25,7 +35,9 @@ class UserManager(BaseUserManager):
         return user
 
     def create_superuser(self, email, password, name=None):
-        user = self.create(email=email, is_superuser=True, is_staff=True)
+        user = self.create(
+            email=self.normalize_email(email), is_superuser=True, is_staff=True
+        )
         user.set_password(password)
         if name:
             user.name = name
@@ -47,6 +59,13 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name="Joined on",
         help_text="Date and time when the user was created",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        null=True,
+        blank=True,
+        verbose_name="Updated on",
+        help_text="Date and time when the user was last changed",
+    )
     email = models.EmailField(
         max_length=255,
         unique=True,
@@ -68,12 +87,36 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name="Name",
         help_text="User's full name",
     )
+    token_version = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Token version",
+        help_text="Tokens issued for an older version are revoked",
+    )
 
     objects = UserManager()
 
+    class Meta:
+        constraints = [
+            # case-insensitive uniqueness, and the index of email lookups
+            models.UniqueConstraint(Lower("email"), name="user_email_lower_uniq"),
+        ]
+
     def __str__(self):
         return str(self.name)
 
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        # revokes the tokens issued so far, see ilgi.users.cache
+        self.token_version += 1
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is not None:
+            # saving some fields, such as last_login on login, changes the user too
+            update_fields = {*update_fields, "updated_at"}
+        super().save(*args, update_fields=update_fields, **kwargs)
+        invalidate_user_responses(self.pk)
+        invalidate_cached_user(self.pk)
+
     def clean(self):
         super().clean()
         self.email = User.objects.normalize_email(self.email)
@@ -1,5 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt import serializers as jwt_serializers
+
+from .authentication import get_token_user
+from .cache import TOKEN_VERSION_CLAIM
 
 User = get_user_model()
 
@@ -8,3 +12,18 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'email', 'name', 'date_joined', 'last_login']
         read_only_fields = fields
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    def validate(self, attrs):
+        # no new access tokens for revoked refresh tokens or inactive users
+        get_token_user(self.token_class(attrs["refresh"]))
+        return super().validate(attrs)
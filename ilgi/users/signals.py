@@ -0,0 +1,29 @@
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+
+from ilgi.users.cache import invalidate_cached_user
+from ilgi.users.models import User
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            invalidate_cached_user(instance.pk)
+    elif action in ("post_add", "post_remove"):
+        # changed from the group's or permission's side
+        for user_id in pk_set:
+            invalidate_cached_user(user_id)
+    elif action == "pre_clear":
+        # the users are only known before they're cleared; invalidating
+        # drops the entries again on commit anyway
+        field = "group" if sender is User.groups.through else "permission"
+        users = sender.objects.filter(**{field: instance})
+        for user_id in users.values_list("user_id", flat=True):
+            invalidate_cached_user(user_id)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
@@ -0,0 +1,148 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ilgi.users import cache as user_cache
+from utils.cache import clear_local_caches
+from utils.testing import fake_redis
+from .factories import UserFactory
+
+
+@fake_redis()
+class TestCachedJWTAuthentication(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.addCleanup(clear_local_caches)
+        self.user = UserFactory.with_password("secret123")
+        self.client = APIClient()
+
+    def login(self, password="secret123"):
+        resp = self.client.post(
+            "/api/auth/token/", {"email": self.user.email, "password": password}
+        )
+        self.assertEqual(resp.status_code, 200)
+        return resp.json()
+
+    def get_me(self, access):
+        return self.client.get("/api/auth/me/", HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_cached_user_needs_no_query(self):
+        """Test that once cached, authenticating a request doesn't query"""
+
+        access = self.login()["access"]
+        self.assertEqual(self.get_me(access).status_code, 200)
+
+        with self.assertNumQueries(0):
+            resp = self.get_me(access)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["email"], self.user.email)
+
+    def test_shared_cache_serves_other_processes(self):
+        """Test that a process with an empty LRU reads the shared cache"""
+
+        access = self.login()["access"]
+        self.get_me(access)
+        clear_local_caches()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_me(access).status_code, 200)
+
+    def test_password_change_revokes_tokens(self):
+        """Test that changing the password revokes access and refresh tokens"""
+
+        tokens = self.login()
+        self.get_me(tokens["access"])
+
+        self.user.set_password("changed456")
+        self.user.save()
+        self.assertEqual(self.get_me(tokens["access"]).status_code, 401)
+        resp = self.client.post(
+            "/api/auth/token/refresh/", {"refresh": tokens["refresh"]}
+        )
+        self.assertEqual(resp.status_code, 401)
+
+        access = self.login("changed456")["access"]
+        self.assertEqual(self.get_me(access).status_code, 200)
+
+    def test_revoked_token_needs_no_query(self):
+        """Test that a token older than the cached user is rejected from cache"""
+
+        access = self.login()["access"]
+        self.user.set_password("changed456")
+        self.user.save()
+        self.get_me(self.login("changed456")["access"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_me(access).status_code, 401)
+
+    def test_deactivation(self):
+        """Test that deactivating a user rejects their cached tokens"""
+
+        access = self.login()["access"]
+        self.get_me(access)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_me(access).status_code, 401)
+
+    def test_permission_changes_invalidate(self):
+        """Test that group and permission changes drop the cached user"""
+
+        access = self.login()["access"]
+        group = Group.objects.create(name="Auditors")
+        permission = Permission.objects.first()
+
+        for change in (
+            lambda: self.user.groups.add(group),
+            lambda: group.user_set.remove(self.user),
+            lambda: self.user.user_permissions.add(permission),
+            lambda: permission.user_set.clear(),
+        ):
+            self.get_me(access)
+            with self.assertNumQueries(0):
+                self.get_me(access)
+            change()
+            with self.assertNumQueries(1):
+                self.get_me(access)
+
+    def test_tokens_without_version(self):
+        """Test that tokens issued before versions were added are version 0"""
+
+        user = UserFactory()
+        token = AccessToken.for_user(user)
+        self.assertEqual(self.get_me(str(token)).status_code, 200)
+
+        user.set_password("changed456")
+        user.save()
+        self.assertEqual(self.get_me(str(token)).status_code, 401)
+
+    def test_deleted_user(self):
+        """Test that deleting a user rejects their cached tokens"""
+
+        access = self.login()["access"]
+        self.get_me(access)
+
+        self.user.delete()
+        self.assertEqual(self.get_me(access).status_code, 401)
+
+    def test_entries_of_other_fields_reload(self):
+        """Test that entries cached with other fields, as before a deploy, reload"""
+
+        access = self.login()["access"]
+        # as cached by a version of the model without the name, in reverse order
+        fields = user_cache._user_fields()
+        older = [field for field in reversed(fields) if field != "name"]
+        with patch.object(user_cache, "_user_fields", return_value=older):
+            self.get_me(access)
+
+        with self.assertNumQueries(1):
+            resp = self.get_me(access)
+        self.assertEqual(resp.json()["name"], self.user.name)
+        self.assertEqual(resp.json()["email"], self.user.email)
+        with self.assertNumQueries(0):
+            self.get_me(access)
@@ -0,0 +1,156 @@
+import copy
+import time
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import throttling
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from ilgi.users.authentication import CachedJWTAuthentication
+from utils.cache import clear_local_caches
+from ilgi.users.serializers import TokenObtainPairSerializer
+from ilgi.users.views import UserMeView
+from utils import throttling as redis_throttling
+from utils.benchmark import benchmark, report
+from utils.testing import fake_redis
+from .factories import UserFactory
+
+AUTHENTICATED_REQUESTS = 5000
+THROTTLE_CHECKS = (100, 1_000, 5_000)
+CONNECTION_REQUESTS = 500
+
+
+@benchmark
+class BenchmarkJWTAuthentication(TestCase):
+    """
+    Requests per second to the me endpoint with a JWT, resolving the user
+    with a query per request and through the user cache. The response is
+    served from the response cache and throttling is off, so authentication
+    is what differs. The database is in-memory SQLite, so the query is as
+    cheap as it gets; a network round trip to PostgreSQL costs more.
+    """
+
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.addCleanup(clear_local_caches)
+        user = UserFactory()
+        token = TokenObtainPairSerializer.get_token(user).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def run_requests(self, authentication_class):
+        with patch.multiple(
+            UserMeView,
+            authentication_classes=(authentication_class,),
+            throttle_classes=(),
+        ):
+            self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                for _ in range(AUTHENTICATED_REQUESTS):
+                    self.client.get("/api/auth/me/")
+                elapsed = time.perf_counter() - start
+        return AUTHENTICATED_REQUESTS / elapsed, len(queries) / AUTHENTICATED_REQUESTS
+
+    def test_requests_per_second(self):
+        rows = []
+        for label, authentication_class in (
+            ("query per request", JWTAuthentication),
+            ("cached user", CachedJWTAuthentication),
+        ):
+            per_second, queries = self.run_requests(authentication_class)
+            rows.append((label, f"{per_second:,.0f} req/s, {queries:g} queries/req"))
+        report(f"JWT authentication ({AUTHENTICATED_REQUESTS:,} requests)", rows)
+
+
+@benchmark
+@fake_redis()
+class BenchmarkThrottling(TestCase):
+    """
+    Throttle checks of one user, with DRF's UserRateThrottle keeping its
+    request history in the cache and with the sliding window counters, both
+    on a fakeredis server: checks per second and the bytes stored in Redis
+    after 100, 1,000 and 5,000 checks. DRF's history grows with every request
+    in the window, the counters don't.
+
+    fakeredis runs Lua through lupa, which makes the script slower than it
+    is in Redis. Against a real Redis, where the network round trip
+    dominates, the script is one round trip per check and DRF's GET and SET
+    are two.
+    """
+
+    def setUp(self):
+        self.request = Request(APIRequestFactory().get("/"))
+        self.request.user = UserFactory()
+
+    def run_checks(self, throttle_class, checks):
+        cache.clear()
+        rates = {"user": "1000000/hour"}
+        with patch.object(throttle_class, "THROTTLE_RATES", rates):
+            start = time.perf_counter()
+            for _ in range(checks):
+                self.assertTrue(throttle_class().allow_request(self.request, None))
+            per_second = checks / (time.perf_counter() - start)
+        client = redis_throttling.get_redis()
+        stored = sum(client.strlen(key) for key in client.keys("*"))
+        return f"{per_second:,.0f}/s, {stored:,} bytes"
+
+    def test_checks_per_second(self):
+        rows = []
+        for checks in THROTTLE_CHECKS:
+            stock = self.run_checks(throttling.UserRateThrottle, checks)
+            sliding = self.run_checks(redis_throttling.UserRateThrottle, checks)
+            rows.append((f"{checks:,} checks", f"history {stock}; counters {sliding}"))
+        report("User rate throttle (fakeredis)", rows)
+
+
+@benchmark
+@skipUnless(connection.vendor == "postgresql", "pools are for PostgreSQL")
+class BenchmarkConnectionSetup(TestCase):
+    """
+    Milliseconds per request of the database work of a request as Django
+    does it: check the connection at the start, run a query and release
+    the connection at the end. With a new connection per request, which
+    pays for connecting (and the TLS handshake, against a remote server)
+    every time, a persistent connection per thread and the psycopg pool.
+    """
+
+    def run_requests(self, name, conn_max_age, pool):
+        settings_dict = copy.deepcopy(connection.settings_dict)
+        settings_dict["CONN_MAX_AGE"] = conn_max_age
+        settings_dict["OPTIONS"].pop("pool", None)
+        if pool:
+            settings_dict["OPTIONS"]["pool"] = {"min_size": 1, "max_size": 1}
+        wrapper = type(connection)(settings_dict, alias=f"benchmark-{name}")
+        try:
+            start = time.perf_counter()
+            for _ in range(CONNECTION_REQUESTS):
+                # what the request_started and request_finished signals do
+                wrapper.close_if_unusable_or_obsolete()
+                with wrapper.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                wrapper.close_if_unusable_or_obsolete()
+            elapsed = time.perf_counter() - start
+        finally:
+            wrapper.close()
+            if pool:
+                wrapper.close_pool()
+        return elapsed / CONNECTION_REQUESTS * 1000
+
+    def test_request_latency(self):
+        rows = []
+        for name, conn_max_age, pool in (
+            ("new connection", 0, False),
+            ("persistent connection", 60, False),
+            ("pool", 0, True),
+        ):
+            ms = self.run_requests(name, conn_max_age, pool)
+            rows.append((name, f"{ms:.3f} ms/request"))
+        report(f"Database connections ({CONNECTION_REQUESTS:,} requests)", rows)
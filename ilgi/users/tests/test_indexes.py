@@ -0,0 +1,45 @@
+from django.db import IntegrityError
+from django.db.models.functions import Lower
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from ilgi.users.models import User
+from utils.testing import QueryPlanMixin
+from .factories import UserFactory
+
+
+class TestUserEmailIndex(QueryPlanMixin, TestCase):
+    def setUp(self):
+        self.user = UserFactory.with_password("secret123", email="someone@example.com")
+
+    def test_natural_key_lookup(self):
+        """Test that users are looked up by email from the LOWER(email) index"""
+
+        queryset = User.objects.alias(email_lower=Lower("email")).filter(
+            email_lower="someone@example.com"
+        )
+        self.assertUsesIndex(queryset, "user_email_lower_uniq")
+        self.assertEqual(
+            User.objects.get_by_natural_key("SomeOne@Example.com"), self.user
+        )
+
+    def test_login_ignores_case(self):
+        """Test that a token can be obtained with the email in any case"""
+
+        resp = APIClient().post(
+            "/api/auth/token/",
+            {"email": "SOMEONE@example.COM", "password": "secret123"},
+        )
+        self.assertEqual(resp.status_code, 200)
+
+    def test_unique_ignoring_case(self):
+        """Test that emails only differing in case can't both be stored"""
+
+        with self.assertRaises(IntegrityError):
+            User.objects.create(email="Someone@Example.com")
+
+    def test_create_user_normalizes(self):
+        """Test that the manager stores emails lowercased"""
+
+        user = User.objects.create_user("Other@Example.com", "secret123")
+        self.assertEqual(user.email, "other@example.com")
@@ -0,0 +1,25 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .factories import UserFactory
+
+
+class TestUserMeCache(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory(name="Before")
+        self.client.force_authenticate(user=self.user)
+
+    def test_cached_until_user_changes(self):
+        """Test that the me view is cached and invalidated on user saves"""
+
+        self.assertEqual(self.client.get("/api/auth/me/")["X-Cache"], "MISS")
+        resp = self.client.get("/api/auth/me/")
+        self.assertEqual(resp["X-Cache"], "HIT")
+        self.assertEqual(resp.json()["name"], "Before")
+
+        self.user.name = "After"
+        self.user.save()
+        resp = self.client.get("/api/auth/me/")
+        self.assertEqual(resp["X-Cache"], "MISS")
+        self.assertEqual(resp.json()["name"], "After")
@@ -0,0 +1,37 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .factories import AdminUserFactory, UserFactory
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_admin_only(self):
+        """Test that only admins can read the metrics"""
+
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 401)
+        self.client.force_authenticate(user=UserFactory())
+        self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+
+    def test_metrics(self):
+        """Test that the database connections and cache namespaces are reported"""
+
+        self.client.force_authenticate(user=AdminUserFactory())
+        resp = self.client.get("/api/metrics/")
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertIsInstance(data["pid"], int)
+        # SQLite has no pool
+        self.assertEqual(
+            data["databases"]["default"],
+            {
+                "vendor": "sqlite",
+                "conn_max_age": 0,
+                "health_checks": True,
+                "pool": None,
+            },
+        )
+        self.assertIn("response-cache", data["caches"])
+        self.assertIn("auth-user", data["caches"])
@@ -0,0 +1,107 @@
+from unittest.mock import patch
+
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from redis.exceptions import ConnectionError as RedisConnectionError
+from rest_framework.test import APIClient
+
+from utils.cache import clear_local_caches
+from utils.testing import fake_redis
+from utils.throttling import RateLimitHeadersMiddleware, UserRateThrottle
+from .factories import UserFactory
+
+NOW = 1_700_000_080.0  # 40 seconds into a minute
+
+
+@fake_redis()
+class TestSlidingWindowThrottle(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_caches()
+        self.addCleanup(clear_local_caches)
+        self.client = APIClient()
+        self.client.force_authenticate(user=UserFactory())
+
+        rates = patch.object(UserRateThrottle, "THROTTLE_RATES", {"user": "3/min"})
+        rates.start()
+        self.addCleanup(rates.stop)
+        self.now = NOW
+        timer = patch.object(UserRateThrottle, "timer", lambda throttle: self.now)
+        timer.start()
+        self.addCleanup(timer.stop)
+
+    def get_me(self):
+        return self.client.get("/api/auth/me/")
+
+    def test_quota_headers(self):
+        """Test that responses report the quota left and the window reset"""
+
+        for remaining in (2, 1, 0):
+            resp = self.get_me()
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(resp["RateLimit-Limit"], "3")
+            self.assertEqual(resp["RateLimit-Remaining"], str(remaining))
+            self.assertEqual(resp["RateLimit-Reset"], "20")
+
+    async def test_quota_headers_async(self):
+        """Test that the headers middleware stays async under ASGI"""
+
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = RateLimitHeadersMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get("/")
+        request.throttle_quota = (3, 2, 19.5)
+        resp = await middleware(request)
+        self.assertEqual(resp["RateLimit-Remaining"], "2")
+        self.assertEqual(resp["RateLimit-Reset"], "20")
+
+    def test_limit(self):
+        """Test that requests over the limit are refused until the next window"""
+
+        for _ in range(3):
+            self.get_me()
+        resp = self.get_me()
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(resp["RateLimit-Remaining"], "0")
+        # 20 seconds to the next window, then 20 more until a third of the
+        # three requests there slid out
+        self.assertEqual(resp["Retry-After"], "40")
+
+        self.now += 40
+        self.assertEqual(self.get_me().status_code, 200)
+
+    def test_sliding_window(self):
+        """Test that the previous window counts by the share still in range"""
+
+        for _ in range(3):
+            self.get_me()
+        # 45 seconds into the next window, a quarter of the previous counts
+        self.now += 65
+        resp = self.get_me()
+        self.assertEqual(resp["RateLimit-Remaining"], "1")
+        self.assertEqual(self.get_me().status_code, 200)
+        self.assertEqual(self.get_me().status_code, 429)
+
+    def test_limits_per_user(self):
+        """Test that users have separate counters"""
+
+        for _ in range(3):
+            self.get_me()
+        self.client.force_authenticate(user=UserFactory())
+        self.assertEqual(self.get_me()["RateLimit-Remaining"], "2")
+
+    def test_redis_errors_allow(self):
+        """Test that requests are allowed if Redis fails"""
+
+        for _ in range(3):
+            self.get_me()
+        with (
+            patch("utils.throttling._script") as script,
+            self.assertLogs("utils.throttling", "WARNING"),
+        ):
+            script.return_value.side_effect = RedisConnectionError
+            self.assertEqual(self.get_me().status_code, 200)
@@ -4,8 +4,11 @@ from rest_framework.permissions import IsAuthenticated
 from .serializers import UserSerializer
 from drf_spectacular.utils import extend_schema
 
+from utils.asyncviews import AsyncViewMixin
+from utils.response_cache import CachedResponseMixin
 
-class UserMeView(APIView):
+
+class UserMeView(AsyncViewMixin, CachedResponseMixin, APIView):
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
 
@@ -15,6 +18,8 @@ class UserMeView(APIView):
         tags=["Authentication"],
         responses={200: UserSerializer}
     )
-    def get(self, request):
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+    async def get(self, request):
+        async def render():
+            return Response(UserSerializer(request.user).data)
+
+        return await self.aget_cached_response(request, render)
@@ -0,0 +1,98 @@
+"""
+`async def` handlers for DRF views and viewsets.
+
+DRF dispatches synchronously, so under ASGI Django runs every DRF view in
+a thread. Views with AsyncViewMixin are coroutines instead: authentication,
+permissions and throttling still run as sync code (via sync_to_async, as
+Django runs sync views), but `async def` handlers run on the event loop and
+wait for the database with the async ORM (`aget`, `aiterator`,
+`aaggregate`). Sync handlers of the same view, such as writes, keep running
+in a thread.
+
+That doesn't make a request thread-free under the MIDDLEWARE of
+config.settings: WhiteNoiseMiddleware is sync only, so Django runs it (and
+the middleware before it) in a thread of the request, which blocks in
+async_to_sync while the middleware after it and the view run on the event
+loop, and runs the request's sync_to_async calls meanwhile. Each request in
+flight holds a thread either way; the async views save switching to it and
+back for each of their queries, not the thread.
+
+Under WSGI the views still work, each request running its own event loop.
+"""
+
+from functools import update_wrapper
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+
+
+class AsyncViewMixin:
+    """
+    Mixin for APIView and GenericViewSet subclasses with `async def`
+    handlers or actions.
+    """
+
+    # dispatch is async whatever the handlers, so Django mustn't check that
+    # they're all sync or all async
+    view_is_async = False
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        view = super().as_view(*args, **kwargs)
+
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        return update_wrapper(async_view, view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_object(self):
+        """
+        `get_object` with the async ORM.
+        """
+
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(
+            queryset, self.request, view=self
+        )
@@ -0,0 +1,45 @@
+import os
+import statistics
+import time
+from unittest import skipUnless
+
+from django.test import tag
+
+
+def benchmark(test_item):
+    """
+    Mark a test case or method as a benchmark.
+
+    Benchmarks are slow and only print timings, so they are skipped unless
+    the `BENCHMARK` environment variable is set:
+
+        BENCHMARK=true python manage.py test --tag benchmark
+    """
+
+    enabled = os.environ.get("BENCHMARK", "").lower() in ["true", "yes", "1"]
+    test_item = tag("benchmark")(test_item)
+    return skipUnless(enabled, "set BENCHMARK=true to run benchmarks")(test_item)
+
+
+def measure(func, repeat=5):
+    """
+    Call `func` `repeat` times and return the median wall time in seconds.
+    """
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def report(title, rows):
+    """
+    Print a small aligned table of (label, value) rows to stdout.
+    """
+
+    width = max(len(str(label)) for label, _ in rows)
+    print(f"\n{title}")
+    for label, value in rows:
+        print(f"  {str(label):<{width}}  {value}")
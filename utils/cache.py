@@ -0,0 +1,334 @@
+"""
+Two-tier cache: a bounded LRU in each process in front of the shared
+default cache, which is django-redis when REDIS_URL is set and locmem
+otherwise.
+
+Reads try this process' LRU first, then the shared cache, and copy what
+they find there into the LRU. Writes and deletes go to both. Entries in the
+LRUs of other processes can't be reached, so they only live for
+`local_timeout` seconds (CACHE_LOCAL_TIMEOUT by default), the longest a
+delete takes to apply everywhere. The LRU is skipped when the shared cache
+is locmem, which is per process already.
+
+Entries can be tagged. Tags have a version in the shared cache, entries
+keep the versions of their tags at the time their value was computed, and
+reading an entry compares those against the current ones; so bumping a tag
+(`invalidate_tags`) makes all of its entries stale at once, in every
+process, without finding them. Reading a tagged entry costs a round trip
+for the tag versions even when the LRU has it.
+
+`get_or_set` computes a missing value once: other threads of the process
+wait for it, and other processes too, up to LOCK_TIMEOUT seconds, through a
+lock in the shared cache.
+
+Values from the LRU are the cached objects themselves, shared between the
+threads of the process, so they must not be modified.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+TAG_PREFIX = "cache-tag"
+
+MISSING = object()
+
+_instances = {}
+
+
+class LRUCache:
+    """
+    A bounded, thread safe mapping that evicts the least recently used
+    entries beyond `max_size` and expires entries after `timeout` seconds
+    (or their own timeout, if shorter).
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        if timeout is None or timeout > self.timeout:
+            timeout = self.timeout
+        with self._lock:
+            self._entries[key] = (time.monotonic() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TwoTierCache:
+    """
+    A namespace of the two-tier cache: keys are prefixed with `prefix`, and
+    `timeout` (seconds in the shared cache, the cache's default if None),
+    `local_size` and `local_timeout` default to the CACHE_LOCAL_* settings.
+    A `local_timeout` of 0 disables the LRU.
+    """
+
+    def __init__(
+        self, prefix, timeout=None, local_size=None, local_timeout=None, alias="default"
+    ):
+        self.prefix = prefix
+        self.timeout = timeout
+        self.alias = alias
+        if local_size is None:
+            local_size = settings.CACHE_LOCAL_SIZE
+        if local_timeout is None:
+            local_timeout = settings.CACHE_LOCAL_TIMEOUT
+        self.local = LRUCache(local_size, local_timeout)
+        self.counts = dict.fromkeys(
+            ["local_hits", "shared_hits", "misses", "stale", "sets", "waits"], 0
+        )
+        self._counts_lock = threading.Lock()
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        _instances[prefix] = self
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def _uses_local(self):
+        return self.local.timeout > 0 and not isinstance(self.shared, LocMemCache)
+
+    def _key(self, key):
+        return f"{self.prefix}:{key}"
+
+    def get(self, key, default=None):
+        """
+        Return the value of `key`, or `default` if it's missing or stale.
+        """
+
+        key = self._key(key)
+        uses_local = self._uses_local()
+        entry = self.local.get(key) if uses_local else None
+        tier = "local_hits"
+        if entry is None:
+            entry = self.shared.get(key)
+            tier = "shared_hits"
+            if entry is None:
+                self._count("misses")
+                return default
+            if uses_local:
+                self.local.set(key, entry, self.timeout)
+
+        value, versions = entry
+        if versions and self.get_tag_versions(versions) != versions:
+            self._count("stale")
+            return default
+        self._count(tier)
+        return value
+
+    def set(self, key, value, timeout=None, tags=(), versions=None):
+        """
+        Store `value` under `key` for `timeout` seconds, tagged with `tags`.
+        Pass the `versions` of the tags taken (see `get_tag_versions`)
+        before computing the value, so that invalidations of the tags while
+        it was computed make it stale.
+        """
+
+        if versions is None and tags:
+            versions = self.get_tag_versions(tags)
+        if timeout is None:
+            timeout = self.timeout
+        key = self._key(key)
+        entry = (value, versions or None)
+        if timeout is None:
+            self.shared.set(key, entry)
+        else:
+            self.shared.set(key, entry, timeout)
+        if self._uses_local():
+            self.local.set(key, entry, timeout)
+        self._count("sets")
+
+    def get_or_set(self, key, compute, timeout=None, tags=()):
+        """
+        Return the value of `key`, computing it with `compute()` and storing
+        it if it's missing or stale. Concurrent callers missing the same key
+        wait for the first one instead of computing it again; if `compute`
+        raises, the exception propagates and nothing is stored.
+        """
+
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = threading.Event()
+        if not leader:
+            self._count("waits")
+            flight.wait(LOCK_TIMEOUT)
+            value = self.get(key, MISSING)
+            if value is not MISSING:
+                return value
+            return self._compute(key, compute, timeout, tags)
+
+        try:
+            return self._compute(key, compute, timeout, tags)
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.set()
+
+    def _compute(self, key, compute, timeout, tags):
+        lock_key, token = f"{self._key(key)}:lock", uuid4().hex
+        if not self.shared.add(lock_key, token, LOCK_TIMEOUT):
+            # another process computes it, wait for its value
+            self._count("waits")
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while time.monotonic() < deadline and self.shared.get(lock_key):
+                time.sleep(LOCK_POLL_INTERVAL)
+                value = self.get(key, MISSING)
+                if value is not MISSING:
+                    return value
+            self.shared.add(lock_key, token, LOCK_TIMEOUT)
+
+        try:
+            versions = self.get_tag_versions(tags) if tags else None
+            value = compute()
+            self.set(key, value, timeout, tags, versions)
+            return value
+        finally:
+            if self.shared.get(lock_key) == token:
+                self.shared.delete(lock_key)
+
+    def delete_many(self, keys):
+        """
+        Delete the entries of `keys`, right away and again once the
+        surrounding transaction commits, so that values computed from
+        pre-commit data in between are dropped as well.
+        """
+
+        keys = [self._key(key) for key in keys]
+
+        def delete():
+            self.shared.delete_many(keys)
+            for key in keys:
+                self.local.delete(key)
+
+        delete()
+        transaction.on_commit(delete)
+
+    def delete(self, key):
+        self.delete_many([key])
+
+    def get_tag_versions(self, tags):
+        """
+        Return the current versions of `tags`, as {tag: version}.
+        """
+
+        keys = {tag: f"{TAG_PREFIX}:{tag}" for tag in tags}
+        found = self.shared.get_many(keys.values())
+        versions = {tag: found.get(key) for tag, key in keys.items()}
+        for tag, version in versions.items():
+            if version is None:
+                # start from the clock rather than 1 so a version lost to
+                # eviction never comes back as one entries were stored with
+                self.shared.add(keys[tag], time.time_ns(), timeout=None)
+                versions[tag] = self.shared.get(keys[tag])
+        return versions
+
+    # for async code, run in a thread like the async methods of Django's
+    # cache backends
+    async def aget(self, key, default=None):
+        return await sync_to_async(self.get, thread_sensitive=False)(key, default)
+
+    async def aset(self, key, value, timeout=None, tags=(), versions=None):
+        await sync_to_async(self.set, thread_sensitive=False)(
+            key, value, timeout, tags, versions
+        )
+
+    async def aget_tag_versions(self, tags):
+        return await sync_to_async(self.get_tag_versions, thread_sensitive=False)(tags)
+
+    def _count(self, name):
+        # `+=` on a dict item isn't atomic across threads
+        with self._counts_lock:
+            self.counts[name] += 1
+
+    def metrics(self):
+        with self._counts_lock:
+            counts = dict(self.counts)
+        return {
+            **counts,
+            "local_size": len(self.local),
+            "evictions": self.local.evictions,
+        }
+
+
+def invalidate_tags(tags, alias="default"):
+    """
+    Bump the versions of `tags`, making every entry tagged with any of them
+    stale, right away and again once the surrounding transaction commits.
+    """
+
+    keys = [f"{TAG_PREFIX}:{tag}" for tag in tags]
+
+    def bump():
+        shared = caches[alias]
+        for key in keys:
+            try:
+                shared.incr(key)
+            except ValueError:
+                shared.set(key, time.time_ns(), timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def cache_metrics():
+    """
+    Return the hit, miss and eviction counts of this process per cache
+    namespace. `stale` counts reads of entries with invalidated tags and
+    `waits` the callers of `get_or_set` that waited for another to compute.
+    """
+
+    return {prefix: cache.metrics() for prefix, cache in _instances.items()}
+
+
+def clear_local_caches():
+    """
+    Empty the LRU of every namespace in this process, e.g. between tests.
+    """
+
+    for cache in _instances.values():
+        cache.local.clear()
@@ -0,0 +1,164 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified support for the list and retrieve actions of
+    viewsets of BaseModel subclasses.
+
+    The validators come from a single aggregate query (by default max
+    `updated_at` and row count of the filtered queryset for lists, the
+    row's `updated_at` for details), so a matching If-None-Match or
+    If-Modified-Since is answered with 304 Not Modified without fetching or
+    serializing any rows. The row count catches soft deletes, which drop
+    rows from the queryset without raising its max `updated_at`.
+    """
+
+    def get_list_validators(self, queryset):
+        """
+        Return a dict of values that change whenever the list does, with
+        the newest `updated_at` as "last_modified". Override where a cheaper
+        validator exists.
+        """
+
+        return queryset.aggregate(last_modified=Max("updated_at"), count=Count("pk"))
+
+    def list(self, request, *args, **kwargs):
+        validators = self.get_list_validators(self.filter_queryset(self.get_queryset()))
+        return self.get_conditional_response(
+            request,
+            validators["last_modified"],
+            tuple(sorted(validators.items())),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def get_object_timestamp_queryset(self):
+        """
+        The `updated_at` of the object the URL looks up, as a queryset.
+        Malformed lookup values are a 404, as in `get_object`.
+        """
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            return (
+                self.filter_queryset(self.get_queryset())
+                .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+                .values_list("updated_at", flat=True)
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+
+    def retrieve(self, request, *args, **kwargs):
+        last_modified = self.get_object_timestamp_queryset().first()
+        if last_modified is None:
+            # missing (404) or never saved with a timestamp
+            return super().retrieve(request, *args, **kwargs)
+        return self.get_conditional_response(
+            request,
+            last_modified,
+            (last_modified,),
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+    async def aget_list_validators(self, queryset):
+        """
+        `get_list_validators` with the async ORM.
+        """
+
+        return await queryset.aaggregate(
+            last_modified=Max("updated_at"), count=Count("pk")
+        )
+
+    async def alist(self, request, *args, **kwargs):
+        """
+        `list` for async views: the validators, the page and the response
+        cache, if any, are awaited.
+        """
+
+        queryset = self.filter_queryset(self.get_queryset())
+        validators = await self.aget_list_validators(queryset)
+
+        async def render():
+            page = await self.apaginate_queryset(queryset)
+            if page is None:
+                rows = [row async for row in queryset.aiterator()]
+                return Response(self.get_serializer(rows, many=True).data)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        return await self.aget_conditional_response(
+            request,
+            validators["last_modified"],
+            tuple(sorted(validators.items())),
+            self._acached(request, render),
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        """
+        `retrieve` for async views.
+        """
+
+        last_modified = await self.get_object_timestamp_queryset().afirst()
+
+        async def render():
+            instance = await self.aget_object()
+            return Response(self.get_serializer(instance).data)
+
+        if last_modified is None:
+            return await render()
+        return await self.aget_conditional_response(
+            request, last_modified, (last_modified,), self._acached(request, render)
+        )
+
+    def _acached(self, request, render):
+        if not hasattr(self, "aget_cached_response"):
+            return render
+        return lambda: self.aget_cached_response(request, render)
+
+    def get_etag(self, request, validators):
+        # the same rows render differently per page and per media type
+        key = repr((request.get_full_path(), request.accepted_media_type, validators))
+        digest = hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+        return f'W/"{digest}"'
+
+    def get_conditional_response(self, request, last_modified, validators, render):
+        etag = self.get_etag(request, validators)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = render()
+        return self.add_validators(response, etag, timestamp)
+
+    def add_validators(self, response, etag, timestamp):
+        if response.status_code not in (200, 304):
+            return response
+
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        # per-user data: clients may keep it but must revalidate every time
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    async def aget_conditional_response(
+        self, request, last_modified, validators, render
+    ):
+        """
+        `get_conditional_response` with `render` a coroutine function.
+        """
+
+        etag = self.get_etag(request, validators)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await render()
+        return self.add_validators(response, etag, timestamp)
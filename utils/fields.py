@@ -1,6 +1,7 @@
 from django.core import exceptions
 from django.db import models
 
+from utils.money import Money
 from utils.ulid import ULID
 
 
@@ -41,3 +42,31 @@ class ULIDField(models.Field):
                 code="invalid",
                 params={"value": value},
             ) from e
+
+
+class MoneyField(models.BigIntegerField):
+    """
+    An amount of money stored as a BIGINT of minor units (e.g. cents) of
+    `currency`, the CURRENCY setting by default.
+
+    The Python value is the plain int, so rows load without a Decimal per
+    value and aggregates stay exact on every backend; use `to_money` (or
+    utils.serializers.MoneyField in the API) to present it.
+    """
+
+    description = "Amount of money in minor units"
+
+    def __init__(self, *args, currency=None, **kwargs):
+        self.currency = currency
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.currency is not None:
+            kwargs["currency"] = self.currency
+        return name, path, args, kwargs
+
+    def to_money(self, value) -> Money | None:
+        if value is None:
+            return None
+        return Money(value, self.currency)
@@ -0,0 +1,56 @@
+"""
+Metrics of the serving process for operators: the database connections
+(with the statistics of their psycopg pools) and the two-tier cache
+namespaces. Every worker process keeps its own, so the response names the
+process it came from.
+"""
+
+import os
+
+from django.db import connections
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from utils.cache import cache_metrics
+
+
+def database_metrics():
+    """
+    Return the connection settings of each database and, where it has a
+    pool, the pool's statistics (see psycopg_pool's `get_stats`): its size,
+    available connections, waiting requests, time spent connecting and
+    waiting for connections, and errors.
+    """
+
+    metrics = {}
+    for connection in connections.all():
+        # only the PostgreSQL backend has pools
+        pool = getattr(connection, "pool", None)
+        metrics[connection.alias] = {
+            "vendor": connection.vendor,
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+            "pool": pool.get_stats() if pool is not None else None,
+        }
+    return metrics
+
+
+class MetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        summary="Get metrics of the serving process",
+        description="Returns the database pool and cache statistics of the "
+        "worker process that served the request",
+        tags=["Metrics"],
+    )
+    def get(self, request):
+        return Response(
+            {
+                "pid": os.getpid(),
+                "databases": database_metrics(),
+                "caches": cache_metrics(),
+            }
+        )
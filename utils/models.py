@@ -15,28 +15,29 @@ class BaseModel(models.Model):
         unique=True,
         db_index=True,
     )
+    # No single-column indexes on these: queries always filter by owner
+    # first, so each model declares composite (owner, sort column) indexes
+    # instead, partial on `deleted = false` where tombstones aren't needed.
     created_at = models.DateTimeField(
         auto_now_add=True,
         null=True,
         blank=True,
-        db_index=True,
     )
     updated_at = models.DateTimeField(
         auto_now=True,
         null=True,
         blank=True,
-        db_index=True,
     )
     deleted = models.BooleanField(
         default=False,
-        db_index=True,
     )
 
     objects = BaseManager()
+    all_objects = models.Manager()
 
     class Meta:
         abstract = True
 
     def delete(self, *args):
         self.deleted = True
-        self.save(update_fields=["deleted"])
+        self.save(update_fields=["deleted", "updated_at"])
@@ -0,0 +1,127 @@
+from decimal import Decimal, InvalidOperation
+from functools import total_ordering
+
+from django.conf import settings
+
+# ISO 4217 minor units of the currencies that don't have two
+MINOR_UNITS = {
+    "BHD": 3,
+    "CLP": 0,
+    "IQD": 3,
+    "ISK": 0,
+    "JOD": 3,
+    "JPY": 0,
+    "KRW": 0,
+    "KWD": 3,
+    "LYD": 3,
+    "OMR": 3,
+    "PYG": 0,
+    "TND": 3,
+    "UGX": 0,
+    "VND": 0,
+}
+
+# Largest amount, in minor units, that parses: 15 digits, leaving headroom
+# for balances, which sum amounts into the same BIGINT columns
+MAX_MINOR = 10**15 - 1
+
+
+def minor_units(currency=None) -> int:
+    """
+    Number of decimal places of `currency`, the default currency if None.
+    """
+
+    return MINOR_UNITS.get(currency or settings.CURRENCY, 2)
+
+
+@total_ordering
+class Money:
+    """
+    An amount of money as an integer number of minor units (e.g. cents) of
+    a currency.
+
+    Money columns hold the plain integers, so sums and comparisons in the
+    database and in Python are integer arithmetic; this wrapper is for the
+    edges, parsing decimal input and formatting amounts, and refuses to mix
+    currencies.
+    """
+
+    __slots__ = ("minor", "currency")
+
+    def __init__(self, minor: int, currency: str | None = None):
+        self.minor = minor
+        self.currency = currency or settings.CURRENCY
+
+    @classmethod
+    def parse(cls, value, currency: str | None = None) -> "Money":
+        """
+        Parse a decimal amount such as "-12.50", raising ValueError if it
+        isn't a number, has more decimal places than the currency or is
+        beyond MAX_MINOR minor units.
+        """
+
+        currency = currency or settings.CURRENCY
+        if isinstance(value, float):
+            value = repr(value)
+        try:
+            scaled = Decimal(value).scaleb(minor_units(currency))
+        except (InvalidOperation, TypeError, ValueError):
+            raise ValueError(f"Invalid amount: {value!r}")
+        if not scaled.is_finite() or scaled != scaled.to_integral_value():
+            raise ValueError(f"Invalid amount: {value!r}")
+        if abs(scaled) > MAX_MINOR:
+            raise ValueError(f"Amount out of range: {value!r}")
+        return cls(int(scaled), currency)
+
+    @property
+    def places(self) -> int:
+        return minor_units(self.currency)
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.minor).scaleb(-self.places)
+
+    def __float__(self) -> float:
+        return self.minor / 10**self.places
+
+    def __str__(self) -> str:
+        if not self.places:
+            return str(self.minor)
+        units, minor = divmod(abs(self.minor), 10**self.places)
+        sign = "-" if self.minor < 0 else ""
+        return f"{sign}{units}.{minor:0{self.places}d}"
+
+    def __repr__(self) -> str:
+        return f"Money({str(self)!r}, {self.currency!r})"
+
+    def _check(self, other) -> "Money":
+        if not isinstance(other, Money):
+            return NotImplemented
+        if other.currency != self.currency:
+            raise ValueError(f"Cannot combine {self.currency} and {other.currency}")
+        return other
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        return (self.minor, self.currency) == (other.minor, other.currency)
+
+    def __hash__(self) -> int:
+        return hash((self.minor, self.currency))
+
+    def __lt__(self, other) -> bool:
+        if self._check(other) is NotImplemented:
+            return NotImplemented
+        return self.minor < other.minor
+
+    def __add__(self, other) -> "Money":
+        if self._check(other) is NotImplemented:
+            return NotImplemented
+        return Money(self.minor + other.minor, self.currency)
+
+    def __sub__(self, other) -> "Money":
+        if self._check(other) is NotImplemented:
+            return NotImplemented
+        return Money(self.minor - other.minor, self.currency)
+
+    def __neg__(self) -> "Money":
+        return Money(-self.minor, self.currency)
@@ -0,0 +1,153 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a composite, unique ordering such as ("-date", "-id").
+
+    DRF's CursorPagination only stores the first ordering field in the cursor
+    and skips ties with an OFFSET, which degrades when many rows share a value
+    (e.g. several logs on the same date). Here the cursor carries the full key
+    of the boundary row, so every page is a single range scan over the
+    matching composite index: no OFFSET, no COUNT, and rows inserted while a
+    client is paging never shift the pages it has not seen yet.
+    """
+
+    ordering = ("-id",)
+    page_size_query_param = "limit"
+    max_page_size = 1000
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        `paginate_queryset` with the async ORM.
+        """
+
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([row async for row in queryset.aiterator()])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        self.reverse = self.cursor is not None and self.cursor["r"]
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(_invert(field) for field in ordering)
+
+        if self.cursor is not None:
+            position = self.parse_position(queryset.model, self.cursor["p"])
+            queryset = queryset.filter(keyset_filter(ordering, position))
+
+        # one more row than the page tells whether another page follows
+        return queryset.order_by(*ordering)[: self.page_size + 1]
+
+    def set_page(self, results):
+        has_following = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_position(self, instance):
+        return [str(getattr(instance, field.lstrip("-"))) for field in self.ordering]
+
+    def parse_position(self, model, position):
+        if len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [
+                _get_field(model, field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor({"r": False, "p": self.get_position(self.page[-1])})
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor({"r": True, "p": self.get_position(self.page[0])})
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            return {"r": bool(int(tokens.get("r", ["0"])[0])), "p": tokens["p"]}
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, cursor):
+        tokens = {"p": cursor["p"]}
+        if cursor["r"]:
+            tokens["r"] = "1"
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+
+def keyset_filter(ordering, position):
+    """
+    Build the predicate selecting rows strictly after `position` in
+    `ordering`, i.e. the expanded form of `(a, b) > (x, y)` that also
+    handles mixed sort directions. The leading column is bounded on its
+    own so the planner can use it as an index range condition.
+    """
+
+    fields = [field.lstrip("-") for field in ordering]
+    lookups = ["lt" if field.startswith("-") else "gt" for field in ordering]
+
+    predicate = Q()
+    for i, (field, lookup) in enumerate(zip(fields, lookups)):
+        step = Q(**{fields[j]: position[j] for j in range(i)})
+        predicate |= step & Q(**{f"{field}__{lookup}": position[i]})
+
+    leading = Q(**{f"{fields[0]}__{lookups[0]}e": position[0]})
+    return leading & predicate
+
+
+def _invert(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def _get_field(model, name):
+    if name == "pk":
+        return model._meta.pk
+    return model._meta.get_field(name)
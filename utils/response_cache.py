@@ -0,0 +1,145 @@
+"""
+Per-user cache of rendered API responses, in the `response-cache`
+namespace of the two-tier cache (utils.cache).
+
+Entries are keyed by user, request path (including query parameters) and
+media type, and tagged with the user. Every write to a user's data bumps
+their tag (`invalidate_user_responses`), which makes all of their cached
+responses stale at once without having to find and delete them; they
+simply expire.
+"""
+
+import hashlib
+import os
+
+from django.conf import settings
+from rest_framework.response import Response
+
+from utils.cache import MISSING, TwoTierCache, invalidate_tags
+
+responses = TwoTierCache("response-cache")
+
+
+def user_tag(user_id):
+    return f"user:{user_id}"
+
+
+def invalidate_user_responses(user_id):
+    """
+    Discard every cached response of a user. Call on any create, update or
+    soft delete of their data.
+
+    The tag is bumped right away and again once the surrounding transaction
+    commits, so a response rendered from pre-commit data in between is
+    discarded as well.
+    """
+
+    invalidate_tags([user_tag(user_id)])
+
+
+def response_cache_stats():
+    """
+    Return the hit and miss counts of this process, which the response
+    cache's other processes don't share, with its pid.
+    """
+
+    metrics = responses.metrics()
+    return {
+        "pid": os.getpid(),
+        "hits": metrics["local_hits"] + metrics["shared_hits"],
+        "misses": metrics["misses"] + metrics["stale"],
+    }
+
+
+class _Uncacheable(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class CachedResponseMixin:
+    """
+    Cache successful list and retrieve responses of a view per user. Views
+    with other read handlers (e.g. a plain APIView.get) can wrap them with
+    `get_cached_response` directly.
+
+    The timeout defaults to the RESPONSE_CACHE_TIMEOUT setting and can be
+    set per view with `response_cache_timeout`.
+    """
+
+    response_cache_timeout = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request,
+            lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            request,
+            lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+    def get_response_cache_key(self, request):
+        variant = f"{request.get_full_path()}|{request.accepted_media_type}"
+        digest = hashlib.md5(variant.encode(), usedforsecurity=False).hexdigest()
+        return f"{request.user.pk}:{digest}"
+
+    def get_cached_response(self, request, render):
+        timeout = self.response_cache_timeout
+        if timeout is None:
+            timeout = settings.RESPONSE_CACHE_TIMEOUT
+        if not timeout or not request.user.is_authenticated:
+            return render()
+
+        # concurrent misses render once and share the result, see get_or_set
+        rendered = []
+
+        def render_data():
+            response = render()
+            if response.status_code != 200:
+                raise _Uncacheable(response)
+            rendered.append(response)
+            return response.data
+
+        try:
+            data = responses.get_or_set(
+                self.get_response_cache_key(request),
+                render_data,
+                timeout,
+                tags=[user_tag(request.user.pk)],
+            )
+        except _Uncacheable as uncacheable:
+            response = uncacheable.response
+        else:
+            if not rendered:
+                return Response(data, headers={"X-Cache": "HIT"})
+            response = rendered[0]
+        response["X-Cache"] = "MISS"
+        return response
+
+    async def aget_cached_response(self, request, render):
+        """
+        `get_cached_response` for async views, with `render` a coroutine
+        function. Concurrent misses aren't collapsed into one here.
+        """
+
+        timeout = self.response_cache_timeout
+        if timeout is None:
+            timeout = settings.RESPONSE_CACHE_TIMEOUT
+        if not timeout or not request.user.is_authenticated:
+            return await render()
+
+        key = self.get_response_cache_key(request)
+        data = await responses.aget(key, MISSING)
+        if data is not MISSING:
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        # taken before rendering, so writes meanwhile make the entry stale
+        tags = [user_tag(request.user.pk)]
+        versions = await responses.aget_tag_versions(tags)
+        response = await render()
+        if response.status_code == 200:
+            await responses.aset(key, response.data, timeout, tags, versions)
+        response["X-Cache"] = "MISS"
+        return response
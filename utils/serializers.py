@@ -1,6 +1,11 @@
+from django.utils.functional import cached_property
 from django.utils.translation import gettext as _
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import fields
+from rest_framework.settings import api_settings
 
+from .money import Money, minor_units
 from .ulid import ULID
 
 
@@ -17,3 +22,40 @@ class ULIDField(fields.Field):
 
     def to_representation(self, value) -> str:
         return str(ULID.parse(value))
+
+
+@extend_schema_field(OpenApiTypes.NUMBER)
+class MoneyField(fields.Field):
+    """
+    An amount in integer minor units, read from and written as a decimal
+    amount like DecimalField: "12.50" or 12.5 in, 12.5 out (or "12.50" with
+    COERCE_DECIMAL_TO_STRING).
+    """
+
+    default_error_messages = {
+        "invalid": _('"{value}" is not a valid amount.'),
+    }
+
+    def __init__(self, currency=None, coerce_to_string=None, **kwargs):
+        self.currency = currency
+        if coerce_to_string is None:
+            coerce_to_string = api_settings.COERCE_DECIMAL_TO_STRING
+        self.coerce_to_string = coerce_to_string
+        super().__init__(**kwargs)
+
+    @cached_property
+    def scale(self) -> int:
+        return 10 ** minor_units(self.currency)
+
+    def to_internal_value(self, data) -> int:
+        if isinstance(data, bool):
+            self.fail("invalid", value=data)
+        try:
+            return Money.parse(data, self.currency).minor
+        except ValueError:
+            self.fail("invalid", value=data)
+
+    def to_representation(self, value) -> float | str:
+        if self.coerce_to_string:
+            return str(Money(value, self.currency))
+        return value / self.scale
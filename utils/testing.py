@@ -0,0 +1,48 @@
+from django.db import connections, transaction
+from django.test import override_settings
+
+
+def fake_redis():
+    """
+    Settings pointing REDIS_URL and the default cache at a new in-process
+    fakeredis server, for tests and benchmarks of the Redis code paths. Use
+    as a decorator or context manager like override_settings.
+    """
+
+    import fakeredis
+
+    options = {
+        "connection_class": fakeredis.FakeConnection,
+        "server": fakeredis.FakeServer(),
+    }
+    return override_settings(
+        REDIS_URL="redis://fakeredis",
+        CACHES={
+            "default": {
+                "BACKEND": "django_redis.cache.RedisCache",
+                "LOCATION": "redis://fakeredis:6379/0",
+                "OPTIONS": {"CONNECTION_POOL_KWARGS": options},
+            }
+        },
+    )
+
+
+class QueryPlanMixin:
+    """
+    TestCase mixin asserting which indexes the database plans to use.
+
+    Test tables are tiny, so on PostgreSQL sequential scans are disabled for
+    the EXPLAIN; otherwise the planner would rightly prefer them.
+    """
+
+    def get_query_plan(self, queryset):
+        connection = connections[queryset.db]
+        with transaction.atomic(using=queryset.db):
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.get_query_plan(queryset)
+        self.assertIn(index_name, plan, f"{index_name} not used by:\n{plan}")
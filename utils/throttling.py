@@ -0,0 +1,171 @@
+"""
+Rate limits kept in Redis and shared by every worker and node.
+
+DRF's throttles keep the timestamp of every request in the window as a
+list in the default cache, read, appended to and written back per request,
+which costs more as the rate grows and isn't atomic between workers. These
+throttles keep two counters per scope and client instead, the requests of
+the current and of the previous fixed window, and estimate the sliding
+window as the current count plus the share of the previous one that still
+falls into it. A Lua script reads and increments them atomically in one
+round trip.
+
+Without REDIS_URL they fall back to DRF's behaviour on the default cache,
+which is per process for locmem.
+"""
+
+import logging
+import math
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from redis.exceptions import RedisError
+from rest_framework import throttling
+
+logger = logging.getLogger(__name__)
+
+# KEYS: counters of the current and the previous window
+# ARGV: limit, window length and seconds into the current window
+# Returns whether the request is allowed and both counts, including it if so
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local duration = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local current = tonumber(redis.call("GET", KEYS[1]) or "0")
+local previous = tonumber(redis.call("GET", KEYS[2]) or "0")
+if current + previous * (duration - elapsed) / duration + 1 > limit then
+    return {0, current, previous}
+end
+current = redis.call("INCR", KEYS[1])
+if current == 1 then
+    redis.call("EXPIRE", KEYS[1], duration * 2)
+end
+return {1, current, previous}
+"""
+
+_scripts = {}
+
+
+def get_redis():
+    """
+    Return the Redis client of the default cache, or None without REDIS_URL.
+    """
+
+    if not settings.REDIS_URL:
+        return None
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+def _script(client):
+    # registered once per client; it runs by SHA and is reloaded if missing
+    script = _scripts.get(id(client))
+    if script is None or script.registered_client is not client:
+        script = _scripts[id(client)] = client.register_script(SLIDING_WINDOW_SCRIPT)
+    return script
+
+
+class SlidingWindowRateThrottle(throttling.SimpleRateThrottle):
+    """
+    SimpleRateThrottle counting requests in Redis over a sliding window.
+
+    The quota left is recorded on the request for RateLimitHeadersMiddleware
+    to send as RateLimit-* response headers.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        client = get_redis()
+        if client is None:
+            return super().allow_request(request, view)
+
+        self.now = self.timer()
+        window, elapsed = divmod(self.now, self.duration)
+        keys = [f"{{{self.key}}}:{int(window)}", f"{{{self.key}}}:{int(window) - 1}"]
+        try:
+            allowed, current, previous = _script(client)(
+                keys=keys, args=[self.num_requests, self.duration, elapsed]
+            )
+        except RedisError:
+            # don't take the API down with the throttle
+            logger.warning("Rate limit check failed, allowing request", exc_info=True)
+            return True
+
+        self.elapsed, self.current, self.previous = elapsed, current, previous
+        weight = (self.duration - elapsed) / self.duration
+        remaining = self.num_requests - math.ceil(current + previous * weight)
+        self.record_quota(request, max(remaining, 0), self.duration - elapsed)
+        return bool(allowed)
+
+    def wait(self):
+        if not hasattr(self, "current"):
+            return super().wait()
+
+        # seconds until enough of the previous window slid out, or if the
+        # current one is full, into the next window until enough of it did
+        limit, duration = self.num_requests - 1, self.duration
+        if self.current > limit:
+            wait = duration - self.elapsed
+            if self.current:
+                wait += max(0, duration - limit * duration / self.current)
+            return wait
+        return max(
+            0,
+            duration - (limit - self.current) * duration / self.previous - self.elapsed,
+        )
+
+    def record_quota(self, request, remaining, reset):
+        # the throttle with the least quota left decides the headers
+        quota = getattr(request._request, "throttle_quota", None)
+        if quota is None or remaining < quota[1]:
+            request._request.throttle_quota = (self.num_requests, remaining, reset)
+
+
+class AnonRateThrottle(SlidingWindowRateThrottle, throttling.AnonRateThrottle):
+    pass
+
+
+class UserRateThrottle(SlidingWindowRateThrottle, throttling.UserRateThrottle):
+    pass
+
+
+class RateLimitHeadersMiddleware:
+    """
+    Add the RateLimit-Limit, RateLimit-Remaining and RateLimit-Reset headers
+    (the latter in seconds) of the throttles that checked the request.
+
+    Sync and async, like Django's own middleware, so it doesn't make Django
+    adapt the chain under ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.add_headers(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_headers(request, await self.get_response(request))
+
+    def add_headers(self, request, response):
+        quota = getattr(request, "throttle_quota", None)
+        if quota is not None:
+            limit, remaining, reset = quota
+            response["RateLimit-Limit"] = limit
+            response["RateLimit-Remaining"] = remaining
+            response["RateLimit-Reset"] = math.ceil(reset)
+        return response